@@ -5,9 +5,14 @@ import os
 import json
 import yaml
 import math
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 import argparse
 
+import numpy as np
+
 # from .objects import load_object, load_object_from_db
 from .objects import load_object
 from .config import appenv, loadconfig, loadtemplates
@@ -21,24 +26,170 @@ from .config import appenv, loadconfig, loadtemplates
 # from python_magnetgeo.SupraStructure import HTSInsert
 
 from .file_utils import MyOpen, findfile, search_paths
+from .geomcache import load_geometry
 from .logging_config import get_logger
+from .sections import SectionTable
 
 logger = get_logger(__name__)
 
 import magnettools.magnettools as mt
 from typing import Any, Optional
 
+# cache of magnets sections, see magnet_setup
+# key: sha256 of geometry files content and confdata (incl. materials)
+CACHE_MAXSIZE = 64
+_magnet_cache: OrderedDict = OrderedDict()
+_pmg_registered = False
+
+
+def register_classes():
+    """
+    Register python_magnetgeo YAML constructors (only once per process)
+    """
+    global _pmg_registered
+    if not _pmg_registered:
+        import python_magnetgeo as pmg
+
+        pmg.verify_class_registration()
+        _pmg_registered = True
+
+
+def magnet_key(MyEnv: appenv, confdata: dict) -> str:
+    """
+    Compute cache key for a magnet: hash of confdata (geometries and materials)
+    and of the content of every geometry file it refers to (including the
+    structure files of Supras, see :func:`magnet_tables`)
+    """
+    paths = search_paths(MyEnv, "geom")
+    geoms = [findfile(confdata["geom"], paths)]
+    for mtype in ["Helix", "Bitter", "Supra"]:
+        geoms += [findfile(obj["geom"], paths) for obj in confdata.get(mtype, [])]
+
+    for obj in confdata.get("Supra", []):
+        register_classes()
+        cad = load_geometry(findfile(obj["geom"], paths))
+        if getattr(cad, "struct", None):
+            # read by cad.get_magnet_struct() from the working directory
+            geoms.append(findfile(cad.struct, [os.getcwd()] + paths))
+
+    hkey = hashlib.sha256(json.dumps(confdata, sort_keys=True, default=str).encode())
+    for geom in geoms:
+        with open(geom, "rb") as f:
+            hkey.update(hashlib.sha256(f.read()).digest())
+    return hkey.hexdigest()
+
+
+def clear_cache():
+    """
+    Drop all cached MagnetTools structures
+    """
+    _magnet_cache.clear()
+
+
+class MagnetStructs(tuple):
+    """
+    ``(Tubes, Helices, OHelices, BMagnets, UMagnets, Shims)`` tuple
+    along with the parameters of the sections used to build them.
+
+    sections: :class:`python_magnetsetup.sections.SectionTable`,
+    see :mod:`python_magnetsetup.fieldmap`
+    """
+
+    sections: SectionTable = SectionTable.empty()
+
+
+def to_bitters(table: SectionTable, BMagnets: Optional[Any] = None) -> Any:
+    """
+    Convert a table of sections to :class:`mt.BitterMagnet` (appended to BMagnets if given)
+    """
+    if BMagnets is None:
+        BMagnets = mt.VectorOfBitters()
+    for r1, r2, h, j, z, f, rho in table.rows():
+        BMagnets.append(mt.BitterMagnet(r2, r1, h, j, z, f, rho))
+    return BMagnets
+
+
+def to_unifs(table: SectionTable, UMagnets: Optional[Any] = None) -> Any:
+    """
+    Convert a table of sections to :class:`mt.UnifMagnet` (appended to UMagnets if given)
+    """
+    if UMagnets is None:
+        UMagnets = mt.VectorOfUnifs()
+    for r1, r2, h, j, z, f, rho in table.rows():
+        UMagnets.append(mt.UnifMagnet(r2, r1, h, j, z, f, rho))
+    return UMagnets
+
+
+def to_tubes(tubes: list, Tubes: Optional[Any] = None) -> Any:
+    """
+    Convert helices tube parameters (see :func:`helix_tables`) to :class:`mt.Tube`
+    (appended to Tubes if given)
+    """
+    if Tubes is None:
+        Tubes = mt.VectorOfTubes()
+    index = 0
+    for nturns, r1, r2, h, turns, pitches in tubes:
+        Tube = mt.Tube(nturns, r1, r2, h)
+        Tube.set_index(index)
+        logger.debug(f"index: {index}, {Tube.get_index()}")
+        for n, pitch in zip(turns, pitches):
+            Tube.set_pitch(pitch)
+            Tube.set_nturn(n)
+        Tubes.append(Tube)
+        index += Tube.get_n_elem()
+    return Tubes
+
+
+def helix_tables(MyEnv: appenv, data: dict) -> tuple[list, SectionTable]:
+    """
+    Read the helices of an Insert and compute their parameters (no MagnetTools object).
+
+    :param MyEnv: Application environment (provides search paths).
+    :param data: Configuration dict containing a ``'Helix'`` list with
+        ``'geom'`` and ``'material'`` entries.
+    :return: Tuple (tubes, sections) with tubes a list of
+        ``(nturns, r1, r2, h, turns, pitch)`` (in m) and sections the
+        :class:`SectionTable` of the helices.
+    """
+    # Register YAML constructors for lazy loading
+    register_classes()
+
+    tubes = []
+    tables = []
+    for helix in data["Helix"]:
+        material = helix["material"]
+        geom = helix["geom"]
+        with MyOpen(geom, "r", paths=search_paths(MyEnv, "geom")) as cfgdata:
+            cad = load_geometry(cfgdata.name)
+        nturns = len(cad.modelaxi.turns)
+        logger.debug(f"nturns: {nturns}")
+        logger.debug(f"cad.modelaxi: {cad.modelaxi}")
+        tubes.append(
+            (
+                nturns,
+                cad.r[0] * 1.0e-3,
+                cad.r[1] * 1.0e-3,
+                cad.modelaxi.h * 1.0e-3,
+                list(cad.modelaxi.turns),
+                [pitch * 1.0e-3 for pitch in cad.modelaxi.pitch],
+            )
+        )
+        tables.append(bitter_table(cad, material))
+
+    return (tubes, SectionTable.concat(tables))
+
 
 def HMagnet(
     MyEnv: appenv,
     struct: Any,
     data: dict,
     debug: bool = False,
+    sections: Optional[list] = None,
 ) -> tuple[Any, Any, Any]:
     """
     Build a MagnetTools helix-magnet representation of an Insert.
 
-    Each helix is modelled as a :class:`mt.BitterMagnet` via :func:`BMagnet`.
+    Each helix is modelled as a :class:`mt.BitterMagnet` via :func:`bitter_table`.
     The geometry is read from the YAML file referenced in *data*.
 
     :param MyEnv: Application environment (provides search paths).
@@ -46,53 +197,51 @@ def HMagnet(
     :param data: Configuration dict containing a ``'Helix'`` list with
         ``'geom'`` and ``'material'`` entries.
     :param debug: Enable debug output.
+    :param sections: If given, the helices :class:`SectionTable` are appended to it.
     :return: Tuple of (Tubes, Helices, OHelices) as
         ``(mt.VectorOfTubes, mt.VectorOfBitters, mt.VectorOfBitters)``.
     """
-    from python_magnetgeo.Insert import Insert
-
     logger.debug(f"HMagnet: {data}")
 
     # how to create Tubes??
     # Tube(const int n= len(struct.modelaxi.turns), const MyDouble r1 = struct.r[0], const MyDouble r2 = struct.r[1], const MyDouble l = struct.modelaxi.h??)
 
-    Tubes = mt.VectorOfTubes()
-    Helices = mt.VectorOfBitters()
+    (tubes, table) = helix_tables(MyEnv, data)
+    if sections is not None:
+        sections.append(table)
+
+    Tubes = to_tubes(tubes)
+    Helices = to_bitters(table)
     OHelices = mt.VectorOfBitters()
 
-    # Register YAML constructors for lazy loading
-    import python_magnetgeo as pmg
+    logger.debug(f"HMagnet: {struct.name} Tubes: {len(Tubes)} Helices: {len(Helices)}")
+    return (Tubes, Helices, OHelices)
 
-    pmg.verify_class_registration()
 
-    index = 0
-    for helix in data["Helix"]:
-        material = helix["material"]
-        geom = helix["geom"]
-        with MyOpen(geom, "r", paths=search_paths(MyEnv, "geom")) as cfgdata:
-            cad = yaml.load(cfgdata, Loader=yaml.FullLoader)
-        nturns = len(cad.modelaxi.turns)
-        logger.debug(f"nturns: {nturns}")
-        r1 = cad.r[0]
-        r2 = cad.r[1]
-        h = cad.modelaxi.h
-        Tube = mt.Tube(nturns, r1 * 1.0e-3, r2 * 1.0e-3, h * 1.0e-3)
-        Tube.set_index(index)
-        logger.debug(f"index: {index}, {Tube.get_index()}")
-        logger.debug(f"cad.modelaxi: {cad.modelaxi}")
-        for n, pitch in zip(cad.modelaxi.turns, cad.modelaxi.pitch):
-            Tube.set_pitch(pitch * 1.0e-3)
-            Tube.set_nturn(n)
+def bitter_table(struct: Any, material: dict) -> SectionTable:
+    """
+    Compute the sections of a Bitter coil (one per axial turn group) in one pass.
 
-        Tubes.append(Tube)
-        fillingfactor = 1
-        tmp = BMagnet(cad, material, fillingfactor, debug)
-        for item in tmp:
-            Helices.append(item)
-        index += Tube.get_n_elem()
+    :param struct: CAD geometry object for the Bitter coil
+        (e.g. a ``python_magnetgeo.Bitter`` instance).
+    :param material: Physical properties dict; must contain
+        ``'ElectricalConductivity'`` (S/m).
+    :return: :class:`SectionTable` of Bitter sections.
+    """
+    rho = 1 / material["ElectricalConductivity"]
 
-    logger.debug(f"HMagnet: {struct.name} Tubes: {len(Tubes)} Helices: {len(Helices)}")
-    return (Tubes, Helices, OHelices)
+    r1 = struct.r[0] * 1.0e-3
+    r2 = struct.r[1] * 1.0e-3
+    turns = np.asarray(struct.modelaxi.turns, dtype=float)
+    pitch = np.asarray(struct.modelaxi.pitch, dtype=float)
+
+    dz = turns * pitch * 1.0e-3
+    f = 1 / turns  # struct.getFillingFactor()
+    # j = n / (r1 * log(r2/r1) * dz), n = 1 when f == 1
+    j = turns / (r1 * math.log(r2 / r1) * dz)
+    z_offset = -struct.modelaxi.h * 1.0e-3 + np.cumsum(dz) - dz / 2.0
+
+    return SectionTable(r1, r2, dz, j, z_offset, f, rho, bitter=True)
 
 
 def BMagnet(
@@ -100,12 +249,14 @@ def BMagnet(
     material: dict,
     fillingfactor: float = 1,
     debug: bool = False,
+    sections: Optional[list] = None,
+    BMagnets: Optional[Any] = None,
 ) -> Any:
     """
     Build a MagnetTools Bitter-magnet representation of a coil stack.
 
     Each axial turn group in *struct* is converted to a
-    :class:`mt.BitterMagnet` element.
+    :class:`mt.BitterMagnet` element (see :func:`bitter_table`).
 
     :param struct: CAD geometry object for the Bitter coil
         (e.g. a ``python_magnetgeo.Bitter`` instance).
@@ -113,36 +264,56 @@ def BMagnet(
         ``'ElectricalConductivity'`` (S/m).
     :param fillingfactor: Ratio of conductor volume to total volume.
     :param debug: Enable debug output.
+    :param sections: If given, the :class:`SectionTable` is appended to it.
+    :param BMagnets: If given, elements are appended to this vector.
     :return: ``mt.VectorOfBitters`` containing one element per turn group.
     """
-    from python_magnetgeo.Bitter import Bitter
+    table = bitter_table(struct, material)
+    if sections is not None:
+        sections.append(table)
+    BMagnets = to_bitters(table, BMagnets)
 
-    BMagnets = mt.VectorOfBitters()
+    logger.debug(f"BMagnet: {struct.name}, {len(table)}")
+    return BMagnets
 
-    rho = 1 / material["ElectricalConductivity"]
-    # f = fillingfactor # 1/struct.get_Nturns() # struct.getFillingFactor()
 
-    r1 = struct.r[0] * 1.0e-3
-    r2 = struct.r[1] * 1.0e-3
-    z = -struct.modelaxi.h * 1.0e-3
-
-    for n, pitch in zip(struct.modelaxi.turns, struct.modelaxi.pitch):
-        dz = n * pitch * 1.0e-3
-        f = 1 / float(n)  # struct.getFillingFactor()
-        if f != 1:
-            j = n / (r1 * math.log(r2 / r1) * dz)
-        else:
-            j = 1 / (r1 * math.log(r2 / r1) * dz)
-        z_offset = z + dz / 2.0
-        BMagnets.append(mt.BitterMagnet(r2, r1, dz, j, z_offset, f, rho))
+def unif_table(struct: Any, si: bool = False) -> SectionTable:
+    """
+    Compute the single section of a supra coil (averaged current density).
 
-        z += dz
+    :param struct: CAD geometry object for the superconducting coil
+        (e.g. a ``python_magnetgeo.Supra`` instance).
+    :param si: If True, lengths in m and current density in A/m2 (as expected by
+        :mod:`python_magnetsetup.fieldmap`), otherwise MagnetTools inputs.
+    :return: :class:`SectionTable` with one uniform section.
+    """
+    rho = 0
+    f = struct.getFillingFactor()
+    nturns = 0
+    for dp in struct.dblepancakes:
+        nturns += 2 * dp.pancake.n
 
-    logger.debug(f"BMagnet: {struct.name}, {len(BMagnets)}")
-    return BMagnets
+    if si:
+        # geometry in mm
+        j = nturns / (struct.getArea() * 1.0e-6)
+        z0 = struct.z0 * 1.0e-3
+    else:
+        j = nturns / struct.getArea() * 1.0e-6
+        z0 = struct.z0
+
+    return SectionTable(
+        struct.r0 * 1.0e-3,
+        struct.r1 * 1.0e-3,
+        struct.h * 1.0e-3,
+        j,
+        z0,
+        f,
+        rho,
+        bitter=False,
+    )
 
 
-def UMagnet(struct: Any, debug: bool = False) -> Any:
+def UMagnet(struct: Any, debug: bool = False, sections: Optional[list] = None) -> Any:
     """
     Build a single MagnetTools uniform-magnet representation of a supra coil.
 
@@ -152,49 +323,41 @@ def UMagnet(struct: Any, debug: bool = False) -> Any:
     :param struct: CAD geometry object for the superconducting coil
         (e.g. a ``python_magnetgeo.Supra`` instance).
     :param debug: Enable debug output.
+    :param sections: If given, the :class:`SectionTable` (in SI units) is appended to it.
     :return: A single :class:`mt.UnifMagnet` instance.
     """
-    from python_magnetgeo.Supra import Supra
-
-    rho = 0
-    f = struct.getFillingFactor()
-    nturns = 0
-    S = 0
-    for dp in struct.dblepancakes:
-        nturns += 2 * dp.pancake.n
-        j = nturns / struct.getArea() * 1.0e-6
+    table = unif_table(struct)
+    if sections is not None:
+        sections.append(unif_table(struct, si=True))
 
     logger.debug(f"UMagnets: {struct.name}, {1}")
-    return mt.UnifMagnet(
-        struct.r1 * 1.0e-3, struct.r0 * 1.0e-3, struct.h * 1.0e-3, j, struct.z0, f, rho
-    )
+    r1, r2, h, j, z, f, rho = next(table.rows())
+    return mt.UnifMagnet(r2, r1, h, j, z, f, rho)
 
 
-def UMagnets(
-    struct: Any,
-    detail: str = "dblepancake",
-    debug: bool = False,
-) -> Any:
+def unifs_table(
+    struct: Any, detail: str = "dblepancake", si: bool = False
+) -> SectionTable:
     """
-    Build a stack of MagnetTools uniform-magnet elements for a supra insert.
+    Compute the uniform sections of a supra insert in one pass over double pancakes.
 
-    The granularity of the decomposition is controlled by *detail*:
-
-    * ``'dblepancake'`` — one :class:`mt.UnifMagnet` per double pancake.
-    * ``'pancake'``     — one :class:`mt.UnifMagnet` per pancake.
-    * ``'tape'``        — one :class:`mt.UnifMagnet` per tape.
+    See :func:`UMagnets` for *detail* values.
 
     :param struct: CAD geometry object for the HTS insert
         (e.g. a ``python_magnetgeo.SupraStructure.HTSInsert`` instance).
-    :param detail: Decomposition level (``'dblepancake'``, ``'pancake'``,
-        or ``'tape'``).
-    :param debug: Enable debug output.
-    :return: ``mt.VectorOfUnifs`` containing one element per sub-unit.
+    :param detail: Decomposition level.
+    :param si: If True, lengths in m and current densities in A/m2 (as expected by
+        :mod:`python_magnetsetup.fieldmap`), otherwise MagnetTools inputs (mm).
+    :return: :class:`SectionTable` of uniform sections.
     """
-    from python_magnetgeo.SupraStructure import HTSInsert
+    columns = {"r1": [], "r2": [], "h": [], "j": [], "z": [], "f": []}
+    # geometry in mm
+    scales = (1.0e-3, 1.0e-3, 1.0e-3, 1.0e6, 1.0e-3, 1.0) if si else (1.0,) * 6
 
-    rho = 0
-    UMagnets = mt.VectorOfUnifs()
+    def add(r1, r2, h, j, z, f):
+        values = [value * scale for value, scale in zip((r1, r2, h, j, z, f), scales)]
+        for key, value in zip(columns, values, strict=True):
+            columns[key].append(np.broadcast_to(np.asarray(value, dtype=float), np.shape(z)))
 
     for dp in struct.dblepancakes:
         h = dp.getH()
@@ -204,20 +367,16 @@ def UMagnets(
             f = dp.getFillingFactor()
             S = dp.getArea()
             j = 2 * dp.pancake.n / S
-            UMagnets.append(mt.UnifMagnet(struct.r1, struct.r0, h, j, zm, f, rho))
+            add(struct.r0, struct.r1, h, j, np.array([zm]), f)
 
         elif detail == "pancake":
             h_p = dp.pancake.getH()
             f = dp.pancake.getFillingFactor()
             S = dp.pancake.getArea()
             j = dp.pancake.n / S
-            UMagnets.append(
-                mt.UnifMagnet(struct.r1, struct.r0, h_p, j, zi + h_p / 2.0, f, rho)
-            )
-            zi = (zm + h / 2.0) - h_p
-            UMagnets.append(
-                mt.UnifMagnet(struct.r1, struct.r0, h_p, j, zi + h_p / 2.0, f, rho)
-            )
+            # bottom and top pancakes
+            z = np.array([zi + h_p / 2.0, (zm + h / 2.0) - h_p / 2.0])
+            add(struct.r0, struct.r1, h_p, j, z, f)
 
         elif detail == "tape":
             h_p = dp.pancake.getH()
@@ -227,17 +386,46 @@ def UMagnets(
             ntapes = dp.pancake.n
             h_t = dp.pancake.tape.h
             w = dp.pancake.tape.w
-            r = dp.pancake.getR()
-            for l in range(ntapes):
-                ri = r[l]
-                ro = ri + w
-                UMagnets.append(mt.UnifMagnet(ro, ri, h_t, j, zi + h_t / 2.0, f, rho))
-
-            zi = (zm + h / 2.0) - h_p
-            for l in range(ntapes):
-                ri = r[l]
-                ro = ri + w
-                UMagnets.append(mt.UnifMagnet(ro, ri, h_t, j, zi + h_t / 2.0, f, rho))
+            ri = np.asarray(dp.pancake.getR()[:ntapes], dtype=float)
+            # tapes of bottom then top pancakes
+            ri = np.concatenate([ri, ri])
+            z = np.repeat([zi + h_t / 2.0, (zm + h / 2.0) - h_p + h_t / 2.0], ntapes)
+            add(ri, ri + w, h_t, j, z, f)
+
+    if not columns["z"]:
+        return SectionTable.empty()
+    return SectionTable(
+        *[np.concatenate(columns[key]) for key in columns], 0, bitter=False
+    )
+
+
+def UMagnets(
+    struct: Any,
+    detail: str = "dblepancake",
+    debug: bool = False,
+    sections: Optional[list] = None,
+) -> Any:
+    """
+    Build a stack of MagnetTools uniform-magnet elements for a supra insert.
+
+    The granularity of the decomposition is controlled by *detail*:
+
+    * ``'dblepancake'`` — one :class:`mt.UnifMagnet` per double pancake.
+    * ``'pancake'``     — one :class:`mt.UnifMagnet` per pancake.
+    * ``'tape'``        — one :class:`mt.UnifMagnet` per tape.
+
+    :param struct: CAD geometry object for the HTS insert
+        (e.g. a ``python_magnetgeo.SupraStructure.HTSInsert`` instance).
+    :param detail: Decomposition level (``'dblepancake'``, ``'pancake'``,
+        or ``'tape'``).
+    :param debug: Enable debug output.
+    :param sections: If given, the :class:`SectionTable` (in SI units) is appended to it.
+    :return: ``mt.VectorOfUnifs`` containing one element per sub-unit.
+    """
+    table = unifs_table(struct, detail)
+    if sections is not None:
+        sections.append(unifs_table(struct, detail, si=True))
+    UMagnets = to_unifs(table)
 
     logger.debug(f"UMagnets: {struct.name}, {len(UMagnets)}")
     return UMagnets
@@ -251,9 +439,9 @@ def magnet_setup(
     """
     Build MagnetTools data structures for a single magnet.
 
-    Dispatches to :func:`HMagnet`, :func:`BMagnet`, or :func:`UMagnet` /
-    :func:`UMagnets` depending on the keys present in *confdata*
-    (``'Helix'``, ``'Bitter'``, or ``'Supra'``).
+    Dispatches to :func:`helix_tables`, :func:`bitter_table`, or :func:`unif_table` /
+    :func:`unifs_table` depending on the keys present in *confdata*
+    (``'Helix'``, ``'Bitter'``, or ``'Supra'``), see :func:`magnet_tables`.
 
     :param MyEnv: Application environment (provides search paths).
     :param confdata: Magnet configuration dict.  Must contain a ``'geom'``
@@ -262,43 +450,85 @@ def magnet_setup(
     :return: Tuple ``(Tubes, Helices, OHelices, BMagnets, UMagnets, Shims)``
         as ``(VectorOfTubes, VectorOfBitters, VectorOfBitters,
         VectorOfBitters, VectorOfUnifs, VectorOfShims)``.
+
+    Sections are cached (at most :data:`CACHE_MAXSIZE` magnets, least
+    recently used first out) by :func:`magnet_key`, so repeated calls for the
+    same geometry files and materials skip geometry parsing entirely.
+    MagnetTools vectors are built again from them on each call, so callers
+    may modify the result.
+    """
+    yamlfile = confdata["geom"]
+    logger.debug(f"ana.magnet_setup: {yamlfile}, pwd={os.getcwd()}")
+
+    key = magnet_key(MyEnv, confdata)
+    entry = cached_tables(key)
+    if entry is None:
+        entry = cache_tables(key, magnet_tables(MyEnv, confdata, debug))
+    else:
+        logger.debug(f"ana.magnet_setup: {yamlfile} found in cache")
+    return to_structs([entry["tables"]])
+
+
+def cached_tables(key: str) -> Optional[dict]:
+    """
+    Get cache entry ({"tables": ...}) for key if any
+    """
+    if key in _magnet_cache:
+        _magnet_cache.move_to_end(key)
+        return _magnet_cache[key]
+    return None
+
+
+def cache_tables(key: str, tables: dict) -> dict:
+    """
+    Store tables in cache (dropping the least recently used entry if full)
+    """
+    entry = {"tables": tables}
+    _magnet_cache[key] = entry
+    if len(_magnet_cache) > CACHE_MAXSIZE:
+        _magnet_cache.popitem(last=False)
+    return entry
+
+
+def magnet_tables(
+    MyEnv: appenv,
+    confdata: dict,
+    debug: bool = False,
+) -> dict:
+    """
+    Read the geometry of a single magnet and compute its sections.
+
+    No MagnetTools object is created, so the result can be computed in another
+    process and sent back (see :func:`msite_setup`).
+
+    :param MyEnv: Application environment (provides search paths).
+    :param confdata: Magnet configuration dict (see :func:`magnet_setup`).
+    :param debug: Enable debug output.
+    :return: dict with ``'tubes'`` (helices tube parameters, see :func:`helix_tables`),
+        ``'helices'``, ``'bitters'`` and ``'unifs'`` :class:`SectionTable`, and
+        ``'unif_sections'`` (``'unifs'`` in SI units, see :func:`unifs_table`).
     """
-    from python_magnetgeo.utils import getObject
     from python_magnetgeo.Bitter import Bitter
     from python_magnetgeo.Supra import Supra
-    import python_magnetgeo as pmg
 
     # Register YAML constructors for lazy loading
-    pmg.verify_class_registration()
+    register_classes()
 
     print("magnet_setup", "debug=", debug)
 
     yamlfile = confdata["geom"]
-    logger.debug(f"ana.magnet_setup: {yamlfile}, pwd={os.getcwd()}")
 
-    Tubes = mt.VectorOfTubes()
-    Helices = mt.VectorOfBitters()
-    OHelices = mt.VectorOfBitters()
-    UMagnets = mt.VectorOfUnifs()
-    BMagnets = mt.VectorOfBitters()
-    Shims = mt.VectorOfShims()
+    tubes = []
+    helices = SectionTable.empty()
+    bitters = []
+    unifs = []
+    unif_sections = []
 
     if "Helix" in confdata:
         print("Load an insert")
         # Download or Load yaml file from data repository??
-        cad = None
-        # with open(yamlfile, 'r') as cfgdata:
-        with MyOpen(yamlfile, "r", paths=search_paths(MyEnv, "geom")) as cfgdata:
-            cad = getObject(cfgdata.name)
-        logger.info(f"magnet.filename={cfgdata.name} done")
-        # if isinstance(cad, Insert):
-        tmp = HMagnet(MyEnv, cad, confdata, debug)
-        for item in tmp[0]:
-            Tubes.append(item)
-        for item in tmp[1]:
-            Helices.append(item)
-        for item in tmp[2]:
-            OHelices.append(item)
+        logger.info(f"magnet.filename={yamlfile}")
+        (tubes, helices) = helix_tables(MyEnv, confdata)
 
     for mtype in ["Bitter", "Supra"]:
         if mtype in confdata:
@@ -312,26 +542,57 @@ def magnet_setup(
                     obj["geom"], "r", paths=search_paths(MyEnv, "geom")
                 ) as cfgdata:
                     # YAML constructors already registered above
-                    cad = yaml.load(cfgdata, Loader=yaml.FullLoader)
+                    cad = load_geometry(cfgdata.name)
 
                 if isinstance(cad, Bitter):
-                    fillingfactor = 1 / cad.modelaxi.get_Nturns()
-                    tmp = BMagnet(cad, obj["material"], fillingfactor, debug)
-                    for item in tmp:
-                        BMagnets.append(item)
+                    bitters.append(bitter_table(cad, obj["material"]))
                 elif isinstance(cad, Supra):
                     # get HTSinsert from cad
                     if cad.detail is None:
-                        tmp = UMagnet(cad, debug)
-                        UMagnets.append(tmp)
+                        unifs.append(unif_table(cad))
+                        unif_sections.append(unif_table(cad, si=True))
                     else:
                         sstruct = cad.get_magnet_struct()
-                        tmp = UMagnets(sstruct, cad.detail, debug)
-                        for item in tmp:
-                            UMagnets.append(item)
+                        unifs.append(unifs_table(sstruct, cad.detail))
+                        unif_sections.append(unifs_table(sstruct, cad.detail, si=True))
                 else:
                     raise Exception(f"setup: unexpected cad type {str(type(cad))}")
 
+    return {
+        "tubes": tubes,
+        "helices": helices,
+        "bitters": SectionTable.concat(bitters),
+        "unifs": SectionTable.concat(unifs),
+        "unif_sections": SectionTable.concat(unif_sections),
+    }
+
+
+def to_structs(tables: list) -> MagnetStructs:
+    """
+    Convert the tables of one or several magnets (in order) to MagnetTools vectors.
+
+    Sections are tagged with the index of their magnet in *tables*.
+    """
+    Tubes = mt.VectorOfTubes()
+    Shims = mt.VectorOfShims()
+    OHelices = mt.VectorOfBitters()
+
+    for mtables in tables:
+        # tube indices are numbered per magnet
+        to_tubes(mtables["tubes"], Tubes)
+    helices = SectionTable.concat(
+        [mtables["helices"].with_magnet(i) for i, mtables in enumerate(tables)]
+    )
+    bitters = SectionTable.concat(
+        [mtables["bitters"].with_magnet(i) for i, mtables in enumerate(tables)]
+    )
+    unifs = SectionTable.concat(
+        [mtables["unifs"].with_magnet(i) for i, mtables in enumerate(tables)]
+    )
+    Helices = to_bitters(helices)
+    BMagnets = to_bitters(bitters)
+    UMagnets = to_unifs(unifs)
+
     # Bstacks = mt.VectorOfStacks()
     print("Helices:", len(Tubes))
     if len(BMagnets) != 0:
@@ -342,24 +603,36 @@ def magnet_setup(
         print("UStacks:", len(Ustacks))
     # print("\n")
 
-    return (Tubes, Helices, OHelices, BMagnets, UMagnets, Shims)
+    res = MagnetStructs((Tubes, Helices, OHelices, BMagnets, UMagnets, Shims))
+    res.sections = SectionTable.concat(
+        [
+            mtables[kind].with_magnet(i)
+            for i, mtables in enumerate(tables)
+            for kind in ["helices", "bitters", "unif_sections"]
+        ]
+    )
+    return res
 
 
 def msite_setup(
     MyEnv: appenv,
     confdata: dict,
     debug: bool = False,
+    nworkers: Optional[int] = None,
 ) -> tuple[Any, Any, Any, Any, Any, Any]:
     """
     Build MagnetTools data structures for a multi-magnet site.
 
-    Iterates over every magnet listed in ``confdata['magnets']`` and
-    delegates to :func:`magnet_setup`, then merges results.
+    The sections of every magnet listed in ``confdata['magnets']`` are computed
+    by :func:`magnet_tables` on a pool of processes (magnets found in the cache
+    are skipped), then merged in order and converted to MagnetTools vectors once.
 
     :param MyEnv: Application environment (provides search paths).
     :param confdata: Site configuration dict containing a ``'magnets'`` list
         of per-magnet configuration dicts.
     :param debug: Enable debug output.
+    :param nworkers: Number of processes (default: one per magnet to build,
+        at most cpu count; 1 to stay in process).
     :return: Tuple ``(Tubes, Helices, OHelices, BMagnets, UMagnets, Shims)``
         as ``(VectorOfTubes, VectorOfBitters, VectorOfBitters,
         VectorOfBitters, VectorOfUnifs, VectorOfShims)``.
@@ -367,45 +640,31 @@ def msite_setup(
     logger.debug(f"msite_setup: confdata={confdata}")
     logger.debug(f"msite_setup: confdata[magnets]={confdata['magnets']}")
 
-    Tubes = mt.VectorOfTubes()
-    Helices = mt.VectorOfBitters()
-    OHelices = mt.VectorOfBitters()
-    UMagnets = mt.VectorOfUnifs()
-    BMagnets = mt.VectorOfBitters()
-    Shims = mt.VectorOfShims()
+    magnets = confdata["magnets"]
+    keys = [magnet_key(MyEnv, magnet) for magnet in magnets]
+    entries = [cached_tables(key) for key in keys]
+
+    todo = [i for i, entry in enumerate(entries) if entry is None]
+    if nworkers is None:
+        nworkers = min(len(todo), os.cpu_count() or 1)
+    logger.debug(f"msite_setup: build {len(todo)} magnets with {nworkers} workers")
+
+    if nworkers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=nworkers) as executor:
+            futures = {
+                i: executor.submit(magnet_tables, MyEnv, magnets[i], debug) for i in todo
+            }
+            tables = {i: future.result() for i, future in futures.items()}
+    else:
+        tables = {i: magnet_tables(MyEnv, magnets[i], debug) for i in todo}
 
-    for magnet in confdata["magnets"]:
-        logger.debug(
-            f"magnet: {magnet}, type={type(magnet)}={type(magnet)} debug={debug}"
-        )
-        logger.debug(f"mconfdata[geom]: {magnet['geom']}")
-        tmp = magnet_setup(MyEnv, magnet, debug)
-
-        # pack magnets
-        for item in tmp[0]:
-            Tubes.append(item)
-        for item in tmp[1]:
-            Helices.append(item)
-        for item in tmp[2]:
-            OHelices.append(item)
-        for item in tmp[3]:
-            BMagnets.append(item)
-        for item in tmp[4]:
-            UMagnets.append(item)
-        for item in tmp[5]:
-            Shims.append(item)
+    for i in todo:
+        entries[i] = cache_tables(keys[i], tables[i])
 
-    # Bstacks = mt.VectorOfStacks()
-    print("\nHelices:", len(Tubes))
-    if len(BMagnets) != 0:
-        Bstacks = mt.create_Bstack(BMagnets)
-        print("\nBstacks:", len(Bstacks))
-    if len(UMagnets) != 0:
-        Ustacks = mt.create_Ustack(UMagnets)
-        print("\nUStacks:", len(Ustacks))
+    # pack magnets
+    res = to_structs([entry["tables"] for entry in entries])
     print("\n")
-
-    return (Tubes, Helices, OHelices, BMagnets, UMagnets, Shims)
+    return res
 
 
 def setup(
@@ -460,7 +719,7 @@ def setup(
             with open(f"{confdata['name']}.yaml", "x") as out:
                 out.write("!<MSite>\n")
                 yaml.dump(confdata, out)
-        return msite_setup(MyEnv, confdata, args.debug or args.verbose, session)
+        return msite_setup(MyEnv, confdata, args.debug or args.verbose)
 
     return 1
 
@@ -0,0 +1,178 @@
+"""
+Streaming tarball of simulation inputs
+
+Files are streamed into a tar.gz (or a tar.zst when the zstandard module
+is available) in a single pass: each file is read once, its sha256 being
+computed while it is written to the archive. Files added several times
+(eg. geometry files shared by magnets of a site) are only stored once.
+setup collects the inputs and writes the archive once they are all
+produced (see setup.setup_archive): material templates are read from the
+template directory instead of being copied to the working directory.
+"""
+
+import os
+import io
+import hashlib
+import tarfile
+from typing import Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# size of blocks read from input files
+BLOCKSIZE = 1 << 20
+
+COMPRESSIONS = {"gz": ".tgz", "zst": ".tar.zst"}
+
+
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def archive_name(cfgfile: str, compression: str = "gz") -> str:
+    """
+    Return the tarball name for a cfgfile (see "Unpack" in setup_cmds)
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(
+            f"archive_name: unsupported compression {compression} (expect {list(COMPRESSIONS.keys())})"
+        )
+    return cfgfile.replace(".cfg", "") + COMPRESSIONS[compression]
+
+
+def unpack_cmd(tarfilename: str) -> str:
+    """
+    Return the command to unpack tarfilename
+    """
+    if tarfilename.endswith(".zst"):
+        return f"tar --zstd -xvf {tarfilename}"
+    return f"tar zxvf {tarfilename}"
+
+
+class _HashReader(io.RawIOBase):
+    """
+    Read only file wrapper updating a sha256 with the data read
+    """
+
+    def __init__(self, f, sha):
+        self.f = f
+        self.sha = sha
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = self.f.readinto(buffer)
+        if n:
+            self.sha.update(memoryview(buffer)[:n])
+        return n
+
+
+class SimArchive:
+    """
+    Tarball of simulation inputs written in a single pass
+
+    with SimArchive("M9_Bitters-cfpdes-thmagel-Axi-sim.tgz") as archive:
+        archive.add(cfgfile)
+        archive.add_many(geomfiles, arcdir="data/geometries")
+
+    checksums: {arcname: sha256} of stored files
+    """
+
+    def __init__(self, filename: str, compression: Optional[str] = None):
+        if compression is None:
+            compression = "zst" if filename.endswith(".zst") else "gz"
+        if compression == "zst" and not zstd_available():
+            raise RuntimeError(
+                f"SimArchive: zstandard module is required for {filename}"
+            )
+        if compression not in COMPRESSIONS:
+            raise ValueError(
+                f"SimArchive: unsupported compression {compression} (expect {list(COMPRESSIONS.keys())})"
+            )
+
+        self.filename = filename
+        self.compression = compression
+        self.checksums = {}
+        self.sources = {}
+        self._stream = None
+        self._zstream = None
+
+        if compression == "zst":
+            import zstandard
+
+            self._stream = open(filename, "wb")
+            self._zstream = zstandard.ZstdCompressor().stream_writer(self._stream)
+            self.tar = tarfile.open(fileobj=self._zstream, mode="w|")
+        else:
+            self.tar = tarfile.open(filename, mode="w|gz")
+        logger.debug(f"SimArchive: open {filename} ({compression})")
+
+    def __enter__(self) -> "SimArchive":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, path: str, arcname: Optional[str] = None, arcdir: str = "") -> str:
+        """
+        Stream path into the archive (as arcdir/arcname, default: basename of path)
+
+        returns the sha256 of the stored file
+        """
+        if arcname is None:
+            arcname = os.path.basename(path)
+        if arcdir:
+            arcname = f"{arcdir.rstrip('/')}/{arcname}"
+
+        source = os.path.realpath(path)
+        if arcname in self.sources:
+            if self.sources[arcname] != source:
+                logger.warning(
+                    f"SimArchive: {arcname} already stored from {self.sources[arcname]}, skip {path}"
+                )
+            return self.checksums[arcname]
+
+        info = self.tar.gettarinfo(source, arcname=arcname)
+        info.uname = info.gname = ""
+        sha = hashlib.sha256()
+        with open(source, "rb", buffering=0) as f:
+            self.tar.addfile(info, io.BufferedReader(_HashReader(f, sha), BLOCKSIZE))
+
+        self.sources[arcname] = source
+        self.checksums[arcname] = sha.hexdigest()
+        logger.debug(f"SimArchive: add {path} as {arcname} ({info.size} bytes)")
+        return self.checksums[arcname]
+
+    def add_many(self, paths: list, arcdir: str = "") -> list:
+        """
+        Stream several files into the archive, returns their sha256
+        """
+        return [self.add(path, arcdir=arcdir) for path in paths]
+
+    def write_checksums(self, arcname: str = "SHA256SUMS"):
+        """
+        Store the sha256 of files (sha256sum format) in the archive
+        """
+        data = "".join(
+            f"{sha}  {name}\n" for name, sha in self.checksums.items()
+        ).encode()
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        if self.tar is None:
+            return
+        self.tar.close()
+        if self._zstream is not None:
+            self._zstream.close()
+        if self._stream is not None and not self._stream.closed:
+            self._stream.close()
+        self.tar = None
+        print(f"SimArchive: {self.filename} ({len(self.checksums)} files)")
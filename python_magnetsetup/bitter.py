@@ -12,10 +12,11 @@ from .jsonmodel import (
     create_models_bitter,
 )
 from .utils import Merge, NMerge
+from .geomparams import BitterGeomParams
 
 import os
 
-from .file_utils import MyOpen, findfile, search_paths
+from .file_utils import MyOpen, search_paths
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -26,8 +27,6 @@ def Bitter_simfile(MyEnv, confdata: dict, cad, debug: bool = False):
 
     print(f"Bitter_simfile: cad={cad.name}")
 
-    from .file_utils import MyOpen, findfile
-
     yamlfile = confdata["geom"]
     with MyOpen(yamlfile, "r", paths=search_paths(MyEnv, "geom")) as cfgdata:
         return cfgdata
@@ -54,8 +53,6 @@ def Bitter_setup(
 
     print(f"Bitter_setup:  magnet={mname}, cad={cad.name}")
     print(f"cad={cad}")
-    print(f"cad.get_params={cad.get_params(MyEnv.yaml_repo)}")
-    (NCoolingSlits, Dh, Sh, Zh, fillingfactor) = cad.get_params(MyEnv.yaml_repo)
 
     part_thermic = []
     part_electric = []
@@ -120,17 +117,10 @@ def Bitter_setup(
         boundary_maxwell.append("Infty")
 
     # params section
-    gdata = (
-        name,
-        snames,
-        cad.modelaxi.turns,
-        NCoolingSlits,
-        Dh,
-        Sh,
-        Zh,
-        fillingfactor,
-        ignore_index,
-    )
+    gdata = BitterGeomParams.from_cad(cad, MyEnv.yaml_repo, name, snames, ignore_index)
+    print(f"cad.get_params={gdata}")
+    NCoolingSlits = gdata.NCoolingSlits
+    fillingfactor = gdata.fillingfactor
     params_data = create_params_bitter(mname, gdata, method_data, debug)
     # print(f"bitter: params_data: {params_data}")
     if "Z" in method_data[4]:
@@ -275,7 +265,7 @@ def Bitter_setup(
 
     flux_data = []
     fluxZ_data = []
-    Zh = convert_data(units, Zh, "Length")
+    Zh = gdata.converted(unit_Length).Zh.tolist()
     # print(f"Zh: {Zh}")
     for i in range(NCoolingSlits + 2):
         markers = f'["{name}_Slit{i}"]'
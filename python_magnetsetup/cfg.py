@@ -1,15 +1,13 @@
+from .templatebundle import render
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
 def entry_cfg(template: str, rdata: dict, debug: bool = False) -> str:
-    import chevron
-
     logger.debug("entry/loading %s" % str(template))
     logger.debug("entry/rdata:", rdata)
-    with open(template, "r") as f:
-        jsonfile = chevron.render(f, rdata)
+    jsonfile = render(template, rdata)
     jsonfile = jsonfile.replace("'", '"')
     return jsonfile
 
@@ -1,7 +1,11 @@
 import json
 import os
+import copy
+from dataclasses import dataclass, fields
+from functools import lru_cache
 
 from decouple import Config, RepositoryEnv
+from .templatebundle import load_bundle, use_bundle, current_bundle
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -33,7 +37,7 @@ class appenv:
         if envfile is not None:
             envdata = RepositoryEnv(envfile)
             data = Config(envdata)
-            logger.debug(f"appenv: {RepositoryEnv('settings.env').data}")
+            logger.debug(f"appenv: {envdata.data}")
 
             self.url_api = data.get("URL_API")
             self.compute_server = data.get("COMPUTE_SERVER")
@@ -75,16 +79,95 @@ class appenv:
         logger.debug(f"appenv/simage_path: {repo}")
         return repo
 
+    def snapshot(self) -> "EnvSnapshot":
+        """
+        returns an immutable copy with resolved paths
+        """
+        return EnvSnapshot.from_appenv(self)
+
+
+def _abspath(path: str | None) -> str | None:
+    return os.path.abspath(os.path.expanduser(path)) if path else path
+
+
+@dataclass(frozen=True)
+class EnvSnapshot:
+    """
+    Immutable application environment with absolute repository paths
+
+    Can be used in place of an appenv (same attributes, template_path and
+    simage_path), it is hashable and cheap to pickle for worker processes.
+    """
+
+    url_api: str | None = None
+    compute_server: str | None = None
+    visu_server: str | None = None
+    yaml_repo: str | None = None
+    cad_repo: str | None = None
+    mesh_repo: str | None = None
+    template_repo: str | None = None
+    simage_repo: str | None = None
+    mrecord_repo: str | None = None
+    optim_repo: str | None = None
+
+    @classmethod
+    def from_appenv(cls, env: appenv) -> "EnvSnapshot":
+        if isinstance(env, EnvSnapshot):
+            return env
+        repos = {
+            field.name: _abspath(getattr(env, field.name, None))
+            for field in fields(cls)
+            if field.name.endswith("_repo")
+        }
+        repos["template_repo"] = _abspath(env.template_path())
+        repos["simage_repo"] = _abspath(env.simage_path())
+        return cls(
+            url_api=env.url_api,
+            compute_server=getattr(env, "compute_server", None),
+            visu_server=getattr(env, "visu_server", None),
+            **repos,
+        )
+
+    def template_path(self, debug: bool = False) -> str:
+        return self.template_repo
+
+    def simage_path(self, debug: bool = False) -> str:
+        return self.simage_repo
+
+    def snapshot(self) -> "EnvSnapshot":
+        return self
+
+
+@lru_cache(maxsize=None)
+def _load_env(envfile: str, mtime: int) -> EnvSnapshot:
+    return appenv(envfile).snapshot()
+
+
+def load_env(envfile: str = "settings.env") -> EnvSnapshot:
+    """
+    Get the environment snapshot for envfile (parsed once until modified)
+    """
+    envfile = os.path.abspath(envfile)
+    return _load_env(envfile, os.stat(envfile).st_mtime_ns)
+
+
+@lru_cache(maxsize=None)
+def _loadconfig(filename: str, mtime: int) -> dict:
+    with open(filename, "r") as appcfg:
+        return json.load(appcfg)
+
 
 def loadconfig():
     """
-    Load app config (aka magnetsetup.json)
+    Load app config (aka magnetsetup.json, parsed once until modified)
     """
 
     default_path = os.path.dirname(os.path.abspath(__file__))
-    with open(os.path.join(default_path, "magnetsetup.json"), "r") as appcfg:
-        magnetsetup = json.load(appcfg)
-    return magnetsetup
+    bundle = load_bundle(os.path.join(default_path, "templates"))
+    if bundle is not None and bundle.appcfg is not None:
+        return copy.deepcopy(bundle.appcfg)
+    filename = os.path.join(default_path, "magnetsetup.json")
+    return copy.deepcopy(_loadconfig(filename, os.stat(filename).st_mtime_ns))
 
 
 def loadtemplates(
@@ -102,9 +185,12 @@ def loadtemplates(
 
     """
 
-    [method, time, geom, model, cooling, units_def, nonlinear] = method_data
+    # method_data may hold extra entries (eg. csv mode)
+    [method, time, geom, model, cooling, units_def, nonlinear] = method_data[:7]
     print(f"time: {time}")
     print(f"nonlinear: {nonlinear} type={type(nonlinear)}")
+    # use precompiled templates if any (see templatebundle)
+    use_bundle(load_bundle(appenv.template_path()))
     template_path = os.path.join(appenv.template_path(), method, geom, model)
 
     modelcfg = appcfg[method][time][geom][model]
@@ -182,9 +268,12 @@ def check_templates(templates: dict):
     """
     print(f"=== Templates keys ===\n {templates.keys()}")
     print("=== Checking Templates ===")
+    bundle = current_bundle()
     for key in templates:
         if isinstance(templates[key], str):
             print(f"{key}: {templates[key]}")
+            if bundle is not None and templates[key] in bundle:
+                continue
             with open(templates[key], "r"):
                 pass
 
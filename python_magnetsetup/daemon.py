@@ -0,0 +1,230 @@
+"""
+Setup daemon
+
+A persistent process keeps imports (python_magnetgeo, pint registry),
+app config, templates and preloaded geometries warm, and runs setup jobs
+sent by a thin client over a Unix socket. Each job runs in a forked child
+(cheap copy of the warm state, own working directory):
+
+    python3 -m python_magnetsetup.daemon serve --envfile settings.env --preload M9_Bitters.yaml &
+    python3 -m python_magnetsetup.daemon run --request job.json
+    python3 -m python_magnetsetup.daemon stop
+
+Requests and replies are json lines:
+``{"op": "setup", "cwd": ..., "args": {...}, "confdata": {...}, "jsonfile": ..., "currents": {...}}``
+-> ``{"status": "ok", "result": ..., "log": ...}``
+"""
+
+import os
+import io
+import sys
+import json
+import signal
+import socket
+import traceback
+import socketserver
+import contextlib
+from argparse import Namespace
+from typing import Any
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+OPS = ["ping", "setup", "setup_cmds"]
+
+
+def default_socket() -> str:
+    """
+    Socket path (MAGNETSETUP_SOCKET, default in XDG_RUNTIME_DIR or /tmp)
+    """
+    if "MAGNETSETUP_SOCKET" in os.environ:
+        return os.environ["MAGNETSETUP_SOCKET"]
+    rundir = os.environ.get("XDG_RUNTIME_DIR", "/tmp")
+    return os.path.join(rundir, f"python_magnetsetup-{os.getuid()}.sock")
+
+
+def warmup(MyEnv: Any, preload: list | None = None):
+    """
+    Load everything a setup job needs once (inherited by forked jobs)
+
+    preload: geometry files to parse (see geomcache)
+    """
+    import python_magnetgeo as pmg
+    import python_magnetgeo.utils  # noqa: F401
+    from . import setup  # noqa: F401
+    from .config import loadconfig
+    from .units import load_units
+    from .templatebundle import load_bundle, use_bundle
+
+    pmg.verify_class_registration()
+    loadconfig()
+    load_units("meter")
+    use_bundle(load_bundle(MyEnv.template_path()))
+
+    from .file_utils import findfile, search_paths
+    from .geomcache import load_geometry
+
+    for yamlfile in preload or []:
+        load_geometry(findfile(yamlfile, search_paths(MyEnv, "geom")))
+    print(f"warmup: done ({len(preload or [])} geometries preloaded)", flush=True)
+
+
+def execute(MyEnv: Any, request: dict) -> Any:
+    """
+    Run a request in the current process
+    """
+    op = request.get("op")
+    if op == "ping":
+        return "pong"
+    if op not in OPS:
+        raise ValueError(f"execute: unknown op {op} (expect {OPS})")
+
+    from . import setup
+
+    os.chdir(request["cwd"])
+    args = Namespace(**request["args"])
+    if op == "setup":
+        return setup.setup(
+            MyEnv,
+            args,
+            request["confdata"],
+            request["jsonfile"],
+            request["currents"],
+        )
+
+    # setup_cmds: node chosen from the estimated size of the case if no server
+    node_spec = None
+    if request.get("server"):
+        from .node import loadmachines
+
+        node_spec = loadmachines(request["server"])
+    return setup.setup_cmds(
+        MyEnv,
+        args,
+        node_spec,
+        request["yamlfile"],
+        request["cfgfile"],
+        request["jsonfile"],
+        request["xaofile"],
+        request["meshfile"],
+        request["csvfiles"],
+        request["root_directory"],
+        request["currents"],
+    )
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        log = io.StringIO()
+        try:
+            request = json.loads(self.rfile.readline())
+            if request.get("op") == "stop":
+                # handled in a forked child: stop the daemon
+                os.kill(os.getppid(), signal.SIGTERM)
+                result = "stopping"
+            else:
+                with contextlib.redirect_stdout(log):
+                    result = execute(self.server.MyEnv, request)
+            reply = {"status": "ok", "result": result}
+        except Exception as e:
+            logger.debug(traceback.format_exc())
+            reply = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        reply["log"] = log.getvalue()
+        self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+
+
+class _Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    pass
+
+
+def serve(MyEnv: Any, socket_path: str | None = None, preload: list | None = None):
+    """
+    Run the daemon until SIGTERM/SIGINT
+    """
+    if socket_path is None:
+        socket_path = default_socket()
+    if os.path.exists(socket_path):
+        try:
+            DaemonClient(socket_path).request({"op": "ping"})
+        except OSError:
+            os.remove(socket_path)
+        else:
+            raise RuntimeError(f"serve: a daemon is already listening on {socket_path}")
+
+    warmup(MyEnv, preload)
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    with _Server(socket_path, _Handler) as server:
+        server.MyEnv = MyEnv
+        os.chmod(socket_path, 0o600)
+        print(f"serve: listening on {socket_path}", flush=True)
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(socket_path)
+            print("serve: stopped", flush=True)
+
+
+class DaemonClient:
+    """
+    Thin client of the setup daemon
+    """
+
+    def __init__(self, socket_path: str | None = None):
+        self.socket_path = socket_path if socket_path is not None else default_socket()
+
+    def request(self, request: dict) -> dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                return json.loads(f.readline())
+
+    def call(self, op: str, **kwargs) -> Any:
+        """
+        Run op on the daemon (in the current directory), returns its result
+        """
+        reply = self.request(dict(kwargs, op=op, cwd=kwargs.get("cwd", os.getcwd())))
+        if reply["log"]:
+            print(reply["log"], end="")
+        if reply["status"] != "ok":
+            raise RuntimeError(f"DaemonClient: {op} failed - {reply['error']}")
+        return reply["result"]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Setup daemon")
+    parser.add_argument("command", choices=["serve", "run", "ping", "stop"])
+    parser.add_argument("--socket", help="unix socket", type=str, default=None)
+    parser.add_argument("--envfile", help="environment file", type=str, default="settings.env")
+    parser.add_argument("--request", help="json request file (run)", type=str, default=None)
+    parser.add_argument("--preload", help="geometries to preload (serve)", nargs="*", default=[])
+    args = parser.parse_args()
+
+    socket_path = args.socket if args.socket is not None else default_socket()
+    if args.command == "serve":
+        from .config import load_env
+
+        serve(load_env(args.envfile), socket_path, args.preload)
+        return 0
+
+    client = DaemonClient(socket_path)
+    if args.command in ["ping", "stop"]:
+        print(client.call(args.command))
+    else:
+        if not args.request:
+            parser.error("run: --request is required")
+        with open(args.request, "r") as f:
+            request = json.load(f)
+        print(json.dumps(client.call(request.pop("op"), **request), indent=4))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
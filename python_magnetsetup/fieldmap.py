@@ -0,0 +1,186 @@
+"""
+Batched evaluation of the axisymmetric magnetic field of magnets built by ana
+
+The field is linear in the magnet currents: the unit current field
+G (N points x n_magnets x [Br, Bz]) is computed once for the point set,
+then B = G . I for every current set I of the (K x n_magnets) current matrix.
+
+Sections (see :class:`python_magnetsetup.sections.SectionTable`, lengths in m,
+j in ampere-turns per m2 and per unit current) are integrated with a
+Gauss-Legendre quadrature of current loops, the point set
+being split in chunks evaluated over a pool of processes.
+"""
+
+import os
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+import numpy as np
+
+from .logging_config import get_logger
+from .sections import SectionTable
+
+logger = get_logger(__name__)
+
+MU0 = 4.0e-7 * math.pi
+
+# max size of the (points x quadrature nodes) kernel evaluated at once
+BLOCKSIZE = 1 << 22
+
+
+def ellipke(m: np.ndarray, niter: int = 32) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Complete elliptic integrals of 1st and 2nd kind K(m), E(m)
+    computed with the arithmetic-geometric mean
+    """
+    a = np.ones_like(m)
+    b = np.sqrt(1.0 - m)
+    c2sum = 0.5 * m
+    power = 0.5
+    for _ in range(niter):
+        c = 0.5 * (a - b)
+        a, b = 0.5 * (a + b), np.sqrt(a * b)
+        power *= 2
+        c2sum += power * c * c
+        if np.all(np.abs(c) < 1.0e-15):
+            break
+    K = np.pi / (2.0 * a)
+    return K, K * (1.0 - c2sum)
+
+
+def loop_field(
+    a: np.ndarray, z0: np.ndarray, r: np.ndarray, z: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Magnetic field (Br, Bz) in T of a circular loop of radius a at z0 with unit current
+    (a, z0, r and z are broadcast)
+    """
+    dz = z - z0
+    apr2 = (a + r) ** 2 + dz**2
+    amr2 = (a - r) ** 2 + dz**2
+    m = 4.0 * a * r / apr2
+    K, E = ellipke(m)
+    coef = MU0 / (2.0 * np.pi * np.sqrt(apr2))
+
+    Bz = coef * (K + (a**2 - r**2 - dz**2) / amr2 * E)
+    rsafe = np.where(r == 0, 1.0, r)
+    Br = np.where(
+        r == 0, 0.0, coef * dz / rsafe * (-K + (a**2 + r**2 + dz**2) / amr2 * E)
+    )
+    return Br, Bz
+
+
+def quadrature(
+    sections: SectionTable, nmagnets: int, order: int = 4
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Current loops equivalent to sections
+
+    returns loops radius (Q), loops z (Q) and currents per unit magnet current (Q x nmagnets)
+    """
+    x, w = np.polynomial.legendre.leggauss(order)
+
+    # j is the ampere-turn density per unit current (f only matters for the resistance)
+    r1, r2, h, j, z = sections.r1, sections.r2, sections.h, sections.j, sections.z
+    imagnet = sections.imagnet
+    bitter = sections.bitter
+
+    # nodes: (S, order) in r and z
+    rq = 0.5 * (r1 + r2)[:, None] + 0.5 * (r2 - r1)[:, None] * x[None, :]
+    zq = z[:, None] + 0.5 * h[:, None] * x[None, :]
+
+    # current density at r nodes: j (unif) or j*r1/r (bitter)
+    jq = np.where(bitter[:, None], j[:, None] * r1[:, None] / rq, j[:, None])
+    wr = 0.5 * (r2 - r1)[:, None] * w[None, :] * jq
+    wz = 0.5 * h[:, None] * w[None, :]
+
+    S = len(sections)
+    loops_r = np.broadcast_to(rq[:, :, None], (S, order, order)).reshape(-1)
+    loops_z = np.broadcast_to(zq[:, None, :], (S, order, order)).reshape(-1)
+    weights = (wr[:, :, None] * wz[:, None, :]).reshape(-1)
+
+    currents = np.zeros((S * order * order, nmagnets))
+    currents[np.arange(S * order * order), np.repeat(imagnet, order * order)] = weights
+    return loops_r, loops_z, currents
+
+
+def unit_fields(
+    loops_r: np.ndarray, loops_z: np.ndarray, currents: np.ndarray, points: np.ndarray
+) -> np.ndarray:
+    """
+    Field at points per unit magnet current
+
+    returns G (N x nmagnets x 2) with G[:, :, 0] = Br, G[:, :, 1] = Bz
+    """
+    npoints = points.shape[0]
+    G = np.empty((npoints, currents.shape[1], 2))
+    block = max(1, BLOCKSIZE // max(1, loops_r.size))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start in range(0, npoints, block):
+            r = points[start : start + block, 0, None]
+            z = points[start : start + block, 1, None]
+            Br, Bz = loop_field(loops_r[None, :], loops_z[None, :], r, z)
+            G[start : start + block, :, 0] = Br @ currents
+            G[start : start + block, :, 1] = Bz @ currents
+    return G
+
+
+def field_map(
+    stacks: Any,
+    points: np.ndarray,
+    currents: np.ndarray,
+    order: int = 4,
+    nworkers: Optional[int] = None,
+    chunksize: int = 4096,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Evaluate the magnetic field of built magnets on many points for many current sets
+
+    :param stacks: Result of :func:`ana.magnet_setup` or :func:`ana.msite_setup`
+        (or directly a :class:`SectionTable` or a list of
+        ``(imagnet, kind, r1, r2, h, j, z)``, see :meth:`SectionTable.from_rows`).
+    :param points: (N, 2) array of (r, z) points in m.
+    :param currents: (K, n_magnets) array of currents in A (a 1D array is one current set).
+    :param order: Gauss-Legendre quadrature order used in r and z for each section.
+    :param nworkers: Number of processes (default: cpu count, 1 to stay in process).
+    :param chunksize: Number of points per task.
+    :return: (Br, Bz) as (K, N) arrays in T.
+    """
+    sections = getattr(stacks, "sections", stacks)
+    if not isinstance(sections, SectionTable):
+        sections = SectionTable.from_rows(sections)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    currents = np.atleast_2d(np.asarray(currents, dtype=float))
+    nmagnets = currents.shape[1]
+    if len(sections) and sections.imagnet.max() >= nmagnets:
+        raise ValueError(
+            f"field_map: currents has {nmagnets} columns, expected one per magnet"
+        )
+
+    loops_r, loops_z, unit_currents = quadrature(sections, nmagnets, order)
+    logger.debug(
+        f"field_map: {len(sections)} sections, {loops_r.size} loops, {points.shape[0]} points"
+    )
+
+    if nworkers is None:
+        nworkers = os.cpu_count() or 1
+    chunks = [points[i : i + chunksize] for i in range(0, points.shape[0], chunksize)]
+    if nworkers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=min(nworkers, len(chunks))) as executor:
+            G = np.concatenate(
+                list(
+                    executor.map(
+                        unit_fields,
+                        [loops_r] * len(chunks),
+                        [loops_z] * len(chunks),
+                        [unit_currents] * len(chunks),
+                        chunks,
+                    )
+                )
+            )
+    else:
+        G = unit_fields(loops_r, loops_z, unit_currents, points)
+
+    B = np.einsum("nmc,km->ckn", G, currents)
+    return B[0], B[1]
@@ -9,15 +9,14 @@ from .logging_config import get_logger
 logger = get_logger(__name__)
 
 
+# appenv attribute holding the repository of each type of file
+REPOS = {"geom": "yaml_repo", "cad": "cad_repo", "mesh": "mesh_repo"}
+
+
 def search_paths(MyEnv=None, otype: str = "geom"):
     paths = [os.getcwd()]
     if MyEnv:
-        default_paths = {
-            "geom": MyEnv.yaml_repo,
-            "cad": MyEnv.cad_repo,
-            "mesh": MyEnv.mesh_repo,
-        }
-        paths.append(default_paths[otype])
+        paths.append(getattr(MyEnv, REPOS[otype]))
 
     return paths
 
@@ -69,3 +68,89 @@ class MyOpen(object):
 
     def __iter__(self):
         return iter(self.file)
+
+
+# number of threads used to look for files (lookups are pure I/O, eg. over NFS)
+LOOKUP_WORKERS = 8
+
+
+class FileManifest:
+    """
+    Ordered set of files (in first insertion order) with their size in bytes
+
+    Lookups (see :func:`findfile`) are cached and run concurrently on a small
+    thread pool, so that files shared by several magnets are only looked up
+    and listed once.
+    """
+
+    def __init__(self, workers: int = LOOKUP_WORKERS):
+        self.workers = workers
+        self.sizes = {}
+        self._real = set()
+        self._lookups = {}
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    def __iter__(self):
+        return iter(self.sizes)
+
+    def __contains__(self, filename) -> bool:
+        return os.path.realpath(filename) in self._real
+
+    @property
+    def files(self) -> list:
+        return list(self.sizes)
+
+    @property
+    def total_size(self) -> int:
+        return sum(self.sizes.values())
+
+    def find(self, requests: list) -> list:
+        """
+        Look for files of requests, a list of ``(searchfile, paths, required)``
+
+        returns the found filenames (None for files not found when not required)
+        in the order of requests
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        keys = [(searchfile, tuple(paths)) for (searchfile, paths, required) in requests]
+        missing = list(dict.fromkeys(key for key in keys if key not in self._lookups))
+
+        def lookup(key):
+            try:
+                return findfile(key[0], list(key[1]))
+            except FileNotFoundError:
+                return None
+
+        if len(missing) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                self._lookups.update(zip(missing, pool.map(lookup, missing), strict=True))
+        else:
+            self._lookups.update((key, lookup(key)) for key in missing)
+
+        results = []
+        for key, (searchfile, paths, required) in zip(keys, requests, strict=True):
+            if self._lookups[key] is None and required:
+                raise FileNotFoundError(
+                    errno.ENOENT, f"cannot find {searchfile} in paths:{list(paths)}"
+                )
+            results.append(self._lookups[key])
+        return results
+
+    def add(self, filename: str):
+        """
+        Add filename (only once) with its size
+        """
+        real = os.path.realpath(filename)
+        if real not in self._real:
+            self._real.add(real)
+            self.sizes[filename] = os.path.getsize(filename)
+
+    def extend(self, filenames: list):
+        for filename in filenames:
+            self.add(filename)
+
+    def summary(self) -> str:
+        return f"{len(self)} files, {self.total_size / 1024**2:.1f} MB"
@@ -0,0 +1,288 @@
+"""
+Cache of parsed geometries
+
+Geometry yaml files (magnets, sites, helices, Bitters, Supras) are parsed
+once per process: objects are keyed by path and checked against the file
+mtime and size, then its sha256 (a touched but unchanged file is not
+parsed again). Nested yaml files referenced by the parsed object
+(helices, rings, Bitters of a magnet... named after their file, see
+referenced_files) are checked alike, so editing a helix invalidates the
+insert using it. At most ``maxsize`` objects are kept (least recently
+used first out). Parsed objects may also be pickled on disk (keyed by
+path and content hash) to be shared between runs:
+
+    cad = load_geometry("M9_HL-31.yaml")
+    params = get_params(cad, MyEnv.yaml_repo)
+
+Objects are shared between callers and must not be modified.
+The on-disk cache is enabled by MAGNETSETUP_GEOMCACHE (directory), which
+must only be writable by trusted users (pickles are executed when loaded).
+"""
+
+import os
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+YAML_EXTENSIONS = (".yaml", ".yml")
+
+# default number of geometries kept in memory
+MAXSIZE = 128
+
+
+def referenced_files(obj: Any, dirname: str) -> set:
+    """
+    Get the yaml files of dirname referenced by obj
+
+    strings found in obj (attributes, lists and dicts, recursively) are
+    looked up as ``dirname/<string>`` (yaml file names) or
+    ``dirname/<string>.yaml`` (objects loaded from their own file are
+    named after it, eg. the helices of an insert)
+    """
+    files = set()
+    seen = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            if not item.endswith(YAML_EXTENSIONS):
+                item = f"{item}.yaml"
+            path = os.path.join(dirname, item)
+            if os.path.isfile(path):
+                files.add(os.path.abspath(path))
+            continue
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set)):
+            stack.extend(item)
+        elif hasattr(item, "__dict__"):
+            stack.extend(vars(item).values())
+    return files
+
+
+def parse_yaml(path: str) -> Any:
+    """
+    Default parser: python_magnetgeo getObject
+    """
+    from python_magnetgeo.utils import getObject
+    import python_magnetgeo as pmg
+
+    # Register YAML constructors for lazy loading
+    pmg.verify_class_registration()
+    return getObject(path)
+
+
+def signature(path: str) -> tuple:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _unchanged(deps: dict) -> bool:
+    """
+    Check files {path: [signature, sha]} (signature updated if only touched)
+    """
+    for path, state in deps.items():
+        try:
+            current = signature(path)
+        except OSError:
+            return False
+        if current == state[0]:
+            continue
+        if digest(path) != state[1]:
+            return False
+        state[0] = current
+    return True
+
+
+@dataclass
+class _Entry:
+    """
+    Parsed object of a file, its nested files and memoized params
+    """
+
+    signature: tuple
+    sha: str
+    obj: Any
+    deps: dict = field(default_factory=dict)
+    params: dict = field(default_factory=dict)
+
+
+class GeometryCache:
+    """
+    Parsed geometries by path (see module doc)
+
+    cachedir: directory of pickled objects (None: in memory only)
+    parser: function returning the object of a yaml file
+    maxsize: number of objects kept in memory
+    """
+
+    def __init__(
+        self,
+        cachedir: Optional[str] = None,
+        parser: Callable[[str], Any] = parse_yaml,
+        maxsize: int = MAXSIZE,
+    ):
+        self.cachedir = cachedir
+        self.parser = parser
+        self.maxsize = maxsize
+        self._objects = OrderedDict()
+        # id of cached objects -> entry (the entry keeps the object alive)
+        self._entries = {}
+        self.stats = {"hit": 0, "disk": 0, "parsed": 0}
+        # setups may run concurrently in threads (see setup.msite_setup):
+        # guards cache lookups and updates
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+            self._entries.clear()
+
+    def _pickle_name(self, path: str, sha: str) -> str:
+        key = hashlib.sha256(f"{path}\0{sha}".encode()).hexdigest()
+        return os.path.join(self.cachedir, f"{key}.pickle")
+
+    def _from_disk(self, path: str, sha: str) -> Optional[_Entry]:
+        if not self.cachedir:
+            return None
+        filename = self._pickle_name(path, sha)
+        if not os.path.isfile(filename):
+            return None
+        try:
+            with open(filename, "rb") as f:
+                (nested, obj) = pickle.load(f)
+            deps = {dep: [signature(dep), dep_sha] for dep, dep_sha in nested.items()}
+        except Exception as e:
+            logger.warning(f"GeometryCache: ignore {filename} ({e})")
+            return None
+        if any(digest(dep) != state[1] for dep, state in deps.items()):
+            return None
+        return _Entry(signature(path), sha, obj, deps)
+
+    def _to_disk(self, path: str, entry: _Entry):
+        if not self.cachedir:
+            return
+        os.makedirs(self.cachedir, exist_ok=True)
+        filename = self._pickle_name(path, entry.sha)
+        nested = {dep: state[1] for dep, state in entry.deps.items()}
+        # private to the writer (threads of a process may store the same file)
+        tmpname = f"{filename}.{os.getpid()}.{threading.get_ident()}"
+        try:
+            with open(tmpname, "wb") as f:
+                pickle.dump((nested, entry.obj), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpname, filename)
+        except Exception as e:
+            logger.warning(f"GeometryCache: cannot store {filename} ({e})")
+
+    def _store(self, path: str, entry: _Entry):
+        previous = self._objects.get(path)
+        if previous is not None and previous is not entry:
+            self._entries.pop(id(previous.obj), None)
+        self._objects[path] = entry
+        self._objects.move_to_end(path)
+        self._entries[id(entry.obj)] = entry
+        while len(self._objects) > self.maxsize:
+            (_, dropped) = self._objects.popitem(last=False)
+            self._entries.pop(id(dropped.obj), None)
+
+    def load(self, path: str) -> Any:
+        """
+        Get the object of a geometry file (parsed only if it or a nested file changed)
+
+        Only cache lookups and updates hold the lock: files are parsed
+        concurrently (the same file may then be parsed twice, last one kept)
+        """
+        path = os.path.abspath(path)
+        current = signature(path)
+        with self._lock:
+            (entry, sha) = self._lookup(path, current)
+        if entry is not None:
+            return entry.obj
+
+        entry = self._from_disk(path, sha)
+        if entry is not None:
+            stat = "disk"
+        else:
+            logger.debug(f"GeometryCache: parse {path}")
+            obj = self.parser(path)
+            nested = referenced_files(obj, os.path.dirname(path))
+            nested.discard(path)
+            deps = {dep: [signature(dep), digest(dep)] for dep in sorted(nested)}
+            entry = _Entry(current, sha, obj, deps)
+            stat = "parsed"
+            self._to_disk(path, entry)
+        with self._lock:
+            self.stats[stat] += 1
+            self._store(path, entry)
+        return entry.obj
+
+    def _lookup(self, path: str, current: tuple) -> tuple:
+        """
+        Get (valid entry, None) for path or (None, sha of path)
+        """
+        entry = self._objects.get(path)
+        if entry is not None and entry.signature == current and _unchanged(entry.deps):
+            self.stats["hit"] += 1
+            self._objects.move_to_end(path)
+            return (entry, None)
+
+        sha = digest(path)
+        if entry is not None and entry.sha == sha and _unchanged(entry.deps):
+            self.stats["hit"] += 1
+            entry.signature = current
+            self._objects.move_to_end(path)
+            return (entry, None)
+        return (None, sha)
+
+    def get_params(self, cad: Any, yaml_repo: Optional[str] = None) -> Any:
+        """
+        Memoized ``cad.get_params(yaml_repo)`` for objects of the cache
+
+        params are dropped with the object and recomputed when a yaml file
+        of yaml_repo referenced by the object changes
+        """
+        with self._lock:
+            entry = self._entries.get(id(cad))
+            if entry is None or entry.obj is not cad:
+                entry = None
+            else:
+                memo = entry.params.get(yaml_repo)
+                if memo is not None and _unchanged(memo[0]):
+                    return memo[1]
+
+        # computed without holding the lock
+        params = cad.get_params(yaml_repo)
+        if entry is None:
+            return params
+        nested = referenced_files(cad, yaml_repo) if yaml_repo else set()
+        deps = {dep: [signature(dep), digest(dep)] for dep in sorted(nested)}
+        with self._lock:
+            entry.params[yaml_repo] = (deps, params)
+        return params
+
+
+# geometries of the process
+geometries = GeometryCache(os.environ.get("MAGNETSETUP_GEOMCACHE"))
+
+
+def load_geometry(path: str) -> Any:
+    return geometries.load(path)
+
+
+def get_params(cad: Any, yaml_repo: Optional[str] = None) -> Any:
+    return geometries.get_params(cad, yaml_repo)
@@ -0,0 +1,223 @@
+"""
+Geometry parameters of magnets
+
+Built once from ``cad.get_params()`` and passed by reference through
+the create_params_*/create_bcs_*/create_materials_*/create_models_*
+functions of jsonmodel (instead of positional tuples).
+
+Lengths are stored in mm (as returned by python_magnetgeo) in NumPy arrays,
+see :meth:`InsertGeomParams.converted` for values in the model length unit.
+"""
+
+import numpy as np
+
+from .units import load_units, convert_data
+from .geomcache import get_params
+
+
+class InsertGeomParams:
+    """
+    Geometry of an Insert
+
+    R1, R2: inner and outer radius of helices, Dh, Sh: hydraulic diameter and
+    section of cooling channels (contiguous float arrays),
+    Zh: z of channels sections (ragged, one array per channel),
+    Nsections, turns, pitch: number of sections, turns and pitch per section of helices
+    """
+
+    __slots__ = (
+        "name",
+        "NHelices",
+        "NRings",
+        "NChannels",
+        "Nsections",
+        "R1",
+        "R2",
+        "Dh",
+        "Sh",
+        "Zh",
+        "turns",
+        "pitch",
+        "_converted",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        NHelices: int,
+        NRings: int,
+        NChannels: int,
+        Nsections: list,
+        R1,
+        R2,
+        Dh,
+        Sh,
+        Zh: list,
+        turns: list | None = None,
+        pitch: list | None = None,
+    ):
+        self.name = name
+        self.NHelices = int(NHelices)
+        self.NRings = int(NRings)
+        self.NChannels = int(NChannels)
+        self.Nsections = [int(n) for n in Nsections]
+        self.R1 = np.asarray(R1, dtype=float)
+        self.R2 = np.asarray(R2, dtype=float)
+        self.Dh = np.asarray(Dh, dtype=float)
+        self.Sh = np.asarray(Sh, dtype=float)
+        self.Zh = [np.asarray(z, dtype=float) for z in Zh]
+        self.turns = turns if turns is not None else []
+        self.pitch = pitch if pitch is not None else []
+        self._converted = {}
+
+    def __repr__(self):
+        return (
+            f"InsertGeomParams(name={self.name!r}, NHelices={self.NHelices}, "
+            f"NRings={self.NRings}, NChannels={self.NChannels})"
+        )
+
+    @classmethod
+    def from_cad(cls, cad, yaml_repo: str, name: str = "") -> "InsertGeomParams":
+        """
+        Create from an Insert object (cad.get_params is memoized, see geomcache)
+        """
+        (NHelices, NRings, NChannels, Nsections, R1, R2, Dh, Sh, Zh) = get_params(
+            cad, yaml_repo
+        )
+        turns = [helix.modelaxi.turns for helix in cad.helices]
+        pitch = [helix.modelaxi.pitch for helix in cad.helices]
+        return cls(
+            name, NHelices, NRings, NChannels, Nsections, R1, R2, Dh, Sh, Zh, turns, pitch
+        )
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.name}_" if self.name else ""
+
+    @property
+    def Zmin(self) -> np.ndarray:
+        return np.array([z.min() for z in self.Zh])
+
+    @property
+    def Zmax(self) -> np.ndarray:
+        return np.array([z.max() for z in self.Zh])
+
+    def converted(self, unit_Length: str) -> "InsertGeomParams":
+        """
+        Params with lengths in unit_Length (converted once per unit,
+        mm data are returned as is)
+        """
+        if unit_Length == "millimeter":
+            return self
+        if unit_Length not in self._converted:
+            units = load_units(unit_Length)
+            self._converted[unit_Length] = InsertGeomParams(
+                self.name,
+                self.NHelices,
+                self.NRings,
+                self.NChannels,
+                self.Nsections,
+                convert_data(units, self.R1, "Length"),
+                convert_data(units, self.R2, "Length"),
+                convert_data(units, self.Dh, "Length"),
+                convert_data(units, self.Sh, "Area"),
+                [convert_data(units, z, "Length") for z in self.Zh],
+                self.turns,
+                self.pitch,
+            )
+        return self._converted[unit_Length]
+
+
+class BitterGeomParams:
+    """
+    Geometry of a Bitter magnet
+
+    snames: names of axi sections, turns: number of turns per section,
+    ignore_index: index of sections without current (in snames),
+    Dh, Sh: hydraulic diameter and section of cooling slits, Zh: z of slits sections,
+    fillingfactor: filling factor per slit
+    """
+
+    __slots__ = (
+        "name",
+        "snames",
+        "turns",
+        "NCoolingSlits",
+        "Dh",
+        "Sh",
+        "Zh",
+        "fillingfactor",
+        "ignore_index",
+        "_converted",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        snames: list,
+        turns: list,
+        NCoolingSlits: int,
+        Dh,
+        Sh,
+        Zh,
+        fillingfactor: list,
+        ignore_index: list,
+    ):
+        self.name = name
+        self.snames = snames
+        self.turns = turns
+        self.NCoolingSlits = int(NCoolingSlits)
+        self.Dh = np.asarray(Dh, dtype=float)
+        self.Sh = np.asarray(Sh, dtype=float)
+        self.Zh = np.asarray(Zh, dtype=float)
+        self.fillingfactor = fillingfactor
+        self.ignore_index = ignore_index
+        self._converted = {}
+
+    def __repr__(self):
+        return (
+            f"BitterGeomParams(name={self.name!r}, sections={len(self.snames)}, "
+            f"NCoolingSlits={self.NCoolingSlits})"
+        )
+
+    @classmethod
+    def from_cad(
+        cls, cad, yaml_repo: str, name: str, snames: list, ignore_index: list
+    ) -> "BitterGeomParams":
+        """
+        Create from a Bitter object (cad.get_params is memoized, see geomcache)
+        """
+        (NCoolingSlits, Dh, Sh, Zh, fillingfactor) = get_params(cad, yaml_repo)
+        return cls(
+            name,
+            snames,
+            cad.modelaxi.turns,
+            NCoolingSlits,
+            Dh,
+            Sh,
+            Zh,
+            fillingfactor,
+            ignore_index,
+        )
+
+    def converted(self, unit_Length: str) -> "BitterGeomParams":
+        """
+        Params with lengths in unit_Length (converted once per unit,
+        mm data are returned as is)
+        """
+        if unit_Length == "millimeter":
+            return self
+        if unit_Length not in self._converted:
+            units = load_units(unit_Length)
+            self._converted[unit_Length] = BitterGeomParams(
+                self.name,
+                self.snames,
+                self.turns,
+                self.NCoolingSlits,
+                convert_data(units, self.Dh, "Length"),
+                convert_data(units, self.Sh, "Area"),
+                convert_data(units, self.Zh, "Length"),
+                self.fillingfactor,
+                self.ignore_index,
+            )
+        return self._converted[unit_Length]
@@ -0,0 +1,209 @@
+"""
+Run-time history of generated cases
+
+Measured durations and peak memory (of the largest process, see
+:func:`run`) of the Mesh/Partition/Run commands are stored in a local SQLite database together with the case fingerprint
+(see :func:`case_key`), the node and NP. setup_cmds wraps commands with:
+
+    python3 -m python_magnetsetup.history record --case cfpdes:static:Axi:thmagel:linear:42 \\
+        --node kelvin --np 32 --stage Run -- mpirun -np 32 ...
+
+and :func:`python_magnetsetup.placement.rank_nodes` uses the measured
+runtimes instead of its cost model when available.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import resource
+import subprocess
+
+from .placement import CaseSize
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# default database (may be overridden with MAGNETSETUP_HISTORY)
+DEFAULT_DB = os.path.join("~", ".cache", "python_magnetsetup", "history.sqlite")
+
+STAGES = ["Mesh", "Partition", "Run"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    node TEXT NOT NULL,
+    np INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    duration REAL NOT NULL,
+    maxrss INTEGER,
+    returncode INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_case ON runs (fingerprint, stage);
+"""
+
+
+def default_db() -> str:
+    return os.path.expanduser(os.environ.get("MAGNETSETUP_HISTORY", DEFAULT_DB))
+
+
+def case_key(size: CaseSize) -> str:
+    """
+    Fingerprint of a case, eg. ``cfpdes:static:Axi:thmagel:linear:42``
+    """
+    nonlinear = "nonlinear" if size.nonlinear else "linear"
+    return f"{size.method}:{size.time}:{size.geom}:{size.model}:{nonlinear}:{size.nparts}"
+
+
+def parse_case_key(key: str) -> CaseSize:
+    """
+    Get the CaseSize from a fingerprint (see :func:`case_key`)
+    """
+    try:
+        (method, stime, geom, model, nonlinear, nparts) = key.split(":")
+        return CaseSize(method, stime, geom, model, nonlinear == "nonlinear", int(nparts))
+    except ValueError as e:
+        raise ValueError(f"parse_case_key: unexpected case fingerprint {key}") from e
+
+
+class RunHistory:
+    """
+    SQLite store of measured stage durations (s) and per process peak RSS (kB)
+    """
+
+    def __init__(self, filename: str | None = None):
+        if filename is None:
+            filename = default_db()
+        if filename != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.filename = filename
+        self.db = sqlite3.connect(filename)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self) -> "RunHistory":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def record(
+        self,
+        size: CaseSize,
+        node: str,
+        np: int,
+        stage: str,
+        duration: float,
+        maxrss: int | None = None,
+        returncode: int = 0,
+    ):
+        with self.db:
+            self.db.execute(
+                "INSERT INTO runs (fingerprint, node, np, stage, duration, maxrss, returncode, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (case_key(size), node, np, stage, duration, maxrss, returncode, time.time()),
+            )
+        logger.debug(
+            "RunHistory: %s %s on %s NP=%d: %.1fs", case_key(size), stage, node, np, duration
+        )
+
+    def stats(self, size: CaseSize, stage: str = "Run") -> list:
+        """
+        Successful runs of a case per (node, np):
+        [(node, np, count, mean duration, max rss)] sorted by mean duration
+        """
+        cursor = self.db.execute(
+            "SELECT node, np, COUNT(*), AVG(duration), MAX(maxrss) FROM runs"
+            " WHERE fingerprint = ? AND stage = ? AND returncode = 0"
+            " GROUP BY node, np ORDER BY AVG(duration)",
+            (case_key(size), stage),
+        )
+        return cursor.fetchall()
+
+    def best(self, size: CaseSize, node: str | None = None, stage: str = "Run"):
+        """
+        (node, np, mean duration) of the fastest measured runs of a case
+        (on a given node if any), None if the case has never been run
+        """
+        for item in self.stats(size, stage):
+            if node is None or item[0] == node:
+                return (item[0], item[1], item[3])
+        return None
+
+
+def run(cmd: list) -> tuple:
+    """
+    Run a command, returns (returncode, duration, maxrss)
+
+    maxrss (kB) is the peak RSS of the largest single process among the
+    command and its descendants (eg. one MPI rank), not the total memory
+    of the job: RUSAGE_CHILDREN reports the max over processes.
+    """
+    start = time.perf_counter()
+    returncode = subprocess.run(cmd).returncode
+    duration = time.perf_counter() - start
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (returncode, duration, maxrss)
+
+
+def wrap_cmd(
+    cmd: str, size: CaseSize, node: str, np: int, stage: str, db: str | None = None
+) -> str:
+    """
+    Wrap a shell command to record its duration (see setup_cmds)
+    """
+    dbopt = f"--db {db} " if db else ""
+    return f"python3 -m python_magnetsetup.history {dbopt}record --case {case_key(size)} --node {node} --np {np} --stage {stage} -- {cmd}"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run-time history of generated cases")
+    parser.add_argument("--db", help="history database", type=str, default=None)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_record = subparsers.add_parser("record", help="run a command and record its duration")
+    parser_record.add_argument("--case", help="case fingerprint", type=str, required=True)
+    parser_record.add_argument("--node", help="node name", type=str, required=True)
+    parser_record.add_argument("--np", help="number of cores", type=int, required=True)
+    parser_record.add_argument("--stage", help="stage", type=str, choices=STAGES, required=True)
+    parser_record.add_argument("cmd", nargs=argparse.REMAINDER, help="command to run")
+
+    parser_stats = subparsers.add_parser("stats", help="show measured runs of a case")
+    parser_stats.add_argument("--case", help="case fingerprint", type=str, required=True)
+    parser_stats.add_argument("--stage", help="stage", type=str, choices=STAGES, default="Run")
+
+    args = parser.parse_args()
+    size = parse_case_key(args.case)
+
+    if args.command == "record":
+        cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+        if not cmd:
+            parser.error("record: missing command")
+        (returncode, duration, maxrss) = run(cmd)
+        # a broken history must not fail the simulation
+        try:
+            with RunHistory(args.db) as history:
+                history.record(size, args.node, args.np, args.stage, duration, maxrss, returncode)
+        except sqlite3.Error as e:
+            print(f"history: failed to record {args.stage}: {e}", file=sys.stderr)
+        print(
+            f"{args.stage}: {duration:.1f}s, maxrss={maxrss} kB per process (NP={args.np} on {args.node})"
+        )
+        return returncode
+
+    with RunHistory(args.db) as history:
+        for (node, np, count, duration, maxrss) in history.stats(size, args.stage):
+            print(
+                f"{node}: NP={np} runs={count} duration={duration:.1f}s maxrss={maxrss} kB per process"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
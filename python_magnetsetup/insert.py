@@ -13,7 +13,8 @@ from .jsonmodel import (
     create_models_insert,
 )
 from .utils import Merge, NMerge
-from .file_utils import MyOpen, findfile, search_paths
+from .geomparams import InsertGeomParams
+from .file_utils import search_paths, FileManifest
 
 from .logging_config import get_logger
 
@@ -24,91 +25,68 @@ import os
 
 # MyEnv: Union[Type[appenv]|None]
 def Insert_simfile(
-    MyEnv, confdata: dict, cad, addAir: bool = False, debug: bool = False
+    MyEnv,
+    confdata: dict,
+    cad,
+    addAir: bool = False,
+    debug: bool = False,
+    manifest: FileManifest | None = None,
 ):
+    """
+    Return the list of files (yaml, cad) of an Insert
+
+    files are looked up concurrently (see :class:`FileManifest`)
+    and added to manifest when given
+    """
     from python_magnetgeo.Insert import Insert
 
     print(f"Insert_simfile: cad={cad.name}")
 
-    files = []
+    if manifest is None:
+        manifest = FileManifest()
+    geom = search_paths(MyEnv, "geom")
+    paths = search_paths(MyEnv, "cad")
 
     # TODO: get xao and brep if they exist, otherwise go on
     # TODO: add suffix _Air if needed ??
-    try:
-        xaofile = cad.name + ".xao"
-        if addAir:
-            xaofile = cad.name + "_withAir.xao"
-        f = findfile(xaofile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
-
-        brepfile = cad.name + ".brep"
-        if addAir:
-            brepfile = cad.name + "_withAir.brep"
-        f = findfile(brepfile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
-    except:
-        pass
+    suffix = "_withAir" if addAir else ""
+    requests = [
+        (cad.name + f"{suffix}.xao", paths, False),
+        (cad.name + f"{suffix}.brep", paths, False),
+    ]
 
     for helix in cad.helices:
-        with MyOpen(helix.name + ".yaml", "r", paths=search_paths(MyEnv, "geom")) as f:
-            files.append(f.name)
+        requests.append((helix.name + ".yaml", geom, True))
 
         # TODO: get xao and brep if they exist otherwise _salome.data
-        xaofile = helix.name + ".xao"
-        f = findfile(xaofile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
-
-        brepfile = helix.name + ".brep"
-        f = findfile(brepfile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
+        requests.append((helix.name + ".xao", paths, True))
+        requests.append((helix.name + ".brep", paths, True))
 
         # TODO: get _salome.data if they exist otherwise ??
         if helix.model3d.with_shapes:
-            with MyOpen(
-                helix.name + str("_cut_with_shapes_salome.dat"),
-                "r",
-                paths=search_paths(MyEnv, "geom"),
-            ) as fcut:
-                files.append(fcut.name)
-            with MyOpen(
-                helix.shape.profile, "r", paths=search_paths(MyEnv, "geom")
-            ) as fshape:
-                files.append(fshape.name)
+            requests.append((helix.name + "_cut_with_shapes_salome.dat", geom, True))
+            requests.append((helix.shape.profile, geom, True))
         else:
-            with MyOpen(
-                helix.name + str("_cut_salome.dat"),
-                "r",
-                paths=search_paths(MyEnv, "geom"),
-            ) as fcut:
-                files.append(fcut.name)
+            requests.append((helix.name + "_cut_salome.dat", geom, True))
 
     for ring in cad.rings:
-        with MyOpen(ring.name + ".yaml", "r", paths=search_paths(MyEnv, "geom")) as f:
-            files.append(f.name)
-
-        xaofile = ring.name + ".xao"
-        f = findfile(xaofile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
-
-        brepfile = ring.name + ".brep"
-        f = findfile(brepfile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
+        requests.append((ring.name + ".yaml", geom, True))
+        requests.append((ring.name + ".xao", paths, True))
+        requests.append((ring.name + ".brep", paths, True))
 
     if cad.currentleads:
         for lead in cad.currentleads:
-            with MyOpen(
-                lead.name + ".yaml", "r", paths=search_paths(MyEnv, "geom")
-            ) as f:
-                files.append(f.name)
-
-            xaofile = lead.name + ".xao"
-            f = findfile(xaofile, paths=search_paths(MyEnv, "cad"))
-            files.append(f)
+            requests.append((lead.name + ".yaml", geom, True))
+            requests.append((lead.name + ".xao", paths, True))
+            requests.append((lead.name + ".brep", paths, True))
 
-            brepfile = lead.name + ".brep"
-            f = findfile(brepfile, paths=search_paths(MyEnv, "cad"))
-            files.append(f)
+    found = manifest.find(requests)
+    # insert brep is only used with its xao
+    if found[0] is None:
+        found[1] = None
 
+    files = list(dict.fromkeys(f for f in found if f is not None))
+    manifest.extend(files)
     return files
 
 
@@ -141,28 +119,26 @@ def Insert_setup(
     boundary_maxwell = []
     boundary_electric = []
 
-    gdata = cad.get_params(MyEnv.yaml_repo)
-    (NHelices, NRings, NChannels, Nsections, R1, R2, Dh, Sh, Zh) = gdata
+    gdata = InsertGeomParams.from_cad(cad, MyEnv.yaml_repo, mname)
+    NHelices = gdata.NHelices
+    NRings = gdata.NRings
+    NChannels = gdata.NChannels
+    Nsections = gdata.Nsections
+    R1 = gdata.R1
+    R2 = gdata.R2
+    pitch_h = gdata.pitch
+    turns_h = gdata.turns
 
-    Zmax = 0
-    for i, z in enumerate(Zh):
-        Zmax = max(Zmax, max(z))
+    Zmax = max(0, float(gdata.Zmax.max()))
 
     print(
         f"Insert: {cad.name}, NHelices={NHelices}, NRings={NRings}, NChannels={NChannels}"
     )
 
-    pitch_h = []
-    turns_h = []
-
-    prefix = ""
-    if mname:
-        prefix = f"{mname}_"
+    prefix = gdata.prefix
 
     for i, helix in enumerate(cad.helices):
         part_helix = []
-        pitch_h.append(helix.modelaxi.pitch)
-        turns_h.append(helix.modelaxi.turns)
 
         if method_data[2] == "Axi":
             part_insulator = []
@@ -257,30 +233,26 @@ def Insert_setup(
         logger.debug("insert part_mat_conductors: %s", part_mat_conductors)
 
     # params section
-    ngdata = (NHelices, NRings, NChannels, Nsections, R1, R2, Dh, Sh, Zh, turns_h)
-    params_data = create_params_insert(mname, ngdata, method_data, debug)
+    params_data = create_params_insert(mname, gdata, method_data, debug)
     if "Z" in method_data[4]:
         params_csv_files = create_params_csvfiles_insert(
-            mname, ngdata, method_data, debug
+            mname, gdata, method_data, debug
         )
         for key, value in params_csv_files.items():
             # print(f"save {key}.csv")
             value.to_csv(f"{key}.csv", index=False)  # with index, add index=True
-    ngdata = ()
 
     # bcs section
-    ngdata = (mname, NHelices, NRings, NChannels, Nsections, R1, R2, Dh, Sh, Zh)
     bcs_data = create_bcs_insert(
         boundary_meca,
         boundary_maxwell,
         boundary_electric,
-        ngdata,
+        gdata,
         confdata,
         templates,
         method_data,
         debug,
     )  # merge all bcs dict
-    ngdata = ()
     # print(f'bcs_data({mname}): {bcs_data}')
 
     # build dict from geom for templates
@@ -355,7 +327,7 @@ def Insert_setup(
     units = load_units(unit_Length)
     # print(f"Rinf={R2[-1]}, Zinf={Zmax}")
     plotB_data = {
-        "Rinf": convert_data(units, R2[-1], "Length"),
+        "Rinf": convert_data(units, float(R2[-1]), "Length"),
         "Zinf": convert_data(units, Zmax, "Length"),
     }
 
@@ -501,11 +473,7 @@ def Insert_setup(
 
     flux_data = []
     fluxZ_data = []
-    """
-    for i, z in enumerate(Zh):
-        Zh[i] = convert_data(units, z, "Length")
-        print(f"Zh[{i}]: {Zh[i]}")
-    """
+    Zh = [z.tolist() for z in gdata.converted(unit_Length).Zh]
     for i in range(NChannels):
         markers = f'["{prefix}Channel{i}"]'
         filling_factor = 1
@@ -568,7 +536,7 @@ def Insert_setup(
     # check mpost output
     # print(f"insert: mpost={mpost}")
     mmat = create_materials_insert(
-        (mname,) + gdata,
+        gdata,
         main_data,
         index_Insulators,
         confdata,
@@ -3,11 +3,15 @@ Json file
 """
 
 import json
+import copy
 
 import math
 
 from .utils import Merge
-from .units import load_units, convert_data
+from .units import load_units, convert_data, convert_material
+from .markers import compact_markers
+from .geomparams import InsertGeomParams, BitterGeomParams
+from .templatebundle import render, template_text
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -67,36 +71,60 @@ def create_params_supra(
     return params_data
 
 
+def csv_mode(method_data: list) -> str:
+    """
+    Return how Tw profiles are written for Z cooling (optional method_data[7]):
+    'split' one csv file per channel (default) or 'wide' a single csv file
+    per magnet with a common Z column and one Tw column per channel
+    """
+    mode = method_data[7] if len(method_data) > 7 and method_data[7] else "split"
+    if mode not in ["split", "wide"]:
+        raise ValueError(f"csv_mode: unsupported mode {mode} (expect split|wide)")
+    return mode
+
+
+def wide_csvfile(Zh: list, columns: list, Tw: list):
+    """
+    Return a DataFrame with the union of Zh as Z and the Tw profiles
+    (interpolated on Z) as columns
+    """
+    import numpy as np
+    import pandas as pd
+
+    Z = np.unique(np.concatenate([np.asarray(z, dtype=float) for z in Zh]))
+    data = {"Z": Z}
+    for column, z, tw in zip(columns, Zh, Tw):
+        data[column] = np.interp(Z, z, tw)
+    return pd.DataFrame(data)
+
+
 def create_params_csvfiles_bitter(
-    mname: str, gdata: tuple, method_data: list[str], debug: bool = False
+    mname: str, gdata: BitterGeomParams, method_data: list[str], debug: bool = False
 ):
     """
     Return params_dict, the dictionnary of section \"Parameters\" for JSON file.
 
     method_data:
     """
-    print(f"create_params_csvfiles_bitter for mname={mname} gdata[0]={gdata[0]}")
+    print(f"create_params_csvfiles_bitter for mname={mname} gdata.name={gdata.name}")
 
     # TODO: length data are written in mm should be in SI instead
     unit_Length = method_data[5]  # "meter"
-    units = load_units(unit_Length)
 
-    (
-        name,
-        snames,
-        nturns,
-        NCoolingSlits,
-        Dh,
-        Sh,
-        Zh,
-        fillingfactor,
-        ignore_index,
-    ) = gdata
-    Zh = convert_data(units, Zh, "Length")
+    name = gdata.name
+    NCoolingSlits = gdata.NCoolingSlits
+    Zh = gdata.converted(unit_Length).Zh
 
     res = {}
     import pandas as pd
 
+    if csv_mode(method_data) == "wide":
+        columns = [f"Tw_{name}_Slit{i}" for i in range(NCoolingSlits + 2)]
+        res[f"Tw_{name}_Slit"] = wide_csvfile(
+            [Zh] * len(columns), columns, [[290.671] * len(Zh)] * len(columns)
+        )
+        return res
+
     for i in range(NCoolingSlits + 2):
         bcname = f"{name}_Slit{i}"
         Tw = [290.671] * len(Zh)
@@ -107,29 +135,18 @@ def create_params_csvfiles_bitter(
 
 
 def create_params_csvfiles_insert(
-    mname: str, gdata: tuple, method_data: list[str], debug: bool = False
+    mname: str, gdata: InsertGeomParams, method_data: list[str], debug: bool = False
 ):
     """
     Return params_dict, the dictionnary of section \"Parameters\" for JSON file.
 
     method_data:
     """
-    print(f"create_params_csvfiles_insert for mname={mname} gdata[0]={gdata[0]}")
-
-    # !!! unit conversion already done !!!
-
-    (
-        NHelices,
-        NRings,
-        NChannels,
-        Nsections,
-        R1,
-        R2,
-        Dh,
-        Sh,
-        Zh,
-        turns_h,
-    ) = gdata
+    print(f"create_params_csvfiles_insert for mname={mname} gdata.name={gdata.name}")
+
+    unit_Length = method_data[5]  # "meter"
+    NChannels = gdata.NChannels
+    Zh = gdata.converted(unit_Length).Zh
 
     # TODO : initialization of parameters with cooling model
     prefix = ""
@@ -139,6 +156,13 @@ def create_params_csvfiles_insert(
     res = {}
     import pandas as pd
 
+    if csv_mode(method_data) == "wide":
+        columns = [f"Tw_{prefix}Channel{i}" for i in range(NChannels)]
+        res[f"Tw_{prefix}Channel"] = wide_csvfile(
+            Zh[:NChannels], columns, [[290.671] * len(z) for z in Zh[:NChannels]]
+        )
+        return res
+
     for i in range(NChannels):
         bcname = f"{prefix}Channel{i}"
         Tw = [290.671] * len(Zh[i])
@@ -149,14 +173,14 @@ def create_params_csvfiles_insert(
 
 
 def create_params_bitter(
-    mname: str, gdata: tuple, method_data: list[str], debug: bool = False
+    mname: str, gdata: BitterGeomParams, method_data: list[str], debug: bool = False
 ):
     """
     Return params_dict, the dictionnary of section \"Parameters\" for JSON file.
 
     method_data:
     """
-    print(f"create_params_bitter for mname={mname} gdata[0]={gdata[0]}")
+    print(f"create_params_bitter for mname={mname} gdata.name={gdata.name}")
 
     # TODO: length data are written in mm should be in SI instead
     unit_Length = method_data[5]  # "meter"
@@ -182,28 +206,20 @@ def create_params_bitter(
 
     params_data["Parameters"].append({"name": f"{prefix}Tinit", "value": 293})
 
-    (
-        name,
-        snames,
-        nturns,
-        NCoolingSlits,
-        Dh,
-        Sh,
-        Zh,
-        fillingfactor,
-        ignore_index,
-    ) = gdata
-    Zmin = min(Zh)
-    Zmax = max(Zh)
+    name = gdata.name
+    snames = gdata.snames
+    nturns = gdata.turns
+    NCoolingSlits = gdata.NCoolingSlits
+    ignore_index = gdata.ignore_index
+
+    geom = gdata.converted(unit_Length)
+    Dh = geom.Dh.tolist()
+    Sh = geom.Sh.tolist()
+    Zmin = float(geom.Zh.min())
+    Zmax = float(geom.Zh.max())
     logger.debug("unit_Length %s", unit_Length)
     logger.debug("Zmax: %s", Zmax)
     logger.debug("Zmin: %s", Zmin)
-    if unit_Length == "meter":
-        Zmin = convert_data(units, Zmin, "Length")
-        Zmax = convert_data(units, Zmax, "Length")
-        Dh = convert_data(units, Dh, "Length")
-        Sh = convert_data(units, Sh, "Area")
-        Zh = convert_data(units, Zh, "Length")
 
     # depending on method_data[4] (aka args.cooling)
     if "H" not in method_data[4]:
@@ -238,6 +254,9 @@ def create_params_bitter(
                     "interpolation": "P1",
                     "expr": f"{zcoord}:{zcoord}",
                 }
+                if csv_mode(method_data) == "wide":
+                    csv_data["filename"] = f"$cfgdir/Tw_{name}_Slit.csv"
+                    csv_data["ordinate"] = f"Tw_{bcname}"
                 params_data["Parameters"].append(
                     {"name": f"Tw_{bcname}", "value": csv_data}
                 )
@@ -286,7 +305,7 @@ def create_params_bitter(
 
 
 def create_params_insert(
-    mname: str, gdata: tuple, method_data: list[str], debug: bool = False
+    mname: str, gdata: InsertGeomParams, method_data: list[str], debug: bool = False
 ) -> dict:
     """
     Return params_dict, the dictionnary of section \"Parameters\" for JSON file.
@@ -299,33 +318,18 @@ def create_params_insert(
 
     # TDO how to get insert name?
     # is it provided by mname??
-    (
-        NHelices,
-        NRings,
-        NChannels,
-        Nsections,
-        R1,
-        R2,
-        Dh,
-        Sh,
-        Zh,
-        turns_h,
-    ) = gdata
+    NHelices = gdata.NHelices
+    Nsections = gdata.Nsections
+    turns_h = gdata.turns
 
     logger.debug("unit_Length %s", unit_Length)
-    if unit_Length == "meter":
-        R1 = convert_data(units, R1, "Length")
-        R2 = convert_data(units, R2, "Length")
-        for i, z in enumerate(Zh):
-            Zh[i] = convert_data(units, z, "Length")
-        Dh = convert_data(units, Dh, "Length")
-        Sh = convert_data(units, Sh, "Area")
-
-    Zmin = []
-    Zmax = []
-    for i, z in enumerate(Zh):
-        Zmin.append(min(Zh[i]))
-        Zmax.append(max(Zh[i]))
+    geom = gdata.converted(unit_Length)
+    R1 = geom.R1.tolist()
+    R2 = geom.R2.tolist()
+    Dh = geom.Dh.tolist()
+    Sh = geom.Sh.tolist()
+    Zmin = geom.Zmin.tolist()
+    Zmax = geom.Zmax.tolist()
 
     # chech dim
     logger.debug("corrected R1: %s", R1)
@@ -407,6 +411,9 @@ def create_params_insert(
                     "interpolation": "P1",
                     "expr": f"{zcoord}:{zcoord}",
                 }
+                if csv_mode(method_data) == "wide":
+                    csv_data["filename"] = f"$cfgdir/Tw_{prefix}Channel.csv"
+                    csv_data["ordinate"] = f"Tw_{prefix}Channel{i}"
                 params_data["Parameters"].append(
                     {"name": f"Tw_{prefix}Channel{i}", "value": csv_data}
                 )
@@ -472,19 +479,6 @@ def create_materials_supra(
 
     fconductor = templates["conductor"]
 
-    # TODO: length data are written in mm should be in SI instead
-    unit_Length = method_data[5]  # "meter"
-    units = load_units(unit_Length)
-    for prop in [
-        "ThermalConductivity",
-        "Young",
-        "VolumicMass",
-        "ElectricalConductivity",
-    ]:
-        confdata["material"][prop] = convert_data(
-            units, confdata["material"][prop], prop
-        )
-
     if method_data[2] == "Axi":
         pass
     else:
@@ -494,7 +488,7 @@ def create_materials_supra(
 
 
 def create_materials_bitter(
-    gdata: tuple,
+    gdata: BitterGeomParams,
     maindata: dict,
     confdata: dict,
     templates: dict,
@@ -509,29 +503,9 @@ def create_materials_bitter(
 
     # TODO: length data are written in mm should be in SI instead
     unit_Length = method_data[5]  # "meter"
-    units = load_units(unit_Length)
-
-    for prop in [
-        "ThermalConductivity",
-        "Young",
-        "VolumicMass",
-        "ElectricalConductivity",
-    ]:
-        confdata["material"][prop] = convert_data(
-            units, confdata["material"][prop], prop
-        )
+    material = convert_material(confdata["material"], unit_Length)
 
-    (
-        name,
-        snames,
-        turns,
-        NCoolingSlits,
-        Dh,
-        Sh,
-        Zh,
-        fillingfactor,
-        ignore_index,
-    ) = gdata
+    name = gdata.name
 
     if method_data[2] == "Axi":
         logger.debug("create_material_bitter: Conductor_ %s", name)
@@ -540,9 +514,9 @@ def create_materials_bitter(
             Merge(
                 {
                     "name": f"Conductor_{name}",
-                    "part_mat_conductor": maindata["part_electric"],
+                    "part_mat_conductor": compact_markers(maindata["part_electric"]),
                 },
-                confdata["material"],
+                material,
             ),
             debug,
         )
@@ -559,12 +533,9 @@ def create_materials_bitter(
                 Merge(
                     {
                         "name": f"Insulator_{name}",
-                        "part_mat_insulator": list(
-                            set(maindata["part_thermic"])
-                            - set(maindata["part_electric"])
-                        ),
+                        "part_mat_insulator": compact_markers(bitter_insulator),
                     },
-                    confdata["material"],
+                    material,
                 ),
                 debug,
             )
@@ -577,7 +548,7 @@ def create_materials_bitter(
 
 
 def create_materials_insert(
-    gdata: tuple,
+    gdata: InsertGeomParams,
     maindata: dict,
     idata: list | None,
     confdata: dict,
@@ -592,38 +563,29 @@ def create_materials_insert(
     fconductor = templates["conductor"]
     finsulator = templates["insulator"]
 
-    (mname, NHelices, NRings, NChannels, Nsections, R1, R2, Dh, Sh, Zh) = gdata
-
-    prefix = ""
-    if mname:
-        prefix = f"{mname}_"
+    NHelices = gdata.NHelices
+    NRings = gdata.NRings
+    prefix = gdata.prefix
 
     # TODO: length data are written in mm should be in SI instead
     unit_Length = method_data[5]  # "meter"
-    units = load_units(unit_Length)
-    for mtype in ["Helix", "Ring", "Lead"]:
-        if mtype in confdata:
-            for i in range(len(confdata[mtype])):
-                for prop in [
-                    "ThermalConductivity",
-                    "Young",
-                    "VolumicMass",
-                    "ElectricalConductivity",
-                ]:
-                    confdata[mtype][i]["material"][prop] = convert_data(
-                        units, confdata[mtype][i]["material"][prop], prop
-                    )
+    materials = {
+        mtype: [
+            convert_material(item["material"], unit_Length) for item in confdata[mtype]
+        ]
+        for mtype in ["Helix", "Ring", "Lead"]
+        if mtype in confdata
+    }
+    # helices sharing a material are rendered once
+    mentries = MaterialEntries(debug)
 
     # Loop for Helix
     for i in range(NHelices):
         if method_data[2] == "3D":
-            mdata = entry(
+            mdata = mentries.entry(
                 fconductor,
-                Merge(
-                    {"name": f"{prefix}H{i+1}", "marker": f"{prefix}H{i+1}_Cu"},
-                    confdata["Helix"][i]["material"],
-                ),
-                debug,
+                {"name": f"{prefix}H{i+1}", "marker": f"{prefix}H{i+1}_Cu"},
+                materials["Helix"][i],
             )
             materials_dict[f"{prefix}H{i+1}"] = mdata[f"{prefix}H{i+1}"]
 
@@ -659,16 +621,15 @@ def create_materials_insert(
             # load conductor template
             # for j in range(1, Nsections[i] + 1):
             # print("load conductor[{j}]: mat:", confdata["Helix"][i]["material"])
-            mdata = entry(
+            mdata = mentries.entry(
                 fconductor,
-                Merge(
-                    {
-                        "name": f"Conductor_{prefix}H{i+1}",
-                        "part_mat_conductor": maindata["part_mat_conductors"][i],
-                    },
-                    confdata["Helix"][i]["material"],
-                ),
-                debug,
+                {
+                    "name": f"Conductor_{prefix}H{i+1}",
+                    "part_mat_conductor": compact_markers(
+                        maindata["part_mat_conductors"][i]
+                    ),
+                },
+                materials["Helix"][i],
             )
             # print("load conductor[{j}]:", mdata)
             materials_dict[f"Conductor_{prefix}H{i+1}"] = mdata[
@@ -676,16 +637,15 @@ def create_materials_insert(
             ]
 
             # section j==Nsections+1:  treated as insulator in Axi
-            mdata = entry(
+            mdata = mentries.entry(
                 finsulator,
-                Merge(
-                    {
-                        "name": f"Insulator_{prefix}H{i+1}",
-                        "part_mat_insulator": maindata["part_mat_insulators"][i],
-                    },
-                    confdata["Helix"][i]["material"],
-                ),
-                debug,
+                {
+                    "name": f"Insulator_{prefix}H{i+1}",
+                    "part_mat_insulator": compact_markers(
+                        maindata["part_mat_insulators"][i]
+                    ),
+                },
+                materials["Helix"][i],
             )
             materials_dict[f"Insulator_{prefix}H{i+1}"] = mdata[
                 f"Insulator_{prefix}H{i+1}"
@@ -694,24 +654,19 @@ def create_materials_insert(
     # loop for Rings
     for i in range(NRings):
         if method_data[2] == "3D":
-            mdata = entry(
-                fconductor,
-                Merge({"name": f"{prefix}R{i+1}"}, confdata["Ring"][i]["material"]),
-                debug,
+            mdata = mentries.entry(
+                fconductor, {"name": f"{prefix}R{i+1}"}, materials["Ring"][i]
             )
         else:
-            mdata = entry(
+            mdata = mentries.entry(
                 finsulator,
-                Merge(
-                    {
-                        "name": f"{prefix}R{i+1}",
-                        "part_mat_insulator": maindata["part_mat_insulators"][
-                            NHelices + i
-                        ],
-                    },
-                    confdata["Ring"][i]["material"],
-                ),
-                debug,
+                {
+                    "name": f"{prefix}R{i+1}",
+                    "part_mat_insulator": maindata["part_mat_insulators"][
+                        NHelices + i
+                    ],
+                },
+                materials["Ring"][i],
             )
         materials_dict[f"{prefix}R{i+1}"] = mdata[f"{prefix}R{i+1}"]
 
@@ -719,14 +674,14 @@ def create_materials_insert(
     if method_data[2] == "3D" and "Lead" in confdata:
         mdata = entry(
             fconductor,
-            Merge({"name": f"{prefix}iL1"}, confdata["Lead"][0]["material"]),
+            Merge({"name": f"{prefix}iL1"}, materials["Lead"][0]),
             debug,
         )
         materials_dict[f"{prefix}iL1"] = mdata[f"{prefix}iL1"]
 
         mdata = entry(
             fconductor,
-            Merge({"name": f"{prefix}oL2"}, confdata["Lead"][1]["material"]),
+            Merge({"name": f"{prefix}oL2"}, materials["Lead"][1]),
             debug,
         )
         materials_dict[f"{prefix}oL2"] = mdata[f"{prefix}oL2"]
@@ -747,19 +702,6 @@ def create_models_supra(
 
     fconductor = templates[equation + "-conductor"]
 
-    # TODO: length data are written in mm should be in SI instead
-    unit_Length = method_data[5]  # "meter"
-    units = load_units(unit_Length)
-    for prop in [
-        "ThermalConductivity",
-        "Young",
-        "VolumicMass",
-        "ElectricalConductivity",
-    ]:
-        confdata["material"][prop] = convert_data(
-            units, confdata["material"][prop], prop
-        )
-
     if method_data[2] == "Axi":
         pass
     else:
@@ -769,7 +711,7 @@ def create_models_supra(
 
 
 def create_models_bitter(
-    gdata: tuple,
+    gdata: BitterGeomParams,
     maindata: dict,
     confdata: dict,
     templates: dict,
@@ -783,21 +725,7 @@ def create_models_bitter(
     fconductor = templates[equation + "-conductor"]
     finsulator = templates[equation + "-insulator"]
 
-    # TODO: length data are written in mm should be in SI instead
-    unit_Length = method_data[5]  # "meter"
-    units = load_units(unit_Length)
-
-    (
-        name,
-        snames,
-        turns,
-        NCoolingSlits,
-        Dh,
-        Sh,
-        Zh,
-        fillingfactor,
-        ignore_index,
-    ) = gdata
+    name = gdata.name
     if method_data[2] == "Axi":
         if maindata["part_insulators"]:
             mdata = entry(
@@ -916,23 +844,16 @@ def create_bcs_bitter(
     boundary_meca: list,
     boundary_maxwell: list,
     boundary_electric: list,
-    gdata: tuple,
+    gdata: BitterGeomParams,
     confdata: dict,
     templates: dict,
     method_data: list[str],
     debug: bool = False,
 ) -> dict:
-    (
-        name,
-        snames,
-        turns,
-        NCoolingSlits,
-        Dh,
-        Sh,
-        Zh,
-        fillingfactor,
-        ignore_index,
-    ) = gdata
+    name = gdata.name
+    snames = gdata.snames
+    NCoolingSlits = gdata.NCoolingSlits
+    fillingfactor = gdata.fillingfactor
     print(f"create_bcs_bitter from templates for {name}")
     print(f"snames={snames}")
 
@@ -944,23 +865,22 @@ def create_bcs_bitter(
     maxwell_bcs_dir = {"boundary_Maxwell_Dir": []}  # name, value
 
     if "th" in method_data[3]:
-        fcooling = templates["cooling"]
+        fcooling = EntrySkeleton(templates["cooling"], COOLING_KEYS, debug)
         for i in range(NCoolingSlits + 2):
             bcname = name
             if "H" in method_data[4]:
                 bcname = f"{name}_Slit{i}"
 
-            markers = f'["{name}_Slit{i}"]'
+            markers = [f"{name}_Slit{i}"]
             if method_data[2] == "Axi":
                 if i != 0 and i != NCoolingSlits + 1:
-                    markers = f'["{name}_Slit{i}"]'
+                    markers = [f"{name}_Slit{i}"]
 
             # change template
             # add: %1_1%: s, %1_2%: nslit, %1_3%: slit.r, %1_4%: rslit
             # change "markers" to a list: f"[{name}_Slit{i}_l, {name}_Slit{i}_r]"
             # if i ==0 or i == NCooling+1: "markers" : f"{name}_Slit{i}"
-            mdata = entry(
-                fcooling,
+            mdata = fcooling.stamp(
                 {
                     "name": f"{name}_Slit{i}",
                     "markers": markers,
@@ -970,8 +890,7 @@ def create_bcs_bitter(
                     "dTw": f"dTw_{bcname}",
                     "Zmin": f"Zmin_{bcname}",
                     "Zmax": f"Zmax_{bcname}",
-                },
-                debug,
+                }
             )
 
             thermic_bcs_rob["boundary_Therm_Robin"].append(
@@ -1011,7 +930,7 @@ def create_bcs_insert(
     boundary_meca: list,
     boundary_maxwell: list,
     boundary_electric: list,
-    gdata: tuple,
+    gdata: InsertGeomParams,
     confdata: dict,
     templates: dict,
     method_data: list[str],
@@ -1025,31 +944,26 @@ def create_bcs_insert(
     meca_bcs_dir = {"boundary_Meca_Dir": []}  # name, value
     maxwell_bcs_dir = {"boundary_Maxwell_Dir": []}  # name, value
 
-    (mname, NHelices, NRings, NChannels, Nsections, R1, R2, Dh, Sh, Zh) = gdata
-
-    prefix = ""
-    if mname:
-        prefix = f"{mname}_"
+    NChannels = gdata.NChannels
+    prefix = gdata.prefix
 
     if "th" in method_data[3]:
-        fcooling = templates["cooling"]
+        fcooling = EntrySkeleton(templates["cooling"], COOLING_KEYS, debug)
 
         if "H" in method_data[4]:
             for i in range(NChannels):
                 # load insulator template for j==0
-                mdata = entry(
-                    fcooling,
+                mdata = fcooling.stamp(
                     {
                         "name": f"{prefix}Channel{i}",
-                        "markers": f'["{prefix}Channel{i}"]',
+                        "markers": [f"{prefix}Channel{i}"],
                         "fillingfactor": 1,
                         "hw": f"hw_{prefix}Channel{i}",
                         "Tw": f"Tw_{prefix}Channel{i}",
                         "dTw": f"dTw_{prefix}Channel{i}",
                         "Zmin": f"Zmin_{prefix}Channel{i}",
                         "Zmax": f"Zmax_{prefix}Channel{i}",
-                    },
-                    debug,
+                    }
                 )
                 thermic_bcs_rob["boundary_Therm_Robin"].append(
                     Merge({"name": f"{prefix}Channel{i}"}, mdata[f"{prefix}Channel{i}"])
@@ -1057,19 +971,17 @@ def create_bcs_insert(
         else:
             for i in range(NChannels):
                 # load insulator template for j==0
-                mdata = entry(
-                    fcooling,
+                mdata = fcooling.stamp(
                     {
                         "name": f"{prefix}Channel{i}",
-                        "markers": f'["{prefix}Channel{i}"]',
+                        "markers": [f"{prefix}Channel{i}"],
                         "fillingfactor": 1,
                         "hw": f"hw_{prefix}Channel",
                         "Tw": f"Tw_{prefix}Channel",
                         "dTw": f"dTw_{prefix}Channel",
                         "Zmin": f"Zmin_{prefix}Channel",
                         "Zmax": f"Zmax_{prefix}Channel",
-                    },
-                    debug,
+                    }
                 )
                 thermic_bcs_rob["boundary_Therm_Robin"].append(
                     Merge({"name": f"{prefix}Channel{i}"}, mdata[f"{prefix}Channel{i}"])
@@ -1131,6 +1043,139 @@ def create_bcs_insert(
     return {}
 
 
+class EntrySkeleton:
+    """
+    Template rendered once (see :func:`entry`) with placeholders for keys,
+    then stamped out for each data set by substituting values in the
+    json structure (eg. cooling bcs of hundreds of channels or slits)
+
+    keys inserted as is in the template (eg. ``"markers": {{markers}}``)
+    are replaced by their (json) value, other keys are replaced in strings.
+    The first stamp is checked against :func:`entry`, templates that can
+    not be stamped (eg. sections depending on values) fall back to :func:`entry`.
+
+    fixed: data common to all stamps (eg. material properties)
+    """
+
+    def __init__(
+        self, template: str, keys: list, debug: bool = False, fixed: dict | None = None
+    ):
+        import re
+
+        self.template = template
+        self.debug = debug
+        text = template_text(template)
+
+        # raw keys: {{key}} outside of a json string
+        self.raw = set()
+        for match in re.finditer(r"{{\s*(\w+)\s*}}", text):
+            if match.group(1) in keys and text.count('"', 0, match.start()) % 2 == 0:
+                self.raw.add(match.group(1))
+
+        self.tokens = {key: f"__{key}__" for key in keys}
+        placeholders = {
+            key: f'"{token}"' if key in self.raw else token
+            for key, token in self.tokens.items()
+        }
+        try:
+            self.skeleton = entry(template, Merge(fixed or {}, placeholders), debug)
+        except Exception:
+            logger.warning("EntrySkeleton: %s can not be rendered, use entry", template)
+            self.skeleton = None
+        self.checked = False
+
+    def _substitute(self, data, values: dict):
+        if isinstance(data, dict):
+            return {
+                self._substitute(key, values): self._substitute(value, values)
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self._substitute(value, values) for value in data]
+        if isinstance(data, str):
+            for key, token in self.tokens.items():
+                if token not in data:
+                    continue
+                if key in self.raw and data == token:
+                    return values[key]
+                data = data.replace(token, str(values[key]))
+        return data
+
+    def stamp(self, rdata: dict) -> dict:
+        """
+        Same as ``entry(template, rdata)``
+        """
+        if self.skeleton is None:
+            return entry(self.template, rdata, self.debug)
+
+        values = dict(rdata)
+        for key in self.raw:
+            if isinstance(values[key], str):
+                values[key] = json.loads(values[key].replace("'", '"'))
+            else:
+                values[key] = copy.deepcopy(values[key])
+        mdata = self._substitute(self.skeleton, values)
+
+        if not self.checked:
+            self.checked = True
+            if mdata != entry(self.template, rdata, self.debug):
+                logger.warning(
+                    "EntrySkeleton: %s can not be stamped, use entry", self.template
+                )
+                self.skeleton = None
+                return entry(self.template, rdata, self.debug)
+        return mdata
+
+
+class MaterialEntries:
+    """
+    Material entries rendered once per distinct (template, material)
+    and stamped out per part (see :class:`EntrySkeleton`)
+    """
+
+    def __init__(self, debug: bool = False):
+        self.debug = debug
+        self.skeletons = {}
+
+    def entry(self, template: str, markers: dict, material: dict) -> dict:
+        """
+        Same as ``entry(template, Merge(markers, material))``
+        """
+        rdata = Merge(markers, material)
+        keys = [key for key in markers if key not in material]
+        fixed = {key: value for key, value in rdata.items() if key not in keys}
+        skey = (template, tuple(keys), json.dumps(fixed, sort_keys=True, default=str))
+        if skey not in self.skeletons:
+            self.skeletons[skey] = EntrySkeleton(template, keys, self.debug, fixed)
+        return self.skeletons[skey].stamp(rdata)
+
+
+# keys of cooling templates
+COOLING_KEYS = ["name", "markers", "fillingfactor", "hw", "Tw", "dTw", "Zmin", "Zmax"]
+
+
+# entries holding marker lists that are only written to json
+MARKERS_KEYS = ["part_electric", "part_thermic", "magnet_parts", "markers"]
+
+
+def compact_data(data, keys: list = MARKERS_KEYS):
+    """
+    Copy of data (nested dicts/lists) with marker lists in compact form (see compact_markers)
+
+    Only to be used for rendering templates where Feel++ accepts the %1%/index1 syntax
+    """
+    if isinstance(data, dict):
+        return {
+            key: compact_markers(value)
+            if key in keys and isinstance(value, list)
+            else compact_data(value, keys)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [compact_data(item, keys) for item in data]
+    return data
+
+
 def create_json(
     jsonfile: str,
     mdict: dict,
@@ -1148,7 +1193,9 @@ def create_json(
     logger.debug("create_json jsonfile= %s", jsonfile)
     logger.debug("create_json mdict= %s", mdict)
 
-    data = entry(templates["model"], mdict, debug)
+    # compact marker lists (Axi templates only use them as json values)
+    compact = method_data[2] == "Axi"
+    data = entry(templates["model"], compact_data(mdict) if compact else mdict, debug)
     logger.debug("create_json/data model: %s", data)
 
     # material section
@@ -1183,11 +1230,18 @@ def create_json(
     for field in templates["stats"]:
         _data = templates["stats"][field]
         _name = f"Stats_{field}"
+        # part_electric is used as index1 in post-processing templates: keep it expanded
         post_keywords[_name] = {
             "name": field,  # _data['name'],
             "template": _data["template"],
             "physic": _data["physic"],
-            "data": {_name: mpost[field] if field in mpost else {}},
+            "data": {
+                _name: (
+                    compact_data(mpost[field], ["markers"]) if compact else mpost[field]
+                )
+                if field in mpost
+                else {}
+            },
         }
 
     logger.debug("method_data[3]: %s", method_data[3])
@@ -1263,13 +1317,11 @@ def create_json(
 
 
 def entry(template: str, rdata: list, debug: bool = False) -> str:
-    import chevron
     import re
 
     logger.debug("entry/loading %s", str(template))
     logger.debug("entry/rdata: %s", rdata)
-    with open(template, "r") as f:
-        jsonfile = chevron.render(f, rdata)
+    jsonfile = render(template, rdata)
     jsonfile = jsonfile.replace("'", '"')
     # print("jsonfile:", jsonfile)
 
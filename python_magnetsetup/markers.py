@@ -0,0 +1,183 @@
+"""
+Marker names of magnets grouped by hierarchy level
+
+Marker lists may be written in the compact Feel++ range syntax:
+``{"name": "H1_Cu%1%", "index1": ["1:21"]}`` stands for H1_Cu1 ... H1_Cu20
+(ranges are ``start:end`` with end excluded).
+"""
+
+import re
+from typing import Optional
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_supra_name(name: str) -> tuple[Optional[int], Optional[int], Optional[int], str]:
+    """
+    Get (dblpancake, pancake, tape, suffix) indices from a supra marker name,
+    eg. ``HTS_dp_2_p1_t12_SC`` -> (2, 1, 12, "SC")
+
+    Indices are None when missing (eg. no dp token for insulation between dblpancakes)
+    """
+    tokens = name.split("_")
+    dp = p = t = None
+    for i, token in enumerate(tokens):
+        if dp is None:
+            if token == "dp" and i + 1 < len(tokens) and tokens[i + 1].isdigit():
+                dp = int(tokens[i + 1])
+            elif token.startswith("dp") and token[2:].isdigit():
+                dp = int(token[2:])
+        elif p is None and token[:1] == "p" and token[1:].isdigit():
+            p = int(token[1:])
+        elif p is not None and token[:1] == "t" and token[1:].isdigit():
+            t = int(token[1:])
+    return (dp, p, t, tokens[-1])
+
+
+class SupraMarkers:
+    """
+    Markers of an HTS insert (as returned by ``HTSInsert.get_names``)
+    grouped in a single pass by hierarchy level:
+    dblpancake -> pancake -> tape -> SC / insulation
+
+    levels: {level: [names]} in input order
+    tree: {dp: {pancake: {tape: [names]}}}
+    """
+
+    LEVELS = ("dblpancake", "pancake", "tape", "SC", "insulation")
+
+    def __init__(self, names: list):
+        self.names = list(names)
+        self.levels = {level: [] for level in self.LEVELS}
+        self.tree = {}
+
+        for name in self.names:
+            (dp, p, t, suffix) = parse_supra_name(name)
+            if dp is None:
+                self.levels["insulation"].append(name)
+                continue
+
+            node = self.tree.setdefault(dp, {})
+            if p is None:
+                self.levels["dblpancake"].append(name)
+                continue
+
+            node = node.setdefault(p, {})
+            if t is None:
+                self.levels["pancake"].append(name)
+                continue
+
+            node.setdefault(t, []).append(name)
+            self.levels["tape"].append(name)
+            if suffix == "SC":
+                self.levels["SC"].append(name)
+            else:
+                self.levels["insulation"].append(name)
+
+        logger.debug(
+            f"SupraMarkers: {len(self.names)} names, "
+            + ", ".join(f"{level}={len(self.levels[level])}" for level in self.LEVELS)
+        )
+
+    def select(self, level: str) -> list:
+        """
+        Get names of a given level
+        """
+        if level not in self.levels:
+            raise RuntimeError(
+                f"SupraMarkers: unsupported level {level} - expected {'|'.join(self.LEVELS)}"
+            )
+        return self.levels[level]
+
+
+# last integer of a marker name: prefix, index, suffix (without digits)
+_INDEX = re.compile(r"^(.*?)(\d+)(\D*)$")
+
+
+def index_ranges(indices: list) -> list:
+    """
+    Compress integers into ``start:end`` ranges (end excluded), eg. [1, 2, 3, 5] -> ["1:4", "5:6"]
+    """
+    ranges = []
+    indices = sorted(set(indices))
+    start = prev = indices[0]
+    for index in indices[1:]:
+        if index != prev + 1:
+            ranges.append(f"{start}:{prev + 1}")
+            start = index
+        prev = index
+    ranges.append(f"{start}:{prev + 1}")
+    return ranges
+
+
+def compact_markers(names: list, minsize: int = 3) -> list:
+    """
+    Compact a list of marker names: names only differing by their last integer
+    are replaced by ``{"name": "prefix%1%suffix", "index1": [ranges]}``
+    (only for groups of at least minsize names)
+    """
+    groups = {}
+    for name in names:
+        match = _INDEX.match(name) if isinstance(name, str) else None
+        # keep names with leading zeros as is (not recovered from an index)
+        if match is None or (len(match.group(2)) > 1 and match.group(2)[0] == "0"):
+            groups.setdefault(name if isinstance(name, str) else id(name), [name])
+            continue
+        (prefix, index, suffix) = match.groups()
+        groups.setdefault((prefix, suffix), []).append((int(index), name))
+
+    markers = []
+    for key, items in groups.items():
+        if not isinstance(key, tuple):
+            markers += items
+        elif len(items) < minsize:
+            markers += [name for (index, name) in items]
+        else:
+            (prefix, suffix) = key
+            markers.append(
+                {
+                    "name": f"{prefix}%1%{suffix}",
+                    "index1": index_ranges([index for (index, name) in items]),
+                }
+            )
+    return markers
+
+
+def expand_markers(markers: list) -> list:
+    """
+    Expand compact markers (see :func:`compact_markers`) to the list of names
+    """
+    names = []
+    for marker in markers:
+        if not isinstance(marker, dict):
+            names.append(marker)
+            continue
+        for index1 in marker["index1"]:
+            (start, end) = [int(value) for value in index1.split(":")]
+            names += [marker["name"].replace("%1%", str(i)) for i in range(start, end)]
+    return names
+
+
+class MarkerSet:
+    """
+    Set of marker names that can be emitted in compact form (for Feel++
+    json entries accepting the ``%1%``/``index1`` syntax) or expanded
+    (where explicit names are required, eg. as ``index1`` of post-processing)
+    """
+
+    def __init__(self, markers: Optional[list] = None):
+        self.names = expand_markers(markers or [])
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def compact(self, minsize: int = 3) -> list:
+        return compact_markers(self.names, minsize)
+
+    def expand(self) -> list:
+        return list(self.names)
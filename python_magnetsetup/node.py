@@ -26,48 +26,121 @@ class NodeSpec:
     mgkeydir: str = r"/opt/MeshGems"
 
 
+def to_bool(value) -> bool:
+    """
+    Convert a json flag (eg. "True", "false", 1) to bool
+    """
+    if isinstance(value, str):
+        if value.strip().lower() in ["true", "yes", "on", "1"]:
+            return True
+        if value.strip().lower() in ["false", "no", "off", "0", ""]:
+            return False
+        raise ValueError(f"to_bool: unexpected value {value}")
+    return bool(value)
+
+
+def parse_machine(name: str, value: dict) -> NodeSpec:
+    """
+    Create a NodeSpec from a machines.json entry
+    """
+    logger.debug("server: %s type=%s", name, value["type"])
+    return NodeSpec(
+        name=name,
+        otype=NodeType[value["type"]],
+        smp=to_bool(value["smp"]),
+        dns=value["dns"],
+        cores=int(value["cores"]),
+        multithreading=to_bool(value["multithreading"]),
+        manager=JobManager(
+            otype=JobManagerType[value["jobmanager"]["type"]],
+            queues=value["jobmanager"]["queues"],
+        ),
+        mgkeydir=value["mgkeydir"],
+    )
+
+
+class MachineRegistry:
+    """
+    Machines definition (aka machines.json) parsed once
+    and reloaded when the file is modified
+
+    registry = MachineRegistry()
+    registry.get("stokes")
+    registry.select(min_cores=32, manager=JobManagerType.slurm)
+    """
+
+    def __init__(self, filename: str | None = None):
+        if filename is None:
+            default_path = os.path.dirname(os.path.abspath(__file__))
+            filename = os.path.join(default_path, "machines.json")
+        self.filename = filename
+        self._mtime = None
+        self._machines = {}
+
+    def _load(self):
+        with open(self.filename, "r") as cfg:
+            logger.debug("load_machines from: %s", cfg.name)
+            data = json.load(cfg)
+            logger.debug("data=%s", data)
+        self._machines = {item: parse_machine(item, value) for item, value in data.items()}
+
+    @property
+    def machines(self) -> dict:
+        """
+        {name: NodeSpec}, reloaded if machines.json has changed
+        """
+        mtime = os.stat(self.filename).st_mtime_ns
+        if mtime != self._mtime:
+            self._load()
+            self._mtime = mtime
+        return self._machines
+
+    def names(self) -> list:
+        return list(self.machines.keys())
+
+    def get(self, server: str) -> NodeSpec:
+        machines = self.machines
+        if server not in machines:
+            raise ValueError(f"loadmachine: {server} no such server defined")
+        return machines[server]
+
+    def select(
+        self,
+        otype: NodeType | None = NodeType.compute,
+        min_cores: int = 0,
+        manager: JobManagerType | None = None,
+        smp: bool | None = None,
+        multithreading: bool | None = None,
+    ) -> list:
+        """
+        Get machines matching requirements (None: any),
+        eg. compute nodes with at least 32 cores and a slurm manager
+        """
+        return [
+            node
+            for node in self.machines.values()
+            if (otype is None or node.otype == otype)
+            and node.cores >= min_cores
+            and (manager is None or node.manager.otype == manager)
+            and (smp is None or node.smp == smp)
+            and (multithreading is None or node.multithreading == multithreading)
+        ]
+
+
+# default registry (machines.json of the package)
+registry = MachineRegistry()
+
+
 def load_machines(debug: bool = False):
     """
     load machines definition as a dict
     """
-    logger.debug("load machines")
     logger.debug("load_machines")
-
-    default_path = os.path.dirname(os.path.abspath(__file__))
-    with open(os.path.join(default_path, "machines.json"), "r") as cfg:
-        logger.debug("load_machines from: %s", cfg.name)
-        data = json.load(cfg)
-        logger.debug("data=%s", data)
-
-    machines = {}
-    for item, value in data.items():
-        logger.debug("server: %s type=%s", item, value["type"])
-        server = NodeSpec(
-            name=item,
-            otype=NodeType[value["type"]],
-            smp=value["smp"],
-            dns=value["dns"],
-            cores=value["cores"],
-            multithreading=value["multithreading"],
-            manager=JobManager(
-                otype=JobManagerType[value["jobmanager"]["type"]],
-                queues=value["jobmanager"]["queues"],
-            ),
-            mgkeydir=value["mgkeydir"],
-        )
-        machines[item] = server
-
-    return machines
+    return dict(registry.machines)
 
 
 def loadmachines(server: str):
     """
     Load app server config (aka machines.json)
     """
-
-    server_defs = load_machines()
-    if server in server_defs:
-        return server_defs[server]
-    else:
-        raise ValueError(f"loadmachine: {server} no such server defined")
-    pass
+    return registry.get(server)
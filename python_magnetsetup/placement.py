@@ -0,0 +1,194 @@
+"""
+Placement of generated cases on compute nodes
+
+A case size is estimated from method_data and the number of parts
+(material markers) of the json model, then each node of the machine
+registry gets a number of cores (NP) and a predicted runtime:
+
+    size = CaseSize.from_materials(method_data, mmat)
+    for placement in rank_nodes(size):
+        print(placement.node.name, placement.np, placement.runtime)
+
+The cost model is rough on purpose: it is only meant to rank nodes
+(eg. keep small Axi cases away from the biggest machines). Runtimes
+measured for the same case (see :mod:`python_magnetsetup.history`) are
+used instead when available.
+"""
+
+import math
+import json
+from dataclasses import dataclass
+
+from .job import JobManagerType
+from .node import NodeSpec, MachineRegistry, registry as default_registry
+from .markers import expand_markers
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# estimated dofs per part (material marker) and per field
+DOFS_PER_PART = {"Axi": 5.0e3, "3D": 2.0e5}
+
+# number of fields solved per model
+FIELDS = {
+    "thelec": 2,
+    "mag": 1,
+    "thmag": 2,
+    "thmagel": 4,
+    "mqs": 1,
+    "thmqs": 2,
+    "thmqsel": 4,
+    "mag_hcurl": 1,
+    "mqs_hcurl": 1,
+}
+
+# below this number of dofs per core adding cores does not pay
+MIN_DOFS_PER_CORE = 2.0e4
+
+# throughput (dofs per core and per second), startup and communication costs (s)
+DOFS_RATE = 5.0e3
+STARTUP = 30.0
+COMM = 5.0
+
+# cost factors for nonlinear and transient runs
+NONLINEAR = 5.0
+TRANSIENT = 20.0
+
+# estimated waiting time in a job manager queue (s)
+QUEUE_WAIT = 300.0
+
+
+@dataclass
+class CaseSize:
+    """
+    Estimated size of a case
+
+    nparts: number of parts (material markers) of the model
+    """
+
+    method: str
+    time: str
+    geom: str
+    model: str
+    nonlinear: bool
+    nparts: int
+
+    @classmethod
+    def from_materials(cls, method_data: list, mmat: dict) -> "CaseSize":
+        """
+        Create from the materials section of a json model
+        """
+        nparts = 0
+        for material in mmat.values():
+            markers = material.get("markers", material.get("marker"))
+            if markers is None:
+                nparts += 1
+            elif isinstance(markers, list):
+                nparts += len(expand_markers(markers))
+            elif isinstance(markers, dict):
+                nparts += len(expand_markers([markers]))
+            else:
+                nparts += 1
+        logger.debug("CaseSize: %d parts", nparts)
+        return cls(
+            method_data[0],
+            method_data[1],
+            method_data[2],
+            method_data[3],
+            bool(method_data[6]),
+            max(nparts, 1),
+        )
+
+    @classmethod
+    def from_jsonfile(cls, method_data: list, jsonfile: str) -> "CaseSize":
+        """
+        Create from a json model file (as written by setup)
+        """
+        with open(jsonfile, "r") as f:
+            data = json.load(f)
+        return cls.from_materials(method_data, data.get("Materials", {}))
+
+    @property
+    def dofs(self) -> float:
+        return (
+            DOFS_PER_PART.get(self.geom, DOFS_PER_PART["3D"])
+            * FIELDS.get(self.model, 2)
+            * self.nparts
+        )
+
+    @property
+    def work(self) -> float:
+        """
+        Estimated cost in dofs (including nonlinear and transient factors)
+        """
+        work = self.dofs
+        if self.nonlinear:
+            work *= NONLINEAR
+        if self.time == "transient":
+            work *= TRANSIENT
+        return work
+
+
+@dataclass
+class Placement:
+    """
+    Node proposed for a case with its number of cores and predicted runtime (s)
+    """
+
+    node: NodeSpec
+    np: int
+    runtime: float
+
+
+def max_cores(node: NodeSpec) -> int:
+    """
+    Number of cores usable by mpi (half of them with multithreading, see setup_cmds)
+    """
+    if node.multithreading:
+        return max(int(node.cores / 2), 1)
+    return node.cores
+
+
+def predict(size: CaseSize, node: NodeSpec, history=None) -> Placement:
+    """
+    Choose NP for a case on a node and predict its runtime
+
+    history: RunHistory, the fastest measured run of the case on node is used if any
+    """
+    measured = history.best(size, node.name) if history is not None else None
+    if measured is not None:
+        (name, NP, runtime) = measured
+    else:
+        NP = min(max(math.ceil(size.dofs / MIN_DOFS_PER_CORE), 1), max_cores(node))
+        runtime = STARTUP + size.work / (DOFS_RATE * NP) + COMM * math.log2(NP)
+    if node.manager.otype != JobManagerType.none:
+        runtime += QUEUE_WAIT
+    return Placement(node, NP, runtime)
+
+
+def rank_nodes(
+    size: CaseSize,
+    machines: MachineRegistry | None = None,
+    history=None,
+    **requirements,
+) -> list:
+    """
+    Rank compute nodes for a case by predicted runtime,
+    the smallest node is preferred when runtimes are equal
+
+    history: RunHistory of measured runtimes (optional)
+    requirements: see :meth:`MachineRegistry.select`
+    """
+    if machines is None:
+        machines = default_registry
+    placements = [
+        predict(size, node, history) for node in machines.select(**requirements)
+    ]
+    placements.sort(
+        key=lambda p: (round(p.runtime, 1), max_cores(p.node), p.node.name)
+    )
+    for p in placements:
+        logger.debug(
+            "rank_nodes: %s NP=%d runtime=%.1fs", p.node.name, p.np, p.runtime
+        )
+    return placements
@@ -0,0 +1,520 @@
+"""
+Stream scalar statistics out of an EnSight Gold case without any rendering.
+
+python3 ensight_stats.py --case feelppdb/np_20/cfpdes.exports/Export.case --vars cfpdes.heat.temperature cfpdes.expr.Jth
+
+Geometry files are only walked to get per part node/element counts
+(arrays are skipped with seek). Variable arrays of C Binary files are
+memory-mapped and reduced chunk by chunk, so memory stays bounded
+whatever the size of the results. ASCII files are streamed line by line
+(vector magnitudes of a part are accumulated in one array).
+
+Min/mean/max are computed per variable and per part (aka marker),
+the "all" part holding the reduction over every part.
+"""
+
+import os
+import sys
+import re
+import csv
+import argparse
+
+import numpy as np
+
+# number of values reduced at once
+CHUNK = 1 << 20
+
+# nodes per element for EnSight Gold element types (ghost types g_* are handled alike)
+ELEMENT_NODES = {
+    "point": 1,
+    "bar2": 2,
+    "bar3": 3,
+    "tria3": 3,
+    "tria6": 6,
+    "quad4": 4,
+    "quad8": 8,
+    "tetra4": 4,
+    "tetra10": 10,
+    "pyramid5": 5,
+    "pyramid13": 13,
+    "penta6": 6,
+    "penta15": 15,
+    "hexa8": 8,
+    "hexa20": 20,
+    "nsided": 0,
+    "nfaced": 0,
+}
+
+VARIABLE_TYPES = {
+    "scalar per node": ("node", 1),
+    "vector per node": ("node", 3),
+    "scalar per element": ("element", 1),
+    "vector per element": ("element", 3),
+}
+
+
+class Part:
+    """
+    Part of an EnSight geometry: id, name (aka marker), number of nodes
+    and list of (element type, number of elements)
+    """
+
+    __slots__ = ("id", "name", "nnodes", "elements")
+
+    def __init__(self, id: int, name: str):
+        self.id = id
+        self.name = name
+        self.nnodes = 0
+        self.elements = []
+
+    def __repr__(self):
+        return f"Part(id={self.id}, name={self.name}, nnodes={self.nnodes}, elements={self.elements})"
+
+
+class Stats:
+    """
+    Running min/max/sum/count reduction
+    """
+
+    __slots__ = ("count", "min", "max", "sum")
+
+    def __init__(self):
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.sum = 0.0
+
+    def update(self, values: np.ndarray):
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.sum += float(values.sum(dtype=np.float64))
+
+    def merge(self, other: "Stats"):
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sum += other.sum
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else float("nan")
+
+
+def load_case(casefile: str) -> dict:
+    """
+    Parse an EnSight Gold case file
+
+    returns {"model": [ts, filename], "variables": {name: [vtype, ts, filename]},
+             "times": {ts: [time values]}}
+    """
+    case = {"model": None, "variables": {}, "times": {}}
+    section = None
+    timeset = None
+    key = None
+    with open(casefile, "r") as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            if line in ["FORMAT", "GEOMETRY", "VARIABLE", "TIME", "FILE"]:
+                section = line
+                continue
+
+            if section == "GEOMETRY" and line.startswith("model:"):
+                items = line.split(":", 1)[1].split()
+                items = [item for item in items if item != "change_coords_only"]
+                ts = int(items[0]) if len(items) > 1 else None
+                case["model"] = [ts, items[-1]]
+            elif section == "VARIABLE":
+                vtype, items = [item.strip() for item in line.split(":", 1)]
+                if vtype not in VARIABLE_TYPES:
+                    continue
+                items = items.split()
+                ts = int(items[0]) if len(items) > 2 else None
+                case["variables"][items[-2]] = [vtype, ts, items[-1]]
+            elif section == "TIME":
+                if line.startswith("time set:"):
+                    timeset = int(line.split(":", 1)[1].split()[0])
+                    case["times"][timeset] = {"values": []}
+                    key = None
+                elif ":" in line:
+                    key, value = [item.strip() for item in line.split(":", 1)]
+                    if key == "time values":
+                        case["times"][timeset]["values"] += [
+                            float(v) for v in value.split()
+                        ]
+                    elif value:
+                        case["times"][timeset][key] = int(value)
+                elif key == "time values":
+                    case["times"][timeset]["values"] += [float(v) for v in line.split()]
+    return case
+
+
+def step_filename(case: dict, pattern: str, ts: int | None, step: int) -> str:
+    """
+    Replace wildcards (*) in pattern by the file index of timestep step
+    """
+    if ts is None or "*" not in pattern:
+        return pattern
+    tset = case["times"][ts]
+    index = tset.get("filename start number", 0) + step * tset.get(
+        "filename increment", 1
+    )
+    wildcards = re.search(r"\*+", pattern).group(0)
+    return pattern.replace(wildcards, str(index).zfill(len(wildcards)), 1)
+
+
+class BinaryReader:
+    """
+    Minimal C Binary EnSight reader working with seek (no large reads)
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.file = open(filename, "rb")
+        self.size = os.path.getsize(filename)
+        self.endian = "<"
+
+    def close(self):
+        self.file.close()
+
+    def eof(self) -> bool:
+        return self.file.tell() >= self.size
+
+    def string(self) -> str:
+        return self.file.read(80).decode("ascii", errors="ignore").strip("\x00 ")
+
+    def ints(self, n: int) -> np.ndarray:
+        return np.frombuffer(self.file.read(4 * n), dtype=f"{self.endian}i4")
+
+    def int(self) -> int:
+        return int(self.ints(1)[0])
+
+    def skip(self, n: int):
+        self.file.seek(4 * n, os.SEEK_CUR)
+
+    def floats(self, n: int) -> np.memmap:
+        """
+        Map n float32 values at current position and move after them
+        """
+        offset = self.file.tell()
+        self.skip(n)
+        return np.memmap(
+            self.filename, dtype=f"{self.endian}f4", mode="r", offset=offset, shape=(n,)
+        )
+
+
+def is_binary(filename: str) -> bool:
+    with open(filename, "rb") as f:
+        header = f.read(80)
+    return header.lstrip().lower().startswith(b"c binary")
+
+
+def load_geometry(geofile: str) -> list[Part]:
+    """
+    Get parts (ids, names, number of nodes and elements) from a geometry file
+    """
+    if is_binary(geofile):
+        return load_binary_geometry(geofile)
+    return load_ascii_geometry(geofile)
+
+
+def load_binary_geometry(geofile: str) -> list[Part]:
+    reader = BinaryReader(geofile)
+    reader.string()  # C Binary
+    reader.string()  # description 1
+    reader.string()  # description 2
+    node_ids = reader.string().split()[-1] in ["given", "ignore"]
+    element_ids = reader.string().split()[-1] in ["given", "ignore"]
+
+    parts = []
+    keyword = reader.string()
+    if keyword.startswith("extents"):
+        reader.skip(6)
+        keyword = reader.string()
+
+    while keyword and keyword.startswith("part"):
+        partid = reader.ints(1)
+        if partid[0] < 0 or partid[0] > 1 << 24:
+            reader.endian = ">"
+            partid = partid.byteswap()
+        part = Part(int(partid[0]), reader.string())
+        keyword = reader.string()
+        if not keyword.startswith("coordinates"):
+            raise RuntimeError(
+                f"load_geometry: {geofile} unsupported part type {keyword} for {part.name}"
+            )
+        part.nnodes = reader.int()
+        if node_ids:
+            reader.skip(part.nnodes)
+        reader.skip(3 * part.nnodes)
+
+        keyword = reader.string() if not reader.eof() else ""
+        while keyword and not keyword.startswith("part"):
+            etype = keyword.split()[0]
+            ne = reader.int()
+            if element_ids:
+                reader.skip(ne)
+            if etype.endswith("nsided"):
+                reader.skip(int(reader.ints(ne).sum()))
+            elif etype.endswith("nfaced"):
+                nfaces = int(reader.ints(ne).sum())
+                reader.skip(int(reader.ints(nfaces).sum()))
+            else:
+                reader.skip(ne * ELEMENT_NODES[etype.replace("g_", "")])
+            part.elements.append((etype, ne))
+            keyword = reader.string() if not reader.eof() else ""
+        parts.append(part)
+
+    reader.close()
+    return parts
+
+
+def load_ascii_geometry(geofile: str) -> list[Part]:
+    parts = []
+    with open(geofile, "r") as f:
+        for _ in range(2):
+            f.readline()
+        node_ids = f.readline().split()[-1] in ["given", "ignore"]
+        element_ids = f.readline().split()[-1] in ["given", "ignore"]
+
+        line = f.readline()
+        if line.startswith("extents"):
+            for _ in range(3):
+                f.readline()
+            line = f.readline()
+
+        while line.startswith("part"):
+            part = Part(int(f.readline()), f.readline().strip())
+            f.readline()  # coordinates
+            part.nnodes = int(f.readline())
+            nlines = (4 if node_ids else 3) * part.nnodes
+            for _ in range(nlines):
+                f.readline()
+
+            line = f.readline()
+            while line and not line.startswith("part"):
+                etype = line.split()[0]
+                ne = int(f.readline())
+                if element_ids:
+                    for _ in range(ne):
+                        f.readline()
+                nlines = ne
+                if etype.endswith("nsided"):
+                    nlines = 2 * ne
+                elif etype.endswith("nfaced"):
+                    nfaces = sum(int(f.readline()) for _ in range(ne))
+                    nlines = 2 * nfaces
+                for _ in range(nlines):
+                    f.readline()
+                part.elements.append((etype, ne))
+                line = f.readline()
+            parts.append(part)
+    return parts
+
+
+def _reduce(stats: Stats, values, ncomp: int, n: int, undef: float | None = None):
+    """
+    Reduce values (ncomp blocks of n values) chunk by chunk, vectors by magnitude
+
+    undef: undefined value, entries with a component equal to undef are ignored
+    """
+    for start in range(0, n, CHUNK):
+        end = min(start + CHUNK, n)
+        components = [
+            np.asarray(values[c * n + start : c * n + end], dtype=np.float64)
+            for c in range(ncomp)
+        ]
+        if ncomp == 1:
+            chunk = components[0]
+        else:
+            chunk = np.sqrt(sum(component**2 for component in components))
+        if undef is not None:
+            chunk = chunk[np.all([component != undef for component in components], axis=0)]
+        stats.update(chunk)
+
+
+def variable_stats(varfile: str, vtype: str, parts: list[Part]) -> dict:
+    """
+    Compute per part stats of a variable file
+
+    returns {part name: Stats}
+    """
+    location, ncomp = VARIABLE_TYPES[vtype]
+    byid = {part.id: part for part in parts}
+    if is_binary_variable(varfile):
+        return binary_variable_stats(varfile, location, ncomp, byid)
+    return ascii_variable_stats(varfile, location, ncomp, byid)
+
+
+def is_binary_variable(varfile: str) -> bool:
+    """
+    Variable files have no "C Binary" header: check that the 2nd record is a part keyword
+    """
+    with open(varfile, "rb") as f:
+        f.seek(80)
+        keyword = f.read(80)
+    return keyword.startswith(b"part") and b"\n" not in keyword
+
+
+def binary_variable_stats(varfile: str, location: str, ncomp: int, byid: dict) -> dict:
+    res = {}
+    reader = BinaryReader(varfile)
+    reader.string()  # description
+    keyword = reader.string()
+    while keyword.startswith("part"):
+        partid = reader.ints(1)
+        if partid[0] < 0 or partid[0] > 1 << 24:
+            reader.endian = ">"
+            partid = partid.byteswap()
+        part = byid[int(partid[0])]
+        stats = res.setdefault(part.name, Stats())
+        keyword = reader.string() if not reader.eof() else ""
+        while keyword and not keyword.startswith("part"):
+            # "<coordinates|element type> [undef|partial]"
+            words = keyword.split()
+            if location == "node":
+                n = part.nnodes
+            else:
+                n = dict(part.elements)[words[0]]
+            undef = None
+            if words[-1] == "undef":
+                undef = float(reader.floats(1)[0])
+            elif words[-1] == "partial":
+                # only listed entries are defined
+                n = reader.int()
+                reader.skip(n)
+            _reduce(stats, reader.floats(ncomp * n), ncomp, n, undef)
+            keyword = reader.string() if not reader.eof() else ""
+    reader.close()
+    return res
+
+
+def ascii_variable_stats(varfile: str, location: str, ncomp: int, byid: dict) -> dict:
+    res = {}
+    with open(varfile, "r") as f:
+        f.readline()  # description
+        line = f.readline()
+        while line.startswith("part"):
+            part = byid[int(f.readline())]
+            stats = res.setdefault(part.name, Stats())
+            line = f.readline()
+            while line and not line.startswith("part"):
+                words = line.split()
+                if location == "node":
+                    n = part.nnodes
+                else:
+                    n = dict(part.elements)[words[0]]
+                undef = None
+                if words[-1] == "undef":
+                    undef = float(f.readline())
+                elif words[-1] == "partial":
+                    n = int(f.readline())
+                    for _ in range(n):
+                        f.readline()
+                if ncomp == 1:
+                    for start in range(0, n, CHUNK):
+                        count = min(CHUNK, n - start)
+                        chunk = np.array([float(f.readline()) for _ in range(count)])
+                        if undef is not None:
+                            chunk = chunk[chunk != undef]
+                        stats.update(chunk)
+                else:
+                    # components are stored one after the other (all x, then all y...):
+                    # accumulate squared magnitudes over the component blocks
+                    magnitude = np.zeros(n)
+                    defined = np.ones(n, dtype=bool)
+                    for c in range(ncomp):
+                        for start in range(0, n, CHUNK):
+                            end = min(start + CHUNK, n)
+                            chunk = np.array([float(f.readline()) for _ in range(start, end)])
+                            magnitude[start:end] += chunk**2
+                            if undef is not None:
+                                defined[start:end] &= chunk != undef
+                    for start in range(0, n, CHUNK):
+                        end = min(start + CHUNK, n)
+                        stats.update(np.sqrt(magnitude[start:end][defined[start:end]]))
+                line = f.readline()
+    return res
+
+
+def case_stats(casefile: str, variables: list[str] | None = None, step: int = -1) -> list:
+    """
+    Compute per variable and per part stats for a given timestep (default: last one)
+
+    returns rows [variable, part, count, min, mean, max]
+    """
+    case = load_case(casefile)
+    dirname = os.path.dirname(casefile)
+
+    def nsteps(ts):
+        return len(case["times"][ts]["values"]) if ts is not None else 1
+
+    ts, geofile = case["model"]
+    geostep = step % nsteps(ts)
+    parts = load_geometry(os.path.join(dirname, step_filename(case, geofile, ts, geostep)))
+
+    rows = []
+    for name, (vtype, ts, pattern) in case["variables"].items():
+        if variables and name not in variables:
+            continue
+        varfile = os.path.join(dirname, step_filename(case, pattern, ts, step % nsteps(ts)))
+        stats = variable_stats(varfile, vtype, parts)
+
+        total = Stats()
+        for part, pstats in stats.items():
+            total.merge(pstats)
+            rows.append([name, part, pstats.count, pstats.min, pstats.mean, pstats.max])
+        rows.append([name, "all", total.count, total.min, total.mean, total.max])
+    return rows
+
+
+def save_case_stats(filename: str, rows: list):
+    """
+    Save stats rows to csv
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["variable", "part", "count", "min", "mean", "max"])
+        writer.writerows(rows)
+
+
+def stats_filename(resultdir: str) -> str:
+    """
+    Stats are written next to the result directory
+    """
+    resultdir = os.path.abspath(resultdir).rstrip("/")
+    return f"{resultdir}-stats.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute statistics of EnSight Gold results without rendering"
+    )
+    parser.add_argument("--case", help="input EnSight case file", required=True)
+    parser.add_argument(
+        "--vars", help="variables to reduce (default: all)", nargs="*", default=None
+    )
+    parser.add_argument(
+        "--step", help="timestep index (default: last)", type=int, default=-1
+    )
+    parser.add_argument(
+        "--output", help="output csv file (default: next to resultdir)", default=""
+    )
+    args = parser.parse_args()
+
+    rows = case_stats(args.case, args.vars, args.step)
+    output = args.output
+    if not output:
+        # Export.case is in {resultdir}/{method}.exports
+        output = stats_filename(os.path.dirname(os.path.dirname(os.path.abspath(args.case))))
+    save_case_stats(output, rows)
+    print(f"stats saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
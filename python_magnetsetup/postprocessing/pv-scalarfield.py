@@ -1,12 +1,31 @@
 # trace generated using paraview version 5.9.0
-""" 
+"""
 Console script for paraview.
 
-pvpython pv-temperature.py --cfgfile cfgfile --jsonfile jsonfile --expr heat.example --exprlegend 'T [K]'
+pvpython pv-scalarfield.py --cfgfile cfgfile --jsonfile jsonfile --expr heat.temperature cfpdes.expr.Jth --exprlegend 'T [K]' 'Jth [A/m2]'
+
+All the requested exprs are rendered from a single loaded dataset
+in one offscreen session: Export.case is read once and the pipeline
+is built once, only the coloring changes between screenshots.
+
+For transient runs, --alltimes renders the exprs for every timestep
+stored in Export.case (read from the case file, see ensight_stats.py).
+Timesteps are split over --nworkers pvpython processes (--pvpython, each
+with its own offscreen state), numbered png files
+{expr}_{step}.png are written along with {expr}_stats.csv holding
+min/mean/max per timestep.
+
+With --stats, no rendering is done: per array and per part
+min/mean/max are streamed out of the EnSight files (see ensight_stats.py)
+and saved to {resultdir}-stats.csv. This mode does not require paraview.
 """
 
 import os
 import sys
+import csv
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 import argparse
 from argparse import RawTextHelpFormatter
@@ -14,200 +33,488 @@ from argparse import RawTextHelpFormatter
 import re
 import json
 
-import argparse
-
 epilog = "The choice of exprs is actually linked with the choosen method following this table\n"
 
-# Manage Options
-command_line = None
-parser = argparse.ArgumentParser(formatter_class=RawTextHelpFormatter,
-                                 description="Post-process for Feelpp/HiFiMagnet simu",
-                                 epilog=epilog)
-
-
-parser.add_argument("--cfgfile", help="input cfg file", default=None)
-parser.add_argument("--jsonfile", help="input json file", default=None)
-parser.add_argument("--expr", help="set expr to display", type=str, default="heat.temperature")
-parser.add_argument("--exprlegend", help="set expr legend to display", type=str, default="T [K]")
-parser.add_argument("--resultdir", help="set result directory (default is empty, would get resultdir from cfgfile)", type=str, default="")
-parser.add_argument("--wd", help="set a working directory (default is $PWD)", type=str, default="")
-args = parser.parse_args()
-
-print(f'args.cfgfile={args.cfgfile}')
-
-# Get current dir
-cwd = os.getcwd()
-if args.wd:
-    os.chdir(args.wd)
-
-
-#### import the simple module from the paraview
-from paraview.simple import *
-#### disable automatic camera reset on 'Show'
-paraview.simple._DisableFirstRenderCameraReset()
-
-# directory: read cfg, directory=name
-with open(args.cfgfile, 'r') as f:
-    directory = re.sub('directory=', '', f.readline(),  flags=re.DOTALL)
-
-# get method/time/geom from directory
-print(f'directory={directory}')
-method_params = directory.split("/")[0].split('-')
-print(f'method_params={method_params}')
-
-
-if not args.resultdir:
-    # result dir: feelppdb/{directory}/np_{np}/cfpdes.exports
-    results_dir = f'feelppdb/{directory}/np_{args.np}'
-else:
-    results_dir = args.resultdir
-
-# create a new 'EnSight Reader'
-exportcase = EnSightReader(registrationName='Export.case', CaseFileName=f'{results_dir}/{method_params[0]}.exports/Export.case')
-
-# in json exports
-# fields: cfpdes.name_field
-# other dict entries: cfpdes.expr.name
-with open(args.jsonfile) as f:
-    data = json.loads(f.read())
-
-postdata = data['PostProcess'][method_params[0]]['Exports']
-
-pfields = {}
-for expr in postdata['expr']:
-    print(f'expr={expr} ({type(expr)})')
-    pfields[expr] = [f'{method_params[0]}.expr.{expr}', f'{method_params[0]}expr{expr}']
-print(f'pfiels: {pfields}')
-
-for field in postdata['fields']:
-    print(f'field={field}, type={type(field)}')
-    pfields[field] = [ f'{method_params[0]}.{field}', f'{method_params[0]}{field.replace(".","")}']
-print(f'pfiels: {pfields}')
-
-exportcase.PointArrays = [ pfields[key][0] for key in sorted(pfields.keys()) ]
-expr0 = sorted(pfields.keys())[0]
-print(f'1st expr: {expr0} --> {pfields[expr0][1]}')
-
-if not args.expr in pfields:
-    print(f'{args.expr} is not a valid field')
-    print(f'valid values are:',[expr for key in pfields])
-    sys.exit(1)
-
-print(f'Display {pfields[args.expr][0]}')
-
-# get active view
-renderView1 = GetActiveViewOrCreate('RenderView')
-
-# show data in view
-exportcaseDisplay = Show(exportcase, renderView1, 'UnstructuredGridRepresentation')
-
-# get color transfer function/color map for 'cfpdesexprJth'
-cfpdesexprJthLUT = GetColorTransferFunction(pfields[expr0][1])
-
-# get opacity transfer function/opacity map for 'cfpdesexprJth'
-cfpdesexprJthPWF = GetOpacityTransferFunction(pfields[expr0][1])
-
-# trace defaults for the display properties.
-exportcaseDisplay.Representation = 'Surface'
-exportcaseDisplay.ColorArrayName = ['POINTS', pfields[expr0][0]] #'cfpdes.expr.Jth']
-exportcaseDisplay.LookupTable = cfpdesexprJthLUT
-exportcaseDisplay.SelectTCoordArray = 'None'
-exportcaseDisplay.SelectNormalArray = 'None'
-exportcaseDisplay.SelectTangentArray = 'None'
-exportcaseDisplay.OSPRayScaleArray = pfields[expr0][0] #'cfpdes.expr.Jth'
-exportcaseDisplay.OSPRayScaleFunction = 'PiecewiseFunction'
-exportcaseDisplay.SelectOrientationVectors = 'None'
-exportcaseDisplay.ScaleFactor = 0.035400000214576725
-exportcaseDisplay.SelectScaleArray = pfields[expr0][0] #'cfpdes.expr.Jth'
-exportcaseDisplay.GlyphType = 'Arrow'
-exportcaseDisplay.GlyphTableIndexArray = pfields[expr0][0] # 'cfpdes.expr.Jth'
-exportcaseDisplay.GaussianRadius = 0.001770000010728836
-exportcaseDisplay.SetScaleArray = ['POINTS', pfields[expr0][0]] # 'cfpdes.expr.Jth']
-exportcaseDisplay.ScaleTransferFunction = 'PiecewiseFunction'
-exportcaseDisplay.OpacityArray = ['POINTS', pfields[expr0][0]] #'cfpdes.expr.Jth']
-exportcaseDisplay.OpacityTransferFunction = 'PiecewiseFunction'
-exportcaseDisplay.DataAxesGrid = 'GridAxesRepresentation'
-exportcaseDisplay.PolarAxes = 'PolarAxesRepresentation'
-exportcaseDisplay.ScalarOpacityFunction = cfpdesexprJthPWF
-exportcaseDisplay.ScalarOpacityUnitDistance = 0.017126900091946815
-exportcaseDisplay.OpacityArrayName = ['POINTS', pfields[expr][0]] #'cfpdes.expr.Jth']
-exportcaseDisplay.ExtractedBlockIndex = 1
-
-# init the 'PiecewiseFunction' selected for 'ScaleTransferFunction'
-exportcaseDisplay.ScaleTransferFunction.Points = [-393612608.0, 0.0, 0.5, 0.0, 0.0, 1.0, 0.5, 0.0]
-
-# init the 'PiecewiseFunction' selected for 'OpacityTransferFunction'
-exportcaseDisplay.OpacityTransferFunction.Points = [-393612608.0, 0.0, 0.5, 0.0, 0.0, 1.0, 0.5, 0.0]
-
-# reset view to fit data
-renderView1.ResetCamera()
-
-#changing interaction mode based on data extents
-renderView1.InteractionMode = '2D'
-renderView1.CameraPosition = [0.02500000037252903, -0.04899999499320984, 10000.0]
-renderView1.CameraFocalPoint = [0.02500000037252903, -0.04899999499320984, 0.0]
-
-# show color bar/color legend
-exportcaseDisplay.SetScalarBarVisibility(renderView1, True)
-
-# update the view to ensure updated data information
-renderView1.Update()
-
-# set scalar coloring
-ColorBy(exportcaseDisplay, ('POINTS', pfields[args.expr][0]))
-
-# Hide the scalar bar for this color map if no visible data is colored by it.
-HideScalarBarIfNotNeeded(cfpdesexprJthLUT, renderView1)
-
-# rescale color and/or opacity maps used to include current data range
-exportcaseDisplay.RescaleTransferFunctionToDataRange(True, False)
-
-# show color bar/color legend
-exportcaseDisplay.SetScalarBarVisibility(renderView1, True)
-
-# get color transfer function/color map for 'cfpdesheattemperature'
-print(f'cfpdesheattemperatureLUT = GetColorTransferFunction({pfields[args.expr][1]})')
-cfpdesheattemperatureLUT = GetColorTransferFunction(pfields[args.expr][1])
-
-# get opacity transfer function/opacity map for 'cfpdesheattemperature'
-cfpdesheattemperaturePWF = GetOpacityTransferFunction(pfields[args.expr][1])
-
-# get color legend/bar for cfpdesheattemperatureLUT in view renderView1
-cfpdesheattemperatureLUTColorBar = GetScalarBar(cfpdesheattemperatureLUT, renderView1)
-
-# Properties modified on cfpdesheattemperatureLUTColorBar
-cfpdesheattemperatureLUTColorBar.WindowLocation = 'UpperRightCorner'
-cfpdesheattemperatureLUTColorBar.Title = args.exprlegend # TODO custom 
-cfpdesheattemperatureLUTColorBar.TitleFontSize = 24
-
-#================================================================
-# addendum: following script captures some of the application
-# state to faithfully reproduce the visualization during playback
-#================================================================
-
-# get layout
-layout1 = GetLayout()
-
-#--------------------------------
-# saving layout sizes for layouts
-
-# layout/tab size in pixels
-layout1.SetSize(2495, 1864)
-
-#-----------------------------------
-# saving camera placements for views
-
-# current camera placement for renderView1
-renderView1.InteractionMode = '2D'
-renderView1.CameraPosition = [0.02500000037252903, -0.04899999499320984, 10000.0]
-renderView1.CameraFocalPoint = [0.02500000037252903, -0.04899999499320984, 0.0]
-renderView1.CameraParallelScale = 0.17709175693856544
-
-#--------------------------------------------
-# uncomment the following to render all views
-# RenderAllViews()
-# alternatively, if you want to write images, you can use SaveScreenshot(...).# save screenshot
-
-# export file to proper directory??
-imagefile = f'{args.expr}.png'
-SaveScreenshot(imagefile, renderView1, ImageResolution=[888, 835])
+
+def options():
+    """
+    Define command line options
+    """
+    parser = argparse.ArgumentParser(
+        formatter_class=RawTextHelpFormatter,
+        description="Post-process for Feelpp/HiFiMagnet simu",
+        epilog=epilog,
+    )
+
+    parser.add_argument("--cfgfile", help="input cfg file", default=None)
+    parser.add_argument("--jsonfile", help="input json file", default=None)
+    parser.add_argument(
+        "--expr",
+        help="set exprs to display",
+        type=str,
+        nargs="+",
+        default=["heat.temperature"],
+    )
+    parser.add_argument(
+        "--exprlegend",
+        help="set expr legends to display (one per expr, default is expr name)",
+        type=str,
+        nargs="+",
+        default=[],
+    )
+    parser.add_argument(
+        "--resultdir",
+        help="set result directory (default is empty, would get resultdir from cfgfile)",
+        type=str,
+        default="",
+    )
+    parser.add_argument(
+        "--np", help="number of procs used for the simu", type=int, default=1
+    )
+    parser.add_argument(
+        "--wd", help="set a working directory (default is $PWD)", type=str, default=""
+    )
+    parser.add_argument(
+        "--alltimes", help="render exprs for all timesteps", action="store_true"
+    )
+    parser.add_argument(
+        "--nworkers",
+        help="number of pvpython processes used with --alltimes",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+    )
+    parser.add_argument(
+        "--pvpython",
+        help="pvpython command used to run --alltimes workers (default: pvpython found in PATH)",
+        type=str,
+        default=shutil.which("pvpython") or "pvpython",
+    )
+    parser.add_argument(
+        "--stats",
+        help="only compute exprs statistics from EnSight files (no rendering)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--step",
+        help="timestep index used with --stats (default: last)",
+        type=int,
+        default=-1,
+    )
+    parser.add_argument(
+        "--timesteps",
+        help="comma separated list of timestep indices to render (used by --alltimes workers)",
+        type=str,
+        default="",
+    )
+    return parser
+
+
+def get_legends(exprs: list, legends: list) -> dict:
+    """
+    Pair each expr with its legend, missing legends default to the expr name
+    """
+    return {
+        expr: legends[i] if i < len(legends) else expr for i, expr in enumerate(exprs)
+    }
+
+
+def load_fields(jsonfile: str, method: str) -> dict:
+    """
+    Get the exported fields from json model
+
+    in json exports
+    fields: cfpdes.name_field
+    other dict entries: cfpdes.expr.name
+
+    returns {expr: [array name, lookup table name]}
+    """
+    with open(jsonfile) as f:
+        data = json.loads(f.read())
+
+    postdata = data["PostProcess"][method]["Exports"]
+
+    pfields = {}
+    for expr in postdata["expr"]:
+        print(f"expr={expr} ({type(expr)})")
+        pfields[expr] = [f"{method}.expr.{expr}", f"{method}expr{expr}"]
+
+    for field in postdata["fields"]:
+        print(f"field={field}, type={type(field)}")
+        pfields[field] = [f"{method}.{field}", f'{method}{field.replace(".","")}']
+    print(f"pfields: {pfields}")
+
+    return pfields
+
+
+def load_case(pvs, results_dir: str, method: str, pfields: dict):
+    """
+    Create the 'EnSight Reader' for Export.case
+    """
+    exportcase = pvs.EnSightReader(
+        registrationName="Export.case",
+        CaseFileName=f"{results_dir}/{method}.exports/Export.case",
+    )
+    exportcase.PointArrays = [pfields[key][0] for key in sorted(pfields.keys())]
+    return exportcase
+
+
+def create_view(pvs, exportcase, pfields: dict):
+    """
+    Show exportcase in a render view
+
+    returns (renderView, display)
+    """
+    expr0 = sorted(pfields.keys())[0]
+    print(f"1st expr: {expr0} --> {pfields[expr0][1]}")
+
+    # get active view
+    renderView1 = pvs.GetActiveViewOrCreate("RenderView")
+
+    # show data in view
+    exportcaseDisplay = pvs.Show(
+        exportcase, renderView1, "UnstructuredGridRepresentation"
+    )
+
+    # get color/opacity transfer function for 1st expr
+    expr0LUT = pvs.GetColorTransferFunction(pfields[expr0][1])
+    expr0PWF = pvs.GetOpacityTransferFunction(pfields[expr0][1])
+
+    # trace defaults for the display properties.
+    exportcaseDisplay.Representation = "Surface"
+    exportcaseDisplay.ColorArrayName = ["POINTS", pfields[expr0][0]]
+    exportcaseDisplay.LookupTable = expr0LUT
+    exportcaseDisplay.SelectTCoordArray = "None"
+    exportcaseDisplay.SelectNormalArray = "None"
+    exportcaseDisplay.SelectTangentArray = "None"
+    exportcaseDisplay.OSPRayScaleArray = pfields[expr0][0]
+    exportcaseDisplay.OSPRayScaleFunction = "PiecewiseFunction"
+    exportcaseDisplay.SelectOrientationVectors = "None"
+    exportcaseDisplay.ScaleFactor = 0.035400000214576725
+    exportcaseDisplay.SelectScaleArray = pfields[expr0][0]
+    exportcaseDisplay.GlyphType = "Arrow"
+    exportcaseDisplay.GlyphTableIndexArray = pfields[expr0][0]
+    exportcaseDisplay.GaussianRadius = 0.001770000010728836
+    exportcaseDisplay.SetScaleArray = ["POINTS", pfields[expr0][0]]
+    exportcaseDisplay.ScaleTransferFunction = "PiecewiseFunction"
+    exportcaseDisplay.OpacityArray = ["POINTS", pfields[expr0][0]]
+    exportcaseDisplay.OpacityTransferFunction = "PiecewiseFunction"
+    exportcaseDisplay.DataAxesGrid = "GridAxesRepresentation"
+    exportcaseDisplay.PolarAxes = "PolarAxesRepresentation"
+    exportcaseDisplay.ScalarOpacityFunction = expr0PWF
+    exportcaseDisplay.ScalarOpacityUnitDistance = 0.017126900091946815
+    exportcaseDisplay.OpacityArrayName = ["POINTS", pfields[expr0][0]]
+    exportcaseDisplay.ExtractedBlockIndex = 1
+
+    # init the 'PiecewiseFunction' selected for 'ScaleTransferFunction'
+    exportcaseDisplay.ScaleTransferFunction.Points = [
+        -393612608.0,
+        0.0,
+        0.5,
+        0.0,
+        0.0,
+        1.0,
+        0.5,
+        0.0,
+    ]
+
+    # init the 'PiecewiseFunction' selected for 'OpacityTransferFunction'
+    exportcaseDisplay.OpacityTransferFunction.Points = [
+        -393612608.0,
+        0.0,
+        0.5,
+        0.0,
+        0.0,
+        1.0,
+        0.5,
+        0.0,
+    ]
+
+    # reset view to fit data
+    renderView1.ResetCamera()
+
+    # update the view to ensure updated data information
+    renderView1.Update()
+
+    # ================================================================
+    # addendum: following script captures some of the application
+    # state to faithfully reproduce the visualization during playback
+    # ================================================================
+
+    # layout/tab size in pixels
+    layout1 = pvs.GetLayout()
+    layout1.SetSize(2495, 1864)
+
+    # current camera placement for renderView1
+    renderView1.InteractionMode = "2D"
+    renderView1.CameraPosition = [0.02500000037252903, -0.04899999499320984, 10000.0]
+    renderView1.CameraFocalPoint = [0.02500000037252903, -0.04899999499320984, 0.0]
+    renderView1.CameraParallelScale = 0.17709175693856544
+
+    return (renderView1, exportcaseDisplay)
+
+
+def render_expr(
+    pvs, renderView, display, pfields: dict, expr: str, exprlegend: str, imagefile: str
+):
+    """
+    Color display by expr and save a screenshot to imagefile
+    """
+    print(f"Display {pfields[expr][0]}")
+
+    # set scalar coloring
+    pvs.ColorBy(display, ("POINTS", pfields[expr][0]))
+
+    # rescale color and/or opacity maps used to include current data range
+    display.RescaleTransferFunctionToDataRange(True, False)
+
+    # show color bar/color legend
+    display.SetScalarBarVisibility(renderView, True)
+
+    # get color transfer function/color map for expr
+    exprLUT = pvs.GetColorTransferFunction(pfields[expr][1])
+
+    # get color legend/bar for exprLUT in view renderView
+    exprLUTColorBar = pvs.GetScalarBar(exprLUT, renderView)
+    exprLUTColorBar.WindowLocation = "UpperRightCorner"
+    exprLUTColorBar.Title = exprlegend
+    exprLUTColorBar.TitleFontSize = 24
+
+    pvs.SaveScreenshot(imagefile, renderView, ImageResolution=[888, 835])
+
+    # hide color bar before switching to the next expr
+    display.SetScalarBarVisibility(renderView, False)
+
+    return imagefile
+
+
+def expr_stats(exportcase, arrays: list) -> dict:
+    """
+    Compute min/mean/max of point arrays for the current timestep
+    (data are fetched once for all arrays)
+
+    returns {array: (min, mean, max)}
+    """
+    from paraview import servermanager
+    from vtk.numpy_interface import dataset_adapter as dsa
+    from vtk.numpy_interface import algorithms as algs
+
+    data = dsa.WrapDataObject(servermanager.Fetch(exportcase))
+    stats = {}
+    for array in arrays:
+        values = data.PointData[array]
+        stats[array] = (
+            float(algs.min(values)),
+            float(algs.mean(values)),
+            float(algs.max(values)),
+        )
+    return stats
+
+
+def timestep_values(exportcase) -> list:
+    """
+    Get the time values of a case as a list
+    (paraview returns a scalar for a single timestep, nothing for a static case)
+    """
+    values = exportcase.TimestepValues
+    if values is None:
+        return []
+    if isinstance(values, (int, float)):
+        return [values]
+    return list(values)
+
+
+def case_times(casefile: str) -> list:
+    """
+    Get the time values of an EnSight case from the case file (no paraview needed),
+    as exposed by the EnSight reader (all time sets merged)
+    """
+    from ensight_stats import load_case as load_ensight_case
+
+    case = load_ensight_case(casefile)
+    return sorted({value for ts in case["times"].values() for value in ts["values"]})
+
+
+def render_timesteps(
+    pvs, exportcase, renderView, display, pfields: dict, legends: dict, steps: list
+) -> dict:
+    """
+    Render exprs for selected timesteps
+
+    returns {expr: [[step, time, min, mean, max], ...]}
+    """
+    times = timestep_values(exportcase)
+    stats = {expr: [] for expr in legends}
+    for step in steps:
+        time = times[step]
+        print(f"timestep[{step}]: t={time}")
+        renderView.ViewTime = time
+        exportcase.UpdatePipeline(time)
+        for expr, exprlegend in legends.items():
+            render_expr(
+                pvs,
+                renderView,
+                display,
+                pfields,
+                expr,
+                exprlegend,
+                f"{expr}_{step:04d}.png",
+            )
+        values = expr_stats(exportcase, [pfields[expr][0] for expr in legends])
+        for expr in legends:
+            stats[expr].append([step, time, *values[pfields[expr][0]]])
+    return stats
+
+
+def split_timesteps(ntimes: int, nworkers: int) -> list:
+    """
+    Split timestep indices over nworkers (interleaved to balance the load)
+    """
+    steps = list(range(ntimes))
+    return [steps[w::nworkers] for w in range(min(nworkers, ntimes))]
+
+
+def save_stats(filename: str, rows: list):
+    """
+    Save per timestep statistics to csv
+    """
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["step", "time", "min", "mean", "max"])
+        writer.writerows(sorted(rows))
+
+
+def load_stats(filename: str) -> list:
+    """
+    Load per timestep statistics from csv
+    """
+    with open(filename, "r", newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        return [[int(row[0])] + [float(v) for v in row[1:]] for row in reader]
+
+
+def run_workers(args, legends: dict, results_dir: str, chunks: list) -> dict:
+    """
+    Spawn one pvpython process per chunk of timesteps and gather stats
+
+    returns {expr: [[step, time, min, mean, max], ...]}
+    """
+    if not chunks:
+        return {expr: [] for expr in legends}
+
+    script = os.path.abspath(__file__)
+    cmds = []
+    for chunk in chunks:
+        cmd = [args.pvpython, script, "--cfgfile", args.cfgfile]
+        cmd += ["--jsonfile", args.jsonfile, "--resultdir", results_dir]
+        cmd += ["--wd", os.getcwd(), "--expr", *legends.keys()]
+        cmd += ["--exprlegend", *legends.values()]
+        cmd += ["--timesteps", ",".join(str(step) for step in chunk)]
+        cmds.append(cmd)
+
+    with ThreadPoolExecutor(max_workers=len(cmds)) as pool:
+        for cmd, res in zip(cmds, pool.map(subprocess.run, cmds)):
+            if res.returncode != 0:
+                raise RuntimeError(f"pv-scalarfield worker failed: {' '.join(cmd)}")
+
+    stats = {expr: [] for expr in legends}
+    for chunk in chunks:
+        for expr in legends:
+            partfile = f"{expr}_stats-{chunk[0]:04d}.csv"
+            stats[expr] += load_stats(partfile)
+            os.remove(partfile)
+    return stats
+
+
+def main():
+    args = options().parse_args()
+    print(f"args.cfgfile={args.cfgfile}")
+
+    # Get current dir
+    cwd = os.getcwd()
+    if args.wd:
+        os.chdir(args.wd)
+
+    # directory: read cfg, directory=name
+    with open(args.cfgfile, "r") as f:
+        directory = re.sub("directory=", "", f.readline(), flags=re.DOTALL)
+
+    # get method/time/geom from directory
+    print(f"directory={directory}")
+    method_params = directory.split("/")[0].split("-")
+    print(f"method_params={method_params}")
+
+    if not args.resultdir:
+        # result dir: feelppdb/{directory}/np_{np}/cfpdes.exports
+        results_dir = f"feelppdb/{directory}/np_{args.np}"
+    else:
+        results_dir = args.resultdir
+
+    pfields = load_fields(args.jsonfile, method_params[0])
+    legends = get_legends(args.expr, args.exprlegend)
+
+    invalid = [expr for expr in legends if expr not in pfields]
+    if invalid:
+        print(f"{invalid} are not valid fields")
+        print("valid values are:", list(pfields.keys()))
+        sys.exit(1)
+
+    if args.stats:
+        # headless: stream arrays from EnSight files, no paraview needed
+        from ensight_stats import case_stats, save_case_stats, stats_filename
+
+        casefile = f"{results_dir}/{method_params[0]}.exports/Export.case"
+        rows = case_stats(casefile, [pfields[expr][0] for expr in legends], args.step)
+        statsfile = stats_filename(results_dir)
+        save_case_stats(statsfile, rows)
+        print(f"stats saved to {statsfile}")
+        return 0
+
+    if args.alltimes and not args.timesteps:
+        # workers do the rendering: get the timesteps from the case file
+        casefile = f"{results_dir}/{method_params[0]}.exports/Export.case"
+        ntimes = len(case_times(casefile))
+        if ntimes == 0:
+            print("no timesteps to render")
+            return 0
+        chunks = split_timesteps(ntimes, args.nworkers)
+        print(f"render {ntimes} timesteps with {len(chunks)} workers")
+        stats = run_workers(args, legends, os.path.abspath(results_dir), chunks)
+        for expr, rows in stats.items():
+            save_stats(f"{expr}_stats.csv", rows)
+            print(f"{expr}: stats saved to {expr}_stats.csv")
+        return 0
+
+    #### import the simple module from the paraview
+    from paraview import simple as pvs
+
+    #### disable automatic camera reset on 'Show'
+    pvs._DisableFirstRenderCameraReset()
+
+    # load data and build pipeline only once
+    exportcase = load_case(pvs, results_dir, method_params[0], pfields)
+
+    if args.timesteps:
+        # worker: render its share of timesteps
+        steps = [int(step) for step in args.timesteps.split(",")]
+        (renderView, display) = create_view(pvs, exportcase, pfields)
+        stats = render_timesteps(
+            pvs, exportcase, renderView, display, pfields, legends, steps
+        )
+        for expr, rows in stats.items():
+            save_stats(f"{expr}_stats-{steps[0]:04d}.csv", rows)
+        return 0
+
+    (renderView, display) = create_view(pvs, exportcase, pfields)
+
+    for expr, exprlegend in legends.items():
+        imagefile = render_expr(
+            pvs, renderView, display, pfields, expr, exprlegend, f"{expr}.png"
+        )
+        print(f"{expr}: saved to {imagefile}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
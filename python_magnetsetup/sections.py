@@ -0,0 +1,102 @@
+"""
+Columnar storage of the axisymmetric sections of a magnet
+
+A section is either a Bitter like section (current density j*r1/r)
+or a uniform current density section (current density j), as created
+by :class:`mt.BitterMagnet` and :class:`mt.UnifMagnet` in ana.
+"""
+
+from typing import Iterator
+
+import numpy as np
+
+COLUMNS = ("r1", "r2", "h", "j", "z", "f", "rho")
+
+
+class SectionTable:
+    """
+    Sections parameters stored as NumPy arrays (one entry per section)
+
+    r1, r2: inner and outer radius, h: height, j: current density per unit current,
+    z: center of the section, f: filling factor, rho: electrical resistivity,
+    bitter: True for Bitter like sections, imagnet: index of the magnet in a site
+    """
+
+    __slots__ = COLUMNS + ("bitter", "imagnet")
+
+    def __init__(
+        self,
+        r1,
+        r2,
+        h,
+        j,
+        z,
+        f,
+        rho,
+        bitter=True,
+        imagnet=0,
+    ):
+        values = (r1, r2, h, j, z, f, rho)
+        shape = np.broadcast_shapes((1,), *[np.shape(value) for value in values])
+        for column, value in zip(COLUMNS, values, strict=True):
+            setattr(self, column, np.broadcast_to(np.asarray(value, dtype=float), shape).copy())
+        self.bitter = np.broadcast_to(np.asarray(bitter, dtype=bool), shape).copy()
+        self.imagnet = np.broadcast_to(np.asarray(imagnet, dtype=int), shape).copy()
+
+    def __len__(self) -> int:
+        return self.r1.size
+
+    def __repr__(self):
+        return f"SectionTable({len(self)} sections, {int(self.bitter.sum())} bitter)"
+
+    @classmethod
+    def empty(cls) -> "SectionTable":
+        return cls(*([np.empty(0)] * len(COLUMNS)))
+
+    @classmethod
+    def concat(cls, tables: list) -> "SectionTable":
+        """
+        Stack tables (in order) into a single one
+        """
+        if not tables:
+            return cls.empty()
+        return cls(
+            *[np.concatenate([getattr(t, c) for t in tables]) for c in COLUMNS],
+            bitter=np.concatenate([t.bitter for t in tables]),
+            imagnet=np.concatenate([t.imagnet for t in tables]),
+        )
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "SectionTable":
+        """
+        Create from a list of ``(imagnet, kind, r1, r2, h, j, z)`` with kind 'bitter' or 'unif'
+        """
+        if not rows:
+            return cls.empty()
+        params = np.array([row[2:7] for row in rows], dtype=float).reshape(-1, 5)
+        r1, r2, h, j, z = params.T
+        return cls(
+            r1,
+            r2,
+            h,
+            j,
+            z,
+            1.0,
+            0.0,
+            bitter=[row[1] == "bitter" for row in rows],
+            imagnet=[row[0] for row in rows],
+        )
+
+    def with_magnet(self, imagnet: int) -> "SectionTable":
+        """
+        Copy of the table assigned to magnet imagnet
+        """
+        return SectionTable(
+            *[getattr(self, c) for c in COLUMNS], bitter=self.bitter, imagnet=imagnet
+        )
+
+    def rows(self) -> Iterator[tuple]:
+        """
+        Iterate over sections as ``(r1, r2, h, j, z, f, rho)`` python floats
+        """
+        return zip(*[getattr(self, c).tolist() for c in COLUMNS], strict=True)
@@ -0,0 +1,245 @@
+"""
+Asyncio service wrapper for setup
+
+setup, setup_cmds and magnet_simfile are exposed as coroutines run in a
+worker pool. Identical requests (same input fingerprint) in flight at the
+same time are coalesced: the pipeline runs once and all callers get the
+same result. Progress events are streamed to subscribers:
+
+    async with SetupService(MyEnv, workers=4) as service:
+        files = await service.setup(args, confdata, jsonfile, currents)
+
+        async for event in service.progress():
+            print(event)
+
+Workers are processes by default: setup changes the working directory
+(args.wd), which is process wide. A database session cannot be sent to
+process workers: requests with a session need executor="thread".
+"""
+
+import os
+import time
+import json
+import asyncio
+import hashlib
+import functools
+import dataclasses
+from dataclasses import dataclass
+from argparse import Namespace
+from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .config import EnvSnapshot
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+STATES = ["queued", "coalesced", "started", "done", "failed"]
+
+
+def _serialize(obj):
+    if isinstance(obj, Namespace):
+        return vars(obj)
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    return repr(obj)
+
+
+def fingerprint(op: str, *args) -> str:
+    """
+    Fingerprint of a request (operation and inputs)
+    """
+    data = json.dumps([op, args], sort_keys=True, default=_serialize)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    state of a request (see STATES), elapsed time (s) since its submission
+    """
+
+    op: str
+    fingerprint: str
+    state: str
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+
+def _run(func, cwd: str, *args, **kwargs):
+    """
+    Run func in cwd (workers are reused and setup changes the working directory)
+    """
+    current = os.getcwd()
+    os.chdir(cwd)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        os.chdir(current)
+
+
+class SetupService:
+    """
+    Setup pipeline served as coroutines
+
+    backend: object providing setup, setup_cmds and magnet_simfile
+    (default: python_magnetsetup.setup)
+    executor: "process" or "thread" (only for backends not changing the working directory)
+    """
+
+    def __init__(
+        self,
+        MyEnv: Any,
+        workers: int = 4,
+        executor: str = "process",
+        backend: Any = None,
+    ):
+        pools = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+        if executor not in pools:
+            raise ValueError(
+                f"SetupService: unknown executor {executor} (expect {list(pools.keys())})"
+            )
+        if backend is None:
+            from . import setup as backend
+
+        self.MyEnv = EnvSnapshot.from_appenv(MyEnv) if MyEnv is not None else None
+        self.backend = backend
+        self.executor = executor
+        self.pool = pools[executor](max_workers=workers)
+        self._inflight = {}
+        self._subscribers = []
+
+    async def __aenter__(self) -> "SetupService":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        Get a queue receiving the progress events
+        """
+        queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    async def progress(self):
+        """
+        Stream progress events
+        """
+        queue = self.subscribe()
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(queue)
+
+    def _emit(self, op: str, key: str, state: str, start: float, error=None):
+        event = ProgressEvent(op, key, state, time.perf_counter() - start, error)
+        logger.debug(f"SetupService: {event}")
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    async def _execute(self, op: str, key: str, start: float, args: tuple, kwargs: dict):
+        loop = asyncio.get_running_loop()
+        func = getattr(self.backend, op)
+        self._emit(op, key, "started", start)
+        try:
+            result = await loop.run_in_executor(
+                self.pool, functools.partial(_run, func, os.getcwd(), *args, **kwargs)
+            )
+        except Exception as e:
+            self._emit(op, key, "failed", start, str(e))
+            raise
+        finally:
+            del self._inflight[key]
+        self._emit(op, key, "done", start)
+        return result
+
+    async def submit(self, op: str, *args, **kwargs):
+        """
+        Run backend op with args, or wait for an identical request in flight
+
+        kwargs are passed to op but are not part of the request fingerprint
+        (eg. database session)
+        """
+        start = time.perf_counter()
+        key = fingerprint(op, *args)
+        if key in self._inflight:
+            self._emit(op, key, "coalesced", start)
+        else:
+            self._emit(op, key, "queued", start)
+            self._inflight[key] = asyncio.ensure_future(
+                self._execute(op, key, start, args, kwargs)
+            )
+        # shield: a cancelled caller must not cancel coalesced ones
+        return await asyncio.shield(self._inflight[key])
+
+    async def setup(
+        self,
+        args: Any,
+        confdata: dict,
+        jsonfile: str,
+        currents: dict,
+        session: Optional[Any] = None,
+    ) -> tuple:
+        """
+        see :func:`python_magnetsetup.setup.setup`
+
+        session requires executor="thread" (it cannot be sent to a process)
+        """
+        if session is None:
+            return await self.submit("setup", self.MyEnv, args, confdata, jsonfile, currents)
+        if self.executor == "process":
+            raise ValueError(
+                "SetupService: a session cannot be sent to process workers (use executor='thread')"
+            )
+        return await self.submit(
+            "setup", self.MyEnv, args, confdata, jsonfile, currents, session=session
+        )
+
+    async def setup_cmds(
+        self,
+        args: Any,
+        node_spec: Any,
+        yamlfile: str,
+        cfgfile: str,
+        jsonfile: str,
+        xaofile: str,
+        meshfile: str,
+        csvfiles: list,
+        root_directory: str,
+        currents: dict,
+    ) -> dict:
+        """
+        see :func:`python_magnetsetup.setup.setup_cmds`
+        """
+        return await self.submit(
+            "setup_cmds",
+            self.MyEnv,
+            args,
+            node_spec,
+            yamlfile,
+            cfgfile,
+            jsonfile,
+            xaofile,
+            meshfile,
+            csvfiles,
+            root_directory,
+            currents,
+        )
+
+    async def magnet_simfile(
+        self, confdata: dict, cad: Any, addAir: bool = False
+    ) -> list:
+        """
+        see :func:`python_magnetsetup.setup.magnet_simfile`
+        """
+        return await self.submit("magnet_simfile", self.MyEnv, confdata, cad, addAir)
@@ -26,6 +26,7 @@ mustache templates
 
 import os
 import itertools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 # Use lazy loading pattern for python_magnetgeo
 # from python_magnetgeo.Insert import Insert
@@ -40,7 +41,7 @@ import itertools
 
 # from .config import appenv
 from typing import Any, Optional
-from .config import appenv, loadconfig, loadtemplates
+from .config import appenv, EnvSnapshot, loadconfig, loadtemplates
 
 # from .objects import load_object, load_object_from_db
 from .objects import load_object
@@ -54,12 +55,16 @@ from .bitter import Bitter_setup
 # from .bitter import Bitter_simfile
 from .supra import Supra_setup, Supra_simfile
 
-from .file_utils import MyOpen, findfile, search_paths
+from .file_utils import MyOpen, findfile, search_paths, FileManifest
+from .archive import SimArchive, archive_name, unpack_cmd
 
 # from .units import load_units, convert_data
 from glob import glob
 
 from .node import NodeSpec
+from .placement import CaseSize, rank_nodes
+from .geomcache import load_geometry
+from .history import RunHistory, wrap_cmd
 
 # logging
 from .logging_config import setup_logging, get_logger, init_default_logging
@@ -74,6 +79,7 @@ def magnet_simfile(
     addAir: bool = False,
     debug: bool = False,
     session: Optional[Any] = None,
+    manifest: Optional[FileManifest] = None,
 ) -> list[str]:
     """
     Create simulation files for a magnet.
@@ -84,40 +90,33 @@ def magnet_simfile(
     :param addAir: Whether to include the air region.
     :param debug: Enable debug output.
     :param session: Optional database session.
-    :return: List of simulation file paths.
+    :param manifest: Optional manifest (shared by magnets of a site) the files are added to.
+    :return: List of simulation file paths (without duplicates).
     """
     from python_magnetgeo.Insert import Insert
     from python_magnetgeo.Bitters import Bitters
     from python_magnetgeo.Supras import Supras
 
-    files = []
-    yamlfile = confdata["geom"]
-    with MyOpen(yamlfile, "r", paths=search_paths(MyEnv, "geom")) as cfgdata:
-
-        match cad:
-            case Insert():
-                files.append(cfgdata.name)
-                tmp_files = Insert_simfile(MyEnv, confdata, cad, addAir)
-                for tmp_f in tmp_files:
-                    files.append(tmp_f)
-            case Bitters():
-                for obj in confdata["Bitter"]:
-                    yamlfile = obj["geom"]
-                    with MyOpen(yamlfile, "r", paths=search_paths(MyEnv, "geom")) as f:
-                        files.append(f.name)
-            case Supras():
-                for i, obj in enumerate(confdata["Supra"]):
-                    mcad = cad.magnets[i]
-                    yamlfile = obj["geom"]
-                    with MyOpen(yamlfile, "r", paths=search_paths(MyEnv, "geom")) as f:
-                        files.append(f.name)
-
-                    struct = Supra_simfile(MyEnv, obj, mcad)
-                    if struct:
-                        files.append(struct)
-            case _:
-                raise Exception(f"magnet_simfile: unexpected cad type {type(cad)}")
+    if manifest is None:
+        manifest = FileManifest()
+    geom = search_paths(MyEnv, "geom")
 
+    files = manifest.find([(confdata["geom"], geom, True)])
+    match cad:
+        case Insert():
+            files += Insert_simfile(MyEnv, confdata, cad, addAir, manifest=manifest)
+        case Bitters():
+            files = manifest.find([(obj["geom"], geom, True) for obj in confdata["Bitter"]])
+        case Supras():
+            files = []
+            for i, obj in enumerate(confdata["Supra"]):
+                files += Supra_simfile(MyEnv, obj, cad.magnets[i], manifest=manifest)
+        case _:
+            raise Exception(f"magnet_simfile: unexpected cad type {type(cad)}")
+
+    files = list(dict.fromkeys(files))
+    manifest.extend(files)
+    logger.debug(f"magnet_simfile: {cad.name} manifest {manifest.summary()}")
     return files
 
 
@@ -138,7 +137,7 @@ def magnet_setup(
     :param mname: Magnet name.
     :param confdata: Magnet configuration data.
     :param cad: CAD geometry object (Insert, Bitters, or Supras).
-    :param method_data: List describing solve method, time, geometry, model, cooling, units, and linearity.
+    :param method_data: List describing solve method, time, geometry, model, cooling, units, linearity and csv mode.
     :param templates: Dict of loaded mustache templates.
     :param current: Applied current in Amperes.
     :param debug: Enable debug output.
@@ -327,42 +326,50 @@ def msite_simfile(
     cad: Any,
     addAir: bool = False,
     session: Optional[Any] = None,
+    manifest: Optional[FileManifest] = None,
 ) -> list[str]:
     """
     Create list of simulation files for an MSite.
 
+    Files shared by magnets are only looked up and listed once,
+    see :attr:`FileManifest.sizes` for their size.
+
     :param MyEnv: Application environment.
     :param confdata: Site configuration data or path.
     :param cad: CAD geometry object (MSite).
     :param addAir: Whether to include the air region.
     :param session: Optional database session.
-    :return: List of simulation file paths.
+    :param manifest: Optional manifest the files are added to.
+    :return: List of simulation file paths (without duplicates).
     """
     from python_magnetgeo.MSite import MSite
 
-    files = []
+    if manifest is None:
+        manifest = FileManifest()
+    paths = search_paths(MyEnv, "cad")
 
     # TODO: get xao and brep if they exist, otherwise go on
     # TODO: add suffix _Air if needed ??
-    try:
-        xaofile = confdata["name"] + ".xao"
-        if addAir:
-            xaofile = confdata["name"] + "_withAir.xao"
-        f = findfile(xaofile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
-
-        brepfile = confdata["name"] + ".brep"
-        if addAir:
-            brepfile = confdata["name"] + "_withAir.brep"
-        f = findfile(brepfile, paths=search_paths(MyEnv, "cad"))
-        files.append(f)
-    except:
+    suffix = "_withAir" if addAir else ""
+    (xaofile, brepfile) = manifest.find(
+        [
+            (confdata["name"] + f"{suffix}.xao", paths, False),
+            (confdata["name"] + f"{suffix}.brep", paths, False),
+        ]
+    )
+    if xaofile and brepfile:
+        files = [xaofile, brepfile]
+        manifest.extend(files)
+    else:
+        files = []
         for i, magnet in enumerate(confdata["magnets"]):
             mconfdata = load_object(MyEnv, magnet + "-data.json")
             mcad = cad.magnets[i]
 
-            files += magnet_simfile(MyEnv, mconfdata, mcad)
+            files += magnet_simfile(MyEnv, mconfdata, mcad, manifest=manifest)
+        files = list(dict.fromkeys(files))
 
+    print(f"msite_simfile: {confdata['name']} {manifest.summary()}")
     return files
 
 
@@ -375,18 +382,32 @@ def msite_setup(
     currents: dict,
     debug: bool = False,
     session: Optional[Any] = None,
+    workers: int = 1,
+    executor: str = "thread",
 ) -> tuple[dict, dict, dict, dict]:
     """
     Create setup dicts for an MSite.
 
+    Per magnet setups are independent: with workers > 1 they are run on a
+    thread or process pool, results are then merged in site order so that
+    setup dicts are the same as with the serial path.
+
+    Threads share the working directory and the process caches: csv files
+    are named after their magnet, and the caches filled during a magnet
+    setup (converted materials, geometries, template bundle) are only
+    locked while looked up or updated (or swapped atomically), so parsing
+    and conversions of different magnets run concurrently.
+
     :param MyEnv: Application environment.
     :param confdata: Site configuration data or path.
     :param cad: CAD geometry object (MSite).
-    :param method_data: List describing solve method, time, geometry, model, cooling, units, and linearity.
+    :param method_data: List describing solve method, time, geometry, model, cooling, units, linearity and csv mode.
     :param templates: Dict of loaded mustache templates.
     :param currents: Dict mapping magnet names to current values and types.
     :param debug: Enable debug output.
     :param session: Optional database session.
+    :param workers: Number of magnets setup concurrently (1: serial).
+    :param executor: Pool used when workers > 1, ``'thread'`` or ``'process'``.
     :return: Tuple of (mdict, mmat, mmodels, mpost) setup dicts.
     """
     from python_magnetgeo.MSite import MSite
@@ -399,6 +420,9 @@ def msite_setup(
     mmodels = {}
     mpost = {}
 
+    # resolved once, shared (and pickled for process workers) by magnet_setup jobs
+    MyEnv = EnvSnapshot.from_appenv(MyEnv)
+    jobs = []
     for i, magnet in enumerate(confdata["magnets"]):
         mname = list(magnet.keys())[0]
         print(f"msite_setup: magnet_setup[{mname}]")
@@ -407,9 +431,27 @@ def msite_setup(
         mconfdata = magnet[mname]
         mcad = cad.magnets[i]
         current = currents[mname]["value"]
-        (tdict, tmat, tmodels, tpost) = magnet_setup(
-            MyEnv, mname, mconfdata, mcad, method_data, templates, current, debug
+        jobs.append(
+            (MyEnv, mname, mconfdata, mcad, method_data, templates, current, debug)
         )
+
+    if workers > 1 and len(jobs) > 1:
+        pools = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+        if executor not in pools:
+            raise ValueError(
+                f"msite_setup: unknown executor {executor} (expect {list(pools.keys())})"
+            )
+        logger.debug(f"msite_setup: {len(jobs)} magnets on {workers} {executor}s")
+        with pools[executor](max_workers=workers) as pool:
+            futures = [pool.submit(magnet_setup, *job) for job in jobs]
+            results = [future.result() for future in futures]
+    else:
+        results = (magnet_setup(*job) for job in jobs)
+
+    # merge in site order
+    for job, result in zip(jobs, results):
+        mname = job[1]
+        (tdict, tmat, tmodels, tpost) = result
         # print(f"msite_setup({mname}): tdict={tdict}")
         # print(f"msite_setup({mname}): tdict[init_temp]={tdict['init_temp']}")
         # print(f"msite_setup({mname}): tdict[power_magnet]={tdict['power_magnet']}")
@@ -479,8 +521,22 @@ def setup(
     :param currents: Dict mapping magnet names to current values and types.
     :param session: Optional database session.
     :return: Tuple of (yamlfile, cfgfile, jsonfile, xaofile, meshfile, csvfiles).
+
+    Optional attributes of args (not set by every caller, so read with a
+    default; set them on the namespace, eg. ``args.archive = True``, or as
+    keys of the daemon/service request args):
+
+    * ``archive`` (False): write inputs into a tarball (see :func:`setup_archive`)
+      instead of copying them to the working directory
+    * ``compression`` ("gz"): tarball compression, "gz" or "zst"
+    * ``csvmode`` ("split"): Tw profiles of Z cooling, "split" (one csv file per
+      channel) or "wide" (a single csv file), see
+      :func:`python_magnetsetup.jsonmodel.csv_mode`
+    * ``workers`` (1) and ``executor`` ("thread"): parallel setup of the
+      magnets of a site, see :func:`msite_setup`
+    * ``history`` (None): used by :func:`setup_cmds` only, record runs in the
+      history database
     """
-    from python_magnetgeo.utils import getObject
     from python_magnetgeo.MSite import MSite
     import python_magnetgeo as pmg
 
@@ -488,6 +544,7 @@ def setup(
     pmg.verify_class_registration()
 
     print(f"setup: currents={currents}")
+    MyEnv = EnvSnapshot.from_appenv(MyEnv)
 
     # loadconfig
     AppCfg = loadconfig()
@@ -508,6 +565,7 @@ def setup(
         args.cooling,
         "meter",
         args.nonlinear,
+        getattr(args, "csvmode", "split"),
     ]
 
     # TODO: if HDG meter -> millimeter
@@ -524,7 +582,7 @@ def setup(
             print(f"Load a magnet {confdata['geom']}")
         with MyOpen(confdata["geom"], "r", paths=search_paths(MyEnv, "geom")) as f:
             print(f.name)
-            cad = getObject(f.name)
+            cad = load_geometry(f.name)
             cad_basename = cad.name
 
         [mname] = currents.keys()
@@ -546,9 +604,9 @@ def setup(
 
         # why do I need that???
         try:
-            f = findfile(confdata["name"] + ".yaml", search_paths(MyEnv, "geom"))
-            print(f.name)
-            cad = getObject(f.name)
+            filename = findfile(confdata["name"] + ".yaml", search_paths(MyEnv, "geom"))
+            print(filename)
+            cad = load_geometry(filename)
             cad_basename = cad.name
 
         except FileNotFoundError as e:
@@ -564,6 +622,8 @@ def setup(
             currents,
             args.debug or args.verbose,
             session,
+            workers=getattr(args, "workers", 1),
+            executor=getattr(args, "executor", "thread"),
         )
     logger.debug(f"setup: mpost[]={mpost}")
 
@@ -630,6 +690,10 @@ def setup(
     if args.time == "transient":
         material_generic_def.append("conduct-nosource")  # only for transient with mqs
 
+    # with args.archive, inputs are streamed into a tarball (see setup_archive)
+    archive = getattr(args, "archive", False)
+    material_files = []
+    csvfiles = []
     if args.method == "cfpdes":
         logger.debug("cwd=", cwd)
         from shutil import copyfile
@@ -646,15 +710,58 @@ def setup(
             )
             if args.debug:
                 print(f"{jfile}, filename={filename}, src={src}, dst={dst}")
-            copyfile(src, dst)
+            if archive:
+                material_files.append((src, os.path.basename(dst)))
+            else:
+                copyfile(src, dst)
 
         csvfiles = glob("./*.csv")
         print(f"csvfiles: {csvfiles}")
         logger.debug(f"pwd: {os.getcwd()}, ls: {os.listdir(os.curdir)}")
 
+    if archive:
+        addAir = "mag" in args.model or "mqs" in args.model
+        if "geom" in confdata:
+            simfiles = magnet_simfile(MyEnv, confdata, cad, addAir)
+        else:
+            simfiles = msite_simfile(MyEnv, confdata, cad, addAir, session)
+        setup_archive(
+            archive_name(cfgfile, getattr(args, "compression", "gz")),
+            [cfgfile, jsonfile] + csvfiles,
+            material_files,
+            simfiles,
+        )
+
     return (yamlfile, cfgfile, jsonfile, xaofile, meshfile, csvfiles)  # , tarfilename)
 
 
+def setup_archive(
+    tarfilename: str,
+    files: list,
+    material_files: list,
+    simfiles: list,
+    geomdir: str = "data/geometries",
+) -> dict:
+    """
+    Stream simulation inputs into a tarball in a single pass.
+
+    :param tarfilename: Name of the tarball (``.tgz`` or ``.tar.zst``).
+    :param files: Files created by :func:`setup` (cfg, json, csv), stored at the top level.
+    :param material_files: List of (template path, name) of generic material json files.
+    :param simfiles: Geometry/CAD files as returned by :func:`magnet_simfile` or
+        :func:`msite_simfile`, stored in geomdir (files shared by magnets are stored once).
+    :param geomdir: Directory of geometry files in the tarball.
+    :return: Dict mapping stored names to their sha256.
+    """
+    with SimArchive(tarfilename) as archive:
+        archive.add_many(files)
+        for src, name in material_files:
+            archive.add(src, arcname=name)
+        archive.add_many(simfiles, arcdir=geomdir)
+        archive.write_checksums()
+    return archive.checksums
+
+
 def commissioning_setup(
     MyEnv: appenv,
     args: Any,
@@ -684,6 +791,8 @@ def commissioning_setup(
     # loadconfig
     AppCfg = loadconfig()
 
+    MyEnv = EnvSnapshot.from_appenv(MyEnv)
+
     # Get current dir
     cwd = os.getcwd()
     if args.wd:
@@ -733,7 +842,7 @@ def commissioning_setup(
 def setup_cmds(
     MyEnv: appenv,
     args: Any,
-    node_spec: NodeSpec,
+    node_spec: Optional[NodeSpec],
     yamlfile: str,
     cfgfile: str,
     jsonfile: str,
@@ -752,7 +861,8 @@ def setup_cmds(
 
     :param MyEnv: Application environment.
     :param args: CLI arguments namespace (method, time, geom, model, cooling, np, debug, etc.).
-    :param node_spec: Node specification describing available cores, threading, and job manager.
+    :param node_spec: Node specification describing available cores, threading, and job manager
+        (None: node and NP chosen from the estimated size of the case, see placement).
     :param yamlfile: Path to the YAML geometry file.
     :param cfgfile: Path to the Feel++ CFG file.
     :param jsonfile: Path to the Feel++ JSON model file.
@@ -767,7 +877,39 @@ def setup_cmds(
     # loadconfig
     AppCfg = loadconfig()
 
-    # TODO adapt NP to the size of the problem
+    method_data = [
+        args.method,
+        args.time,
+        args.geom,
+        args.model,
+        args.cooling,
+        "meter",
+        args.nonlinear,
+    ]
+    # with args.history, Mesh/Partition/Run durations are recorded (see history)
+    history = getattr(args, "history", None)
+    historydb = history if isinstance(history, str) else None
+    size = None
+    if node_spec is None or history:
+        # setup_cmds only gets the json model: its materials are the parts
+        # counted by Insert_setup/Bitter_setup/Supra_setup (see placement)
+        size = CaseSize.from_jsonfile(method_data, jsonfile)
+
+    placement = None
+    if node_spec is None:
+        if history:
+            with RunHistory(historydb) as runs:
+                placements = rank_nodes(size, history=runs)
+        else:
+            placements = rank_nodes(size)
+        if not placements:
+            raise RuntimeError("setup_cmds: no compute node available")
+        placement = placements[0]
+        node_spec = placement.node
+        print(
+            f"setup_cmds: select {node_spec.name} (NP={placement.np}, estimated runtime={placement.runtime:.0f}s)"
+        )
+
     # if server is SMP mpirun outside otherwise inside singularity
     NP = node_spec.cores
     print(f"NP={NP}")
@@ -776,6 +918,8 @@ def setup_cmds(
         print(f"NP={NP} multithreading on")
     if args.debug:
         print(f"NP={NP} {type(NP)}")
+    if placement is not None and args.np <= 0:
+        NP = placement.np
     if args.np > 0:
         if args.np > NP:
             print(
@@ -841,10 +985,10 @@ def setup_cmds(
 
     partcmd = f"{partitioner} --ifile $PWD/data/geometries/{gmshfile} --odir $PWD/data/geometries --part {NP} {scale}"
 
-    tarfile = cfgfile.replace("cfg", "tgz")
+    tarfile = archive_name(cfgfile, getattr(args, "compression", "gz"))
     # TODO if cad exist do not print CAD command
     cmds = {
-        "Unpack": f"tar zxvf {tarfile}",
+        "Unpack": unpack_cmd(tarfile),
         "CAD": f"singularity exec {simage_path}/{salome} {geocmd}",
     }
 
@@ -891,6 +1035,12 @@ def setup_cmds(
             f"mpirun -np {NP} singularity exec {simage_path}/{feelpp} {pyfeelcmd}"
         )
 
+    if history:
+        for stage in [stage for stage in ["Mesh", "Partition", "Run"] if stage in cmds]:
+            cmds[stage] = wrap_cmd(
+                cmds[stage], size, node_spec.name, NP, stage, historydb
+            )
+
     # compute resultdir:
     # with open(cfgfile, 'r') as f:
     #     directory = re.sub('directory=', '', f.readline(), flags=re.DOTALL)
@@ -908,13 +1058,24 @@ def setup_cmds(
         postdata = AppCfg[args.method][args.time][args.geom][args.model]["post"]
 
         # TODO: Get Path to pv-scalarfield.py:  /usr/lib/python3/dist-packages/python_magnetsetup/postprocessing/
-        for key in postdata:
-            pyparaview = f'/usr/lib/python3/dist-packages/python_magnetsetup/postprocessing//pv-scalarfield.py --cfgfile {cfgfile}  --jsonfile {jsonfile} --expr {key} --exprlegend "{postdata[key]}" --resultdir {result_dir}'
-            # pyparaview = f'pv-scalarfield.py --cfgfile {cfgfile}  --jsonfile {jsonfile} --expr {key} --exprlegend \"{postdata[key]}\" --resultdir {result_dir}'
-            pyparaviewcmd = f"pvpython {pyparaview}"
-            cmds["Postprocessing"] = (
-                f"singularity exec {simage_path}/{paraview} {pyparaviewcmd}"
-            )
+        # render all exprs in a single pvpython session
+        pyparaview = f"/usr/lib/python3/dist-packages/python_magnetsetup/postprocessing//pv-scalarfield.py --cfgfile {cfgfile}  --jsonfile {jsonfile}"
+        if postdata:
+            exprs = " ".join(postdata.keys())
+            exprlegends = " ".join(f'"{postdata[key]}"' for key in postdata)
+            pyparaview += f" --expr {exprs} --exprlegend {exprlegends}"
+        pyparaview += f" --resultdir {result_dir}"
+        # pyparaview = f'pv-scalarfield.py --cfgfile {cfgfile}  --jsonfile {jsonfile} --expr {exprs} --exprlegend {exprlegends} --resultdir {result_dir}'
+        # per part stats streamed from EnSight files, no rendering
+        cmds["Statistics"] = (
+            f"singularity exec {simage_path}/{paraview} python3 {pyparaview} --stats"
+        )
+        if args.time == "transient":
+            pyparaview += " --alltimes"
+        pyparaviewcmd = f"pvpython {pyparaview}"
+        cmds["Postprocessing"] = (
+            f"singularity exec {simage_path}/{paraview} {pyparaviewcmd}"
+        )
 
     # cmds["Save"] = f"pushd {result_dir}/.. && tar zcf {result_arch} np_{NP} && popd && mv {result_dir}/../{result_arch} ."
 
@@ -1,7 +1,6 @@
 import os
 import yaml
 import copy
-import re
 
 # Use lazy loading pattern for python_magnetgeo
 # from python_magnetgeo.Supra import Supra
@@ -13,31 +12,33 @@ from .jsonmodel import (
     create_models_supra,
 )
 from .utils import NMerge
+from .markers import SupraMarkers
 
-from .file_utils import MyOpen, findfile, search_paths
+from .file_utils import MyOpen, findfile, search_paths, FileManifest
 
 from .logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
-def Supra_simfile(MyEnv, confdata: dict, cad, debug: bool = False):
+def Supra_simfile(
+    MyEnv, confdata: dict, cad, debug: bool = False, manifest: FileManifest | None = None
+):
     from python_magnetgeo.Supra import Supra
 
     print(f"Supra_simfile: cad={cad.name}")
     print(f"Supra_simfile: confdata={confdata}")
 
-    files = []
-
-    yamlfile = confdata["geom"]
-    with MyOpen(yamlfile, "r", paths=search_paths(MyEnv, "geom")) as f:
-        files.append(f.name)
+    if manifest is None:
+        manifest = FileManifest()
+    geom = search_paths(MyEnv, "geom")
 
+    requests = [(confdata["geom"], geom, True)]
     if not cad.detail is None:
-        structfile = cad.struct
-        with MyOpen(structfile, "r", paths=search_paths(MyEnv, "geom")) as f:
-            files.append(f.name)
+        requests.append((cad.struct, geom, True))
 
+    files = manifest.find(requests)
+    manifest.extend(files)
     return files
 
 
@@ -84,21 +85,14 @@ def Supra_setup(
         snames = insert.get_names(name, cad.detail, verbose=debug)
         part_thermic = snames
 
-        part_electric = []
+        # names grouped by level in one pass
+        markers = SupraMarkers(snames)
         if cad.detail == "dblpancake":
-            search_pattern = f"{name}_{cad.name}_dp_\\d"
-            part_eletric = [
-                name for name in snames if re.search(search_pattern, name)
-            ]  # find all dblpancake in
+            part_electric = markers.select("dblpancake")  # find all dblpancake
         elif cad.detail == "pancake":
-            search_pattern = f"{name}_{cad.name}_dp_\\d_p[01]"
-            part_electric = [
-                name for name in snames if re.search(search_pattern, name)
-            ]  # find all pancake
+            part_electric = markers.select("pancake")  # find all pancake
         elif cad.detail == "tape":
-            part_electric = [
-                name for name in snames if name.endswith("_SC")
-            ]  # find all _SC in snames
+            part_electric = markers.select("SC")  # find all _SC in snames
         else:
             raise RuntimeError(
                 f"Supra_Setup: {cad.name} - cad.detail unsupported value {cad.detail}- expected dblpancake|pancake|tape"
@@ -0,0 +1,247 @@
+"""
+Precompiled bundle of templates
+
+All templates under a template repository are tokenized once (chevron
+tokens) and stored, together with the magnetsetup.json metadata, in a
+single json file read at once instead of opening each template (twice)
+per model:
+
+    python3 -m python_magnetsetup.templatebundle build [--templates DIR]
+
+The bundle (templates.bundle at the root of the template repository) is
+picked up by loadtemplates. The mtime and size of each source are stored
+in the bundle: a template (or magnetsetup.json) edited since the bundle
+was built, or missing from the bundle, is read from disk. Rebuild the
+bundle after editing templates to benefit from it again.
+
+The bundle is plain json (no code is executed when loading it), so a
+template repository shared between users only has to be trusted as
+much as its templates.
+"""
+
+import os
+import json
+from functools import lru_cache
+
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BUNDLE_NAME = "templates.bundle"
+BUNDLE_VERSION = 2
+
+# extensions of bundled templates
+EXTENSIONS = (".mustache", ".json")
+
+
+def source_stat(filename: str) -> list | None:
+    """
+    [mtime (ns), size] of a source file (None if missing)
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class TemplateBundle:
+    """
+    Templates of a repository (root) as {relative path: (text, tokens, source stat)}
+    and app config (aka magnetsetup.json) with its path and source stat
+    """
+
+    def __init__(
+        self,
+        root: str,
+        templates: dict,
+        appcfg: dict | None = None,
+        appcfg_source: tuple | None = None,
+    ):
+        self.root = os.path.abspath(root)
+        self.templates = templates
+        self._appcfg = appcfg
+        self.appcfg_source = appcfg_source
+
+    def __contains__(self, template: str) -> bool:
+        """
+        Whether template is bundled and unchanged since the bundle was built
+        """
+        entry = self.templates.get(self.relpath(template))
+        return entry is not None and source_stat(template) == entry[2]
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    @property
+    def appcfg(self) -> dict | None:
+        """
+        Bundled app config, None if its source changed since the bundle was built
+        """
+        if self._appcfg is None or self.appcfg_source is None:
+            return None
+        (filename, stat) = self.appcfg_source
+        if source_stat(filename) != stat:
+            logger.debug(f"TemplateBundle: {filename} changed, ignore bundled app config")
+            return None
+        return self._appcfg
+
+    def relpath(self, template: str) -> str:
+        return os.path.relpath(os.path.abspath(template), self.root)
+
+    def text(self, template: str) -> str:
+        return self.templates[self.relpath(template)][0]
+
+    def tokens(self, template: str) -> list:
+        return self.templates[self.relpath(template)][1]
+
+    def dump(self, filename: str):
+        data = {
+            "version": BUNDLE_VERSION,
+            "templates": self.templates,
+            "appcfg": self._appcfg,
+            "appcfg_source": self.appcfg_source,
+        }
+        with open(filename, "w") as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load(cls, filename: str) -> "TemplateBundle":
+        with open(filename, "r") as f:
+            data = json.load(f)
+        if data.get("version") != BUNDLE_VERSION:
+            raise RuntimeError(
+                f"TemplateBundle: {filename} version {data.get('version')} unsupported, rebuild it"
+            )
+        # chevron compares tokens with tuples
+        templates = {
+            rel: (text, [tuple(token) for token in tokens], stat)
+            for rel, (text, tokens, stat) in data["templates"].items()
+        }
+        return cls(
+            os.path.dirname(filename), templates, data["appcfg"], data["appcfg_source"]
+        )
+
+
+def build_bundle(
+    template_dir: str, output: str | None = None, appcfg_file: str | None = None
+) -> str:
+    """
+    Tokenize all templates of template_dir into a bundle (default: template_dir/templates.bundle)
+    """
+    from chevron.tokenizer import tokenize
+
+    if output is None:
+        output = os.path.join(template_dir, BUNDLE_NAME)
+    if appcfg_file is None:
+        default_path = os.path.dirname(os.path.abspath(__file__))
+        appcfg_file = os.path.join(default_path, "magnetsetup.json")
+
+    templates = {}
+    for dirpath, dirnames, filenames in os.walk(template_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith(EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, filename)
+            stat = source_stat(path)
+            with open(path, "r") as f:
+                text = f.read()
+            try:
+                tokens = list(tokenize(text))
+            except Exception as e:
+                logger.warning(f"build_bundle: skip {path} ({e})")
+                continue
+            templates[os.path.relpath(path, template_dir)] = (text, tokens, stat)
+
+    appcfg_file = os.path.abspath(appcfg_file)
+    stat = source_stat(appcfg_file)
+    with open(appcfg_file, "r") as f:
+        appcfg = json.load(f)
+
+    TemplateBundle(template_dir, templates, appcfg, (appcfg_file, stat)).dump(output)
+    print(f"build_bundle: {output} ({len(templates)} templates)")
+    return output
+
+
+@lru_cache(maxsize=None)
+def _load_bundle(filename: str, mtime: int) -> TemplateBundle:
+    logger.debug(f"load_bundle: {filename}")
+    return TemplateBundle.load(filename)
+
+
+def load_bundle(template_dir: str) -> TemplateBundle | None:
+    """
+    Get the bundle of a template repository if any (loaded once until rebuilt)
+    """
+    filename = os.path.abspath(os.path.join(template_dir, BUNDLE_NAME))
+    try:
+        mtime = os.stat(filename).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_bundle(filename, mtime)
+
+
+# bundle in use (see use_bundle)
+_bundle = None
+
+
+def use_bundle(bundle: TemplateBundle | None):
+    """
+    Set the bundle used to render templates (None: read templates from disk)
+    """
+    global _bundle
+    _bundle = bundle
+
+
+def current_bundle() -> TemplateBundle | None:
+    return _bundle
+
+
+def template_text(template: str) -> str:
+    """
+    Get the content of a template
+    """
+    bundle = _bundle
+    if bundle is not None and template in bundle:
+        return bundle.text(template)
+    with open(template, "r") as f:
+        return f.read()
+
+
+def render(template: str, rdata: dict) -> str:
+    """
+    Render a template file with chevron (from its pre-tokenized form if bundled)
+    """
+    import chevron
+
+    bundle = _bundle
+    if bundle is not None and template in bundle:
+        return chevron.render(bundle.tokens(template), rdata)
+    with open(template, "r") as f:
+        return chevron.render(f, rdata)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a precompiled bundle of templates")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument(
+        "--templates",
+        help="template repository (default: templates of the package)",
+        type=str,
+        default=None,
+    )
+    parser.add_argument("--output", help="bundle filename", type=str, default=None)
+    args = parser.parse_args()
+
+    template_dir = args.templates
+    if template_dir is None:
+        default_path = os.path.dirname(os.path.abspath(__file__))
+        template_dir = os.path.join(default_path, "templates")
+    build_bundle(template_dir, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,14 @@ Depending on Length base unit
 
 import sys
 import os
+import copy
+import json
+import hashlib
+import threading
+from functools import lru_cache
 
 import warnings
+import numpy as np
 from pint import UnitRegistry, Unit, Quantity
 
 from .config import appenv, loadconfig
@@ -14,8 +20,6 @@ from .config import appenv, loadconfig
 # from .objects import load_object, load_object_from_db
 from .objects import load_object
 
-import yaml
-
 # Use lazy loading pattern for python_magnetgeo
 # from python_magnetgeo.Insert import Insert
 from .logging_config import get_logger
@@ -33,9 +37,10 @@ ureg.default_system = "SI"
 ureg.autoconvert_offset_to_baseunit = True
 
 
+@lru_cache(maxsize=None)
 def load_units(distance_unit: str):
     """
-    returns units dict
+    returns units dict (built once per distance_unit: shared, must not be modified)
     """
 
     # units: dict( Quantity: [ in_unit, out_unit ]
@@ -83,7 +88,7 @@ def load_units(distance_unit: str):
 
 def convert_data(
     units: dict,
-    quantity: int | float | list[float],
+    quantity: int | float | list[float] | np.ndarray,
     qtype: str,
     debug: bool = False,
 ):
@@ -99,6 +104,8 @@ def convert_data(
         data = (
             Quantity(quantity, units[qtype][0]).to(units[qtype][1]).magnitude.tolist()
         )
+    elif isinstance(quantity, np.ndarray):
+        data = Quantity(quantity, units[qtype][0]).to(units[qtype][1]).magnitude
     else:
         raise Exception(
             f"convert_data/quantity: unsupported type {type(quantity)} for {qtype}"
@@ -107,6 +114,47 @@ def convert_data(
     return data
 
 
+MATERIAL_PROPS = ["ThermalConductivity", "Young", "VolumicMass", "ElectricalConductivity"]
+
+# converted materials: {(sha256 of material, distance_unit): material}
+_materials = {}
+# setups may run concurrently in threads (see setup.msite_setup): guards _materials
+_materials_lock = threading.Lock()
+
+
+def material_key(material: dict, distance_unit: str) -> tuple:
+    """
+    Returns a key identifying material (canonical json) for distance_unit
+    """
+    data = json.dumps(material, sort_keys=True, default=str)
+    return (hashlib.sha256(data.encode()).hexdigest(), distance_unit)
+
+
+def convert_material(
+    material: dict, distance_unit: str, props: list = MATERIAL_PROPS
+) -> dict:
+    """
+    Returns a copy of material with props consistant with distance_unit
+
+    Each distinct material is only converted once per distance_unit,
+    material itself is left unchanged
+    """
+    key = material_key(material, distance_unit)
+    with _materials_lock:
+        data = _materials.get(key)
+    if data is None:
+        # converted without holding the lock (a material may be converted twice)
+        units = load_units(distance_unit)
+        data = copy.deepcopy(material)
+        for prop in props:
+            if prop in data:
+                data[prop] = convert_data(units, data[prop], prop)
+        with _materials_lock:
+            data = _materials.setdefault(key, data)
+        logger.debug(f"convert_material: {material.get('name')} to {distance_unit}")
+    return copy.deepcopy(data)
+
+
 def main():
     import argparse
 
@@ -163,6 +211,7 @@ def main():
     print("init:", confdata)
 
     from .file_utils import MyOpen, findfile, search_paths
+    from .geomcache import load_geometry, get_params
     import python_magnetgeo as pmg
     from python_magnetgeo.Insert import Insert
 
@@ -172,9 +221,9 @@ def main():
     # select a default distance unit
     yamlfile = confdata["geom"]
     with MyOpen(yamlfile, "r", paths=search_paths(MyEnv, "geom")) as cfgdata:
-        cad = yaml.load(cfgdata, Loader=yaml.FullLoader)
+        cad = load_geometry(cfgdata.name)
         if isinstance(cad, Insert):
-            gdata = cad.get_params(MyEnv.yaml_repo)
+            gdata = get_params(cad, MyEnv.yaml_repo)
             (
                 NHelices,
                 NRings,
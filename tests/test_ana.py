@@ -0,0 +1,138 @@
+"""
+Tests for the magnet cache and parallel msite setup in python_magnetsetup.ana.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("magnettools")
+
+from python_magnetsetup import ana
+from python_magnetsetup.config import EnvSnapshot
+from python_magnetsetup.sections import SectionTable
+
+
+def fake_magnet_tables(MyEnv, confdata, debug=False):
+    """Stand-in for ana.magnet_tables (module level: pickled by process workers)."""
+    n = confdata["nsections"]
+    return {
+        "tubes": [],
+        "helices": SectionTable.empty(),
+        "bitters": SectionTable(
+            np.linspace(0.1, 0.2, n), 0.25, 0.01, 1.0e6, np.linspace(-0.1, 0.1, n), 1.0, 2.0e-8
+        ),
+        "unifs": SectionTable.empty(),
+        "unif_sections": SectionTable.empty(),
+    }
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "M9Bitters.yaml").write_text("name: M9Bitters\n")
+    (tmp_path / "M9_Bi.yaml").write_text("r: [200, 300]\n")
+    ana.clear_cache()
+    yield EnvSnapshot(yaml_repo=str(tmp_path))
+    ana.clear_cache()
+
+
+def bitters(nsections: int = 3) -> dict:
+    return {
+        "geom": "M9Bitters.yaml",
+        "Bitter": [{"geom": "M9_Bi.yaml", "material": {"name": "CuAg"}}],
+        "nsections": nsections,
+    }
+
+
+def test_magnet_key(repo, tmp_path):
+    key = ana.magnet_key(repo, bitters())
+    assert ana.magnet_key(repo, bitters()) == key
+    assert ana.magnet_key(repo, bitters(4)) != key
+
+    (tmp_path / "M9_Bi.yaml").write_text("r: [200, 310]\n")
+    assert ana.magnet_key(repo, bitters()) != key
+
+
+def test_magnet_key_supra(repo, tmp_path, monkeypatch):
+    (tmp_path / "HTS.yaml").write_text("name: HTS\n")
+    (tmp_path / "HTS.json").write_text('{"dblepancakes": 4}')
+    monkeypatch.setattr(ana, "register_classes", lambda: None)
+    monkeypatch.setattr(ana, "load_geometry", lambda path: SimpleNamespace(struct="HTS.json"))
+    confdata = {"geom": "M9Bitters.yaml", "Supra": [{"geom": "HTS.yaml"}]}
+
+    key = ana.magnet_key(repo, confdata)
+    (tmp_path / "HTS.json").write_text('{"dblepancakes": 6}')
+    assert ana.magnet_key(repo, confdata) != key
+
+
+def test_magnet_setup_cache(repo, tmp_path, monkeypatch):
+    calls = []
+
+    def magnet_tables(MyEnv, confdata, debug=False):
+        calls.append(confdata["geom"])
+        return fake_magnet_tables(MyEnv, confdata, debug)
+
+    monkeypatch.setattr(ana, "magnet_tables", magnet_tables)
+    structs = ana.magnet_setup(repo, bitters())
+    # built again from the cached sections: callers may modify the result
+    again = ana.magnet_setup(repo, bitters())
+    assert again is not structs and again[3] is not structs[3]
+    np.testing.assert_array_equal(again.sections.r1, structs.sections.r1)
+    assert len(calls) == 1
+
+    # geometry content changed: built again
+    (tmp_path / "M9_Bi.yaml").write_text("r: [200, 310]\n")
+    ana.magnet_setup(repo, bitters())
+    assert len(calls) == 2
+
+
+def test_msite_setup_workers(repo, monkeypatch):
+    monkeypatch.setattr(ana, "magnet_tables", fake_magnet_tables)
+    confdata = {"name": "site", "magnets": [bitters(3), bitters(5)]}
+
+    serial = ana.msite_setup(repo, confdata, nworkers=1)
+    ana.clear_cache()
+    parallel = ana.msite_setup(repo, confdata, nworkers=2)
+
+    assert [len(vector) for vector in parallel] == [len(vector) for vector in serial]
+    for column in ["r1", "r2", "h", "j", "z", "f", "rho", "imagnet"]:
+        np.testing.assert_array_equal(
+            getattr(parallel.sections, column), getattr(serial.sections, column)
+        )
+
+
+def supra():
+    """Supra coil with two double pancakes of 2x10 turns (geometry in mm)."""
+    pancake = SimpleNamespace(n=10, getH=lambda: 5.0, getFillingFactor=lambda: 0.8, getArea=lambda: 40.0)
+    dps = [
+        SimpleNamespace(pancake=pancake, getH=lambda: 12.0, getZ0=lambda z=z: z, getFillingFactor=lambda: 0.7, getArea=lambda: 96.0)
+        for z in (-10.0, 10.0)
+    ]
+    return SimpleNamespace(
+        name="S1", r0=20.0, r1=28.0, h=24.0, z0=1.5, dblepancakes=dps,
+        getFillingFactor=lambda: 0.6, getArea=lambda: 192.0,
+    )
+
+
+def test_unif_magnets_inputs(monkeypatch):
+    # MagnetTools inputs are unchanged: sections are converted to SI for fieldmap only
+    monkeypatch.setattr(ana.mt, "UnifMagnet", lambda *args: args)
+    monkeypatch.setattr(ana.mt, "VectorOfUnifs", list)
+    struct = supra()
+
+    sections = []
+    assert ana.UMagnet(struct, sections=sections) == (
+        28.0e-3, 20.0e-3, 24.0e-3, 40 / 192.0 * 1.0e-6, 1.5, 0.6, 0
+    )
+    np.testing.assert_allclose(sections[0].j, [40 / 192.0e-6])
+    np.testing.assert_allclose(sections[0].z, [1.5e-3])
+
+    sections = []
+    assert ana.UMagnets(struct, sections=sections) == [
+        (28.0, 20.0, 12.0, 20 / 96.0, -10.0, 0.7, 0),
+        (28.0, 20.0, 12.0, 20 / 96.0, 10.0, 0.7, 0),
+    ]
+    np.testing.assert_allclose(sections[0].r1, [20.0e-3, 20.0e-3])
+    np.testing.assert_allclose(sections[0].j, [20 / 96.0e-6] * 2)
@@ -0,0 +1,71 @@
+"""
+Tests for simulation inputs tarball in python_magnetsetup.
+"""
+
+import hashlib
+import tarfile
+
+import pytest
+
+from python_magnetsetup.archive import SimArchive, archive_name, unpack_cmd, zstd_available
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    files = {}
+    for name, content in [
+        ("M9-cfpdes-thmagel-Axi-sim.cfg", b"directory=M9\n"),
+        ("HL-31.yaml", b"name: HL-31\n" * 1000),
+        ("Ring-H1H2.yaml", b"name: Ring-H1H2\n"),
+    ]:
+        path = tmp_path / name
+        path.write_bytes(content)
+        files[name] = path
+    return files
+
+
+def test_archive_name():
+    assert archive_name("M9-cfpdes-thmagel-Axi-sim.cfg") == "M9-cfpdes-thmagel-Axi-sim.tgz"
+    assert unpack_cmd("M9-sim.tgz") == "tar zxvf M9-sim.tgz"
+    assert unpack_cmd(archive_name("M9-sim.cfg", "zst")) == "tar --zstd -xvf M9-sim.tar.zst"
+
+
+def test_sim_archive(tmp_path, inputs):
+    tarfilename = str(tmp_path / "M9-sim.tgz")
+    geomfiles = [str(inputs["HL-31.yaml"]), str(inputs["Ring-H1H2.yaml"])]
+    with SimArchive(tarfilename) as archive:
+        archive.add(str(inputs["M9-cfpdes-thmagel-Axi-sim.cfg"]))
+        # same geometry files for 2 magnets
+        archive.add_many(geomfiles, arcdir="data/geometries")
+        archive.add_many(geomfiles, arcdir="data/geometries")
+        archive.write_checksums()
+
+    with tarfile.open(tarfilename, "r:gz") as tar:
+        names = tar.getnames()
+        assert names == [
+            "M9-cfpdes-thmagel-Axi-sim.cfg",
+            "data/geometries/HL-31.yaml",
+            "data/geometries/Ring-H1H2.yaml",
+            "SHA256SUMS",
+        ]
+        data = tar.extractfile("data/geometries/HL-31.yaml").read()
+        sums = tar.extractfile("SHA256SUMS").read().decode()
+
+    assert data == inputs["HL-31.yaml"].read_bytes()
+    sha = hashlib.sha256(data).hexdigest()
+    assert archive.checksums["data/geometries/HL-31.yaml"] == sha
+    assert f"{sha}  data/geometries/HL-31.yaml\n" in sums
+
+
+@pytest.mark.skipif(not zstd_available(), reason="zstandard not installed")
+def test_sim_archive_zstd(tmp_path, inputs):
+    import zstandard
+
+    tarfilename = str(tmp_path / "M9-sim.tar.zst")
+    with SimArchive(tarfilename) as archive:
+        archive.add(str(inputs["HL-31.yaml"]))
+
+    with open(tarfilename, "rb") as f:
+        with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                assert [member.name for member in tar] == ["HL-31.yaml"]
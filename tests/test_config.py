@@ -0,0 +1,39 @@
+"""
+Tests for application environment in python_magnetsetup.
+"""
+
+import os
+import pickle
+
+from python_magnetsetup import config
+from python_magnetsetup.config import EnvSnapshot, appenv, load_env
+from python_magnetsetup.file_utils import search_paths
+
+
+def test_snapshot(tmp_path):
+    envfile = tmp_path / "settings.env"
+    envfile.write_text(
+        "URL_API=http://localhost:8000\nCOMPUTE_SERVER=kelvin\nVISU_SERVER=kelvin\n"
+        f"DATA_REPO={tmp_path}/data\n"
+    )
+
+    env = load_env(str(envfile))
+    assert load_env(str(envfile)) is env
+    assert env.yaml_repo == f"{tmp_path}/data/geometries"
+    assert os.path.isabs(env.template_path())
+    assert env.simage_path() == "/home/singularity"
+    assert search_paths(env, "cad") == [os.getcwd(), f"{tmp_path}/data/cad"]
+
+    assert pickle.loads(pickle.dumps(env)) == env
+    assert hash(env) == hash(appenv(str(envfile)).snapshot())
+    assert EnvSnapshot.from_appenv(env) is env
+
+
+def test_loadconfig(monkeypatch):
+    monkeypatch.setattr(config, "load_bundle", lambda template_dir: None)
+    config._loadconfig.cache_clear()
+
+    appcfg = config.loadconfig()
+    appcfg["mesh"] = None
+    assert config.loadconfig()["mesh"] is not None
+    assert config._loadconfig.cache_info().misses == 1
@@ -0,0 +1,33 @@
+"""
+Tests for the setup daemon in python_magnetsetup.
+"""
+
+import threading
+
+import pytest
+
+from python_magnetsetup.daemon import DaemonClient, _Handler, _Server, execute
+
+
+def test_execute():
+    assert execute(None, {"op": "ping"}) == "pong"
+    with pytest.raises(ValueError):
+        execute(None, {"op": "mesh"})
+
+
+def test_client(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+    with _Server(socket_path, _Handler) as server:
+        server.MyEnv = None
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            client = DaemonClient(socket_path)
+            assert client.call("ping") == "pong"
+            reply = client.request({"op": "mesh", "cwd": str(tmp_path)})
+            assert reply["status"] == "error"
+            with pytest.raises(RuntimeError):
+                client.call("mesh")
+        finally:
+            server.shutdown()
+            thread.join()
@@ -0,0 +1,150 @@
+"""
+Tests for headless EnSight statistics in python_magnetsetup.postprocessing.
+"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from python_magnetsetup.postprocessing import ensight_stats
+
+
+def _record(text: str) -> bytes:
+    return text.encode("ascii").ljust(80, b"\x00")
+
+
+def _ints(values) -> bytes:
+    return np.asarray(values, dtype="<i4").tobytes()
+
+
+def _floats(values) -> bytes:
+    return np.asarray(values, dtype="<f4").tobytes()
+
+
+PARTS = {1: ("H1_Cu", 4), 2: ("R1", 3)}
+
+
+def write_binary_case(dirname, temperature: dict, jth: dict, steps: int = 2):
+    """
+    Write a C Binary EnSight Gold case with 2 parts and 2 variables
+    """
+    geo = _record("C Binary") + _record("geometry") + _record("test")
+    geo += _record("node id off") + _record("element id off")
+    for partid, (name, nnodes) in PARTS.items():
+        geo += _record("part") + _ints([partid]) + _record(name)
+        geo += _record("coordinates") + _ints([nnodes]) + _floats(np.zeros(3 * nnodes))
+        geo += _record("tria3") + _ints([1]) + _ints([1, 2, 3])
+    (dirname / "Export.geo").write_bytes(geo)
+
+    for step in range(steps):
+        for varname, values in [("temperature", temperature), ("jth", jth)]:
+            data = _record(varname)
+            for partid, (name, _nnodes) in PARTS.items():
+                data += _record("part") + _ints([partid]) + _record("coordinates")
+                data += _floats(np.asarray(values[name]) + step)
+            (dirname / f"{varname}.{step + 1:03d}").write_bytes(data)
+
+    times = " ".join(str(float(step)) for step in range(steps))
+    (dirname / "Export.case").write_text(
+        "FORMAT\ntype: ensight gold\n"
+        "GEOMETRY\nmodel: Export.geo\n"
+        "VARIABLE\n"
+        "scalar per node: 1 cfpdes.heat.temperature temperature.***\n"
+        "scalar per node: 1 cfpdes.expr.Jth jth.***\n"
+        "TIME\ntime set: 1\n"
+        f"number of steps: {steps}\n"
+        "filename start number: 1\nfilename increment: 1\n"
+        f"time values: {times}\n"
+    )
+    return dirname / "Export.case"
+
+
+@pytest.fixture
+def case(tmp_path):
+    temperature = {"H1_Cu": [290.0, 300.0, 310.0, 320.0], "R1": [280.0, 281.0, 282.0]}
+    jth = {"H1_Cu": [1.0, 2.0, 3.0, 4.0], "R1": [0.0, 0.0, 0.0]}
+    return write_binary_case(tmp_path, temperature, jth)
+
+
+class TestEnsightStats:
+    """Test the streamed reduction of EnSight arrays."""
+
+    def test_load_case(self, case):
+        data = ensight_stats.load_case(case)
+        assert data["model"] == [None, "Export.geo"]
+        assert list(data["variables"]) == ["cfpdes.heat.temperature", "cfpdes.expr.Jth"]
+        assert data["times"][1]["values"] == [0.0, 1.0]
+
+    def test_step_filename(self, case):
+        data = ensight_stats.load_case(case)
+        assert ensight_stats.step_filename(data, "jth.***", 1, 1) == "jth.002"
+
+    def test_load_binary_geometry(self, case):
+        parts = ensight_stats.load_geometry(str(case.parent / "Export.geo"))
+        assert [(p.id, p.name, p.nnodes) for p in parts] == [(1, "H1_Cu", 4), (2, "R1", 3)]
+        assert parts[0].elements == [("tria3", 1)]
+
+    def test_case_stats_last_step(self, case):
+        rows = ensight_stats.case_stats(str(case), ["cfpdes.heat.temperature"])
+        stats = {row[1]: row[2:] for row in rows}
+        assert stats["H1_Cu"] == [4, 291.0, pytest.approx(306.0), 321.0]
+        assert stats["R1"] == [3, 281.0, pytest.approx(282.0), 283.0]
+        assert stats["all"][0] == 7
+        assert stats["all"][1] == 281.0
+        assert stats["all"][3] == 321.0
+
+    def test_case_stats_chunked(self, case, monkeypatch):
+        monkeypatch.setattr(ensight_stats, "CHUNK", 2)
+        rows = ensight_stats.case_stats(str(case), ["cfpdes.expr.Jth"], step=0)
+        stats = {row[1]: row[2:] for row in rows}
+        assert stats["H1_Cu"] == [4, 1.0, pytest.approx(2.5), 4.0]
+
+    def test_save_case_stats(self, case, tmp_path):
+        rows = ensight_stats.case_stats(str(case))
+        filename = tmp_path / "np_1-stats.csv"
+        ensight_stats.save_case_stats(str(filename), rows)
+        with open(filename) as f:
+            lines = list(csv.reader(f))
+        assert lines[0] == ["variable", "part", "count", "min", "mean", "max"]
+        assert len(lines) == 1 + 2 * 3
+
+    def test_binary_undef_partial(self, case):
+        parts = ensight_stats.load_geometry(str(case.parent / "Export.geo"))
+        varfile = case.parent / "undef.001"
+        data = _record("undef")
+        data += _record("part") + _ints([1]) + _record("coordinates undef")
+        data += _floats([-1.0e30]) + _floats([1.0, -1.0e30, 3.0, 5.0])
+        data += _record("part") + _ints([2]) + _record("coordinates partial")
+        data += _ints([2]) + _ints([1, 3]) + _floats([10.0, 20.0])
+        varfile.write_bytes(data)
+
+        res = ensight_stats.variable_stats(str(varfile), "scalar per node", parts)
+        assert (res["H1_Cu"].count, res["H1_Cu"].min, res["H1_Cu"].max) == (3, 1.0, 5.0)
+        assert (res["R1"].count, res["R1"].mean) == (2, 15.0)
+
+    def test_ascii_undef_partial(self, case):
+        parts = ensight_stats.load_geometry(str(case.parent / "Export.geo"))
+        varfile = case.parent / "undef.txt"
+        lines = ["undef", "part", "1", "coordinates undef", "-1.0e30"]
+        lines += ["1.0", "-1.0e30", "3.0", "5.0"]
+        lines += ["part", "2", "coordinates partial", "2", "1", "3", "10.0", "20.0"]
+        varfile.write_text("\n".join(lines) + "\n")
+
+        res = ensight_stats.variable_stats(str(varfile), "scalar per node", parts)
+        assert (res["H1_Cu"].count, res["H1_Cu"].min, res["H1_Cu"].max) == (3, 1.0, 5.0)
+        assert (res["R1"].count, res["R1"].mean) == (2, 15.0)
+
+    def test_ascii_vector_chunked(self, case, monkeypatch):
+        monkeypatch.setattr(ensight_stats, "CHUNK", 2)
+        parts = ensight_stats.load_geometry(str(case.parent / "Export.geo"))
+        varfile = case.parent / "vector.txt"
+        # unit vectors along x, y, z and x for H1_Cu, (0, 3, 4) for R1
+        x, y, z = [1.0, 0.0, 0.0, 1.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0]
+        lines = ["vector", "part", "1", "coordinates", *map(str, x + y + z)]
+        lines += ["part", "2", "coordinates", *map(str, [0.0] * 3 + [3.0] * 3 + [4.0] * 3)]
+        varfile.write_text("\n".join(lines) + "\n")
+
+        res = ensight_stats.variable_stats(str(varfile), "vector per node", parts)
+        assert (res["H1_Cu"].count, res["H1_Cu"].min, res["H1_Cu"].max) == (4, 1.0, 1.0)
+        assert (res["R1"].count, res["R1"].min, res["R1"].max) == (3, 5.0, 5.0)
@@ -0,0 +1,87 @@
+"""
+Tests for batched field map evaluation in python_magnetsetup.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from python_magnetsetup.fieldmap import MU0, ellipke, field_map
+from python_magnetsetup.sections import SectionTable
+
+
+def solenoid_center(r1: float, r2: float, L: float, J: float) -> float:
+    """Bz at the center of a thick solenoid with uniform current density J."""
+    return (
+        MU0
+        * J
+        * L
+        / 2.0
+        * math.log((r2 + math.hypot(r2, L / 2.0)) / (r1 + math.hypot(r1, L / 2.0)))
+    )
+
+
+class TestFieldMap:
+    """Test the field map evaluation."""
+
+    def test_ellipke(self):
+        K, E = ellipke(np.array([0.0, 0.5]))
+        assert K == pytest.approx([math.pi / 2.0, 1.8540746773013719])
+        assert E == pytest.approx([math.pi / 2.0, 1.3506438810476755])
+
+    def test_unif_solenoid_center(self):
+        sections = [(0, "unif", 0.1, 0.11, 0.2, 1.0e6, 0.0)]
+        Br, Bz = field_map(sections, [[0.0, 0.0]], [1.0], order=8, nworkers=1)
+        assert Br.shape == (1, 1)
+        assert Br[0, 0] == pytest.approx(0.0, abs=1.0e-12)
+        assert Bz[0, 0] == pytest.approx(solenoid_center(0.1, 0.11, 0.2, 1.0e6), rel=1.0e-5)
+
+    def test_bitter_turns(self):
+        # section of n turns as built by ana.bitter_table: j = n / (r1 log(r2/r1) h), f = 1/n
+        r1, r2, h = 0.05, 0.1, 0.02
+        Bz = []
+        for n in [1, 10]:
+            j = n / (r1 * math.log(r2 / r1) * h)
+            sections = SectionTable(r1, r2, h, j, 0.0, 1.0 / n, 0.0, bitter=True)
+            Bz.append(field_map(sections, [[0.0, 0.0]], [1.0], order=8, nworkers=1)[1][0, 0])
+        # on axis, center: mu0 j r1 (asinh(h/2r1) - asinh(h/2r2))
+        j = 10 / (r1 * math.log(r2 / r1) * h)
+        expected = MU0 * j * r1 * (math.asinh(h / (2 * r1)) - math.asinh(h / (2 * r2)))
+        assert Bz[1] == pytest.approx(expected, rel=1.0e-5)
+        assert Bz[1] == pytest.approx(10 * Bz[0])
+
+    def test_bitter_total_current(self):
+        # far from the coil, B only depends on the total current: j*r1*log(r2/r1)*h
+        r1, r2, h = 0.05, 0.1, 0.01
+        j = 1 / (r1 * math.log(r2 / r1) * h)
+        bitter = [(0, "bitter", r1, r2, h, j, 0.0)]
+        unif = [(0, "unif", r1, r2, h, 1 / ((r2 - r1) * h), 0.0)]
+        point = [[0.0, 10.0]]
+        Bbitter = field_map(bitter, point, [1.0], nworkers=1)[1]
+        Bunif = field_map(unif, point, [1.0], nworkers=1)[1]
+        assert Bbitter[0, 0] == pytest.approx(Bunif[0, 0], rel=1.0e-3)
+
+    def test_linearity(self):
+        sections = [
+            (0, "unif", 0.1, 0.11, 0.2, 1.0e6, 0.0),
+            (1, "bitter", 0.2, 0.3, 0.05, 1.0e5, 0.1),
+        ]
+        points = np.random.default_rng(0).random((50, 2)) * 0.05
+        currents = np.array([[1.0, 0.0], [0.0, 1.0], [2.0, 3.0]])
+        Br, Bz = field_map(sections, points, currents, nworkers=1)
+        assert Bz.shape == (3, 50)
+        assert Bz[2] == pytest.approx(2 * Bz[0] + 3 * Bz[1])
+        assert Br[2] == pytest.approx(2 * Br[0] + 3 * Br[1])
+
+    def test_workers(self):
+        sections = [(0, "bitter", 0.05, 0.1, 0.01, 1.0e6, 0.01 * i) for i in range(4)]
+        points = np.random.default_rng(1).random((100, 2)) * 0.2
+        serial = field_map(sections, points, [1.0], nworkers=1)
+        parallel = field_map(sections, points, [1.0], nworkers=2, chunksize=30)
+        assert parallel[1] == pytest.approx(serial[1])
+
+    def test_currents_shape(self):
+        sections = [(1, "unif", 0.1, 0.11, 0.2, 1.0e6, 0.0)]
+        with pytest.raises(ValueError):
+            field_map(sections, [[0.0, 0.0]], [1.0], nworkers=1)
@@ -0,0 +1,49 @@
+"""
+Tests for file lookup helpers in python_magnetsetup.
+"""
+
+import os
+
+import pytest
+
+from python_magnetsetup.file_utils import FileManifest
+
+
+@pytest.fixture
+def repos(tmp_path):
+    geom = tmp_path / "geom"
+    cad = tmp_path / "cad"
+    geom.mkdir()
+    cad.mkdir()
+    for name, size in [("HL-31_H1.yaml", 10), ("Ring-H1H2.yaml", 20)]:
+        (geom / name).write_bytes(b"x" * size)
+    (cad / "HL-31_H1.xao").write_bytes(b"x" * 100)
+    return [str(geom)], [str(cad)]
+
+
+def test_manifest(repos):
+    (geom, cad) = repos
+    manifest = FileManifest(workers=4)
+    requests = [
+        ("HL-31_H1.yaml", geom, True),
+        ("HL-31_H1.xao", cad, True),
+        ("HL-31_H1.brep", cad, False),
+        ("Ring-H1H2.yaml", geom, True),
+    ]
+    found = manifest.find(requests)
+    assert found[2] is None
+    assert [os.path.basename(f) for f in found if f] == [
+        "HL-31_H1.yaml",
+        "HL-31_H1.xao",
+        "Ring-H1H2.yaml",
+    ]
+
+    # files shared by several magnets are listed once, in first insertion order
+    manifest.extend([f for f in found if f])
+    manifest.extend(manifest.find([("Ring-H1H2.yaml", geom, True)]))
+    assert len(manifest) == 3
+    assert os.path.basename(manifest.files[-1]) == "Ring-H1H2.yaml"
+    assert manifest.total_size == 130
+
+    with pytest.raises(FileNotFoundError):
+        manifest.find([("HL-31_H1.brep", cad, True)])
@@ -0,0 +1,166 @@
+"""
+Tests for the geometry cache in python_magnetsetup.
+"""
+
+import os
+
+import yaml
+
+from python_magnetsetup.geomcache import GeometryCache
+
+
+class Parser:
+    """yaml parser counting calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path: str):
+        self.calls += 1
+        with open(path, "r") as f:
+            return yaml.safe_load(f)
+
+
+class NestedParser(Parser):
+    """parser loading the helices of an insert from their own yaml files (named after them)."""
+
+    def __call__(self, path: str):
+        data = super().__call__(path)
+        dirname = os.path.dirname(path)
+        for i, helix in enumerate(data.get("helices", [])):
+            with open(os.path.join(dirname, f"{helix}.yaml"), "r") as f:
+                data["helices"][i] = {"name": helix, **yaml.safe_load(f)}
+        return data
+
+
+class Cad:
+    def __init__(self):
+        self.calls = 0
+
+    def get_params(self, yaml_repo):
+        self.calls += 1
+        return (1, [2.0], [3.0])
+
+
+def touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_load(tmp_path):
+    filename = tmp_path / "HL-31.yaml"
+    filename.write_text("name: HL-31\nhelices: [H1, H2]\n")
+    parser = Parser()
+    cache = GeometryCache(parser=parser)
+
+    cad = cache.load(str(filename))
+    assert cad == {"name": "HL-31", "helices": ["H1", "H2"]}
+    assert cache.load(str(filename)) is cad
+
+    # same content: not parsed again
+    touch(filename)
+    assert cache.load(str(filename)) is cad
+    assert parser.calls == 1
+
+    filename.write_text("name: HL-31\nhelices: [H1, H2, H3]\n")
+    touch(filename)
+    assert cache.load(str(filename))["helices"] == ["H1", "H2", "H3"]
+    assert parser.calls == 2
+
+
+def test_disk_cache(tmp_path):
+    filename = tmp_path / "M9.yaml"
+    filename.write_text("name: M9\n")
+    parser = Parser()
+    GeometryCache(str(tmp_path / "cache"), parser).load(str(filename))
+
+    cache = GeometryCache(str(tmp_path / "cache"), parser)
+    assert cache.load(str(filename)) == {"name": "M9"}
+    assert parser.calls == 1
+    assert cache.stats["disk"] == 1
+
+
+def test_nested(tmp_path):
+    (tmp_path / "HL-31.yaml").write_text("name: HL-31\nhelices: [H1]\n")
+    (tmp_path / "H1.yaml").write_text("r: [19.3, 24.2]\n")
+    parser = NestedParser()
+    cache = GeometryCache(parser=parser)
+
+    cad = cache.load(str(tmp_path / "HL-31.yaml"))
+    touch(tmp_path / "H1.yaml")
+    assert cache.load(str(tmp_path / "HL-31.yaml")) is cad
+
+    (tmp_path / "H1.yaml").write_text("r: [19.3, 24.5]\n")
+    assert cache.load(str(tmp_path / "HL-31.yaml"))["helices"] == [
+        {"name": "H1", "r": [19.3, 24.5]}
+    ]
+    assert parser.calls == 2
+
+
+def test_maxsize(tmp_path):
+    for name in ["M1", "M2", "M3"]:
+        (tmp_path / f"{name}.yaml").write_text(f"name: {name}\n")
+    parser = Parser()
+    cache = GeometryCache(parser=parser, maxsize=2)
+
+    m1 = cache.load(str(tmp_path / "M1.yaml"))
+    cache.load(str(tmp_path / "M2.yaml"))
+    assert cache.load(str(tmp_path / "M1.yaml")) is m1
+    # M2 is the least recently used
+    cache.load(str(tmp_path / "M3.yaml"))
+    assert cache.load(str(tmp_path / "M1.yaml")) is m1
+    assert parser.calls == 3
+    cache.load(str(tmp_path / "M2.yaml"))
+    assert parser.calls == 4
+    assert len(cache._objects) == len(cache._entries) == 2
+
+
+def test_disk_cache_keys(tmp_path):
+    for name, radius in [("a", 24.2), ("b", 24.5)]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "HL-31.yaml").write_text("name: HL-31\nhelices: [H1]\n")
+        (tmp_path / name / "H1.yaml").write_text(f"r: [19.3, {radius}]\n")
+    GeometryCache(str(tmp_path / "cache"), NestedParser()).load(
+        str(tmp_path / "a" / "HL-31.yaml")
+    )
+
+    # same top-level content in another directory: not shared
+    cache = GeometryCache(str(tmp_path / "cache"), NestedParser())
+    cad = cache.load(str(tmp_path / "b" / "HL-31.yaml"))
+    assert cad["helices"] == [{"name": "H1", "r": [19.3, 24.5]}]
+    assert cache.stats["disk"] == 0
+
+    # nested file changed since pickled: parsed again
+    (tmp_path / "a" / "H1.yaml").write_text("r: [19.3, 25.0]\n")
+    cad = cache.load(str(tmp_path / "a" / "HL-31.yaml"))
+    assert cad["helices"] == [{"name": "H1", "r": [19.3, 25.0]}]
+    assert cache.stats["disk"] == 0
+
+
+def test_get_params(tmp_path):
+    filename = tmp_path / "HL-31.yaml"
+    filename.write_text("name: HL-31\n")
+    params = {"calls": 0}
+
+    class Insert(dict):
+        def get_params(self, yaml_repo):
+            params["calls"] += 1
+            return (1, [2.0], [3.0])
+
+    cache = GeometryCache(parser=lambda path: Insert(name="HL-31"))
+    cad = cache.load(str(filename))
+    assert cache.get_params(cad, "data") is cache.get_params(cad, "data")
+    cache.get_params(cad, "other")
+    assert params["calls"] == 2
+
+    # objects not from the cache are not memoized (nor kept alive)
+    other = Cad()
+    cache.get_params(other, "data")
+    cache.get_params(other, "data")
+    assert other.calls == 2
+
+    # params are dropped with their object
+    filename.write_text("name: HL-31\nr: 1\n")
+    cache.get_params(cache.load(str(filename)), "data")
+    assert params["calls"] == 3
+    assert len(cache._entries) == 1
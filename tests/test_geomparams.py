@@ -0,0 +1,66 @@
+"""
+Tests for geometry parameters containers in python_magnetsetup.
+"""
+
+import numpy as np
+import pytest
+
+from python_magnetsetup.geomparams import BitterGeomParams, InsertGeomParams
+
+
+def insert_params() -> InsertGeomParams:
+    return InsertGeomParams(
+        "M9",
+        2,
+        1,
+        3,
+        [3, 4],
+        [19.3, 34.0],
+        [24.2, 40.0],
+        [1.0, 2.0, 3.0],
+        [10.0, 20.0, 30.0],
+        [[-100.0, 0.0, 100.0], [-110.0, 110.0], [-120.0, 0.0, 60.0, 120.0]],
+        [[1, 2, 3], [1, 2, 3, 4]],
+    )
+
+
+class TestInsertGeomParams:
+    """Test the Insert geometry container."""
+
+    def test_arrays(self):
+        gdata = insert_params()
+        assert gdata.prefix == "M9_"
+        assert gdata.R1.dtype == float
+        assert gdata.Zmin.tolist() == [-100.0, -110.0, -120.0]
+        assert gdata.Zmax.tolist() == [100.0, 110.0, 120.0]
+        assert len(gdata.Zh[2]) == 4
+
+    def test_converted(self):
+        gdata = insert_params()
+        assert gdata.converted("millimeter") is gdata
+
+        geom = gdata.converted("meter")
+        assert geom is gdata.converted("meter")
+        assert geom.R1 == pytest.approx([0.0193, 0.034])
+        assert geom.Sh == pytest.approx([1.0e-5, 2.0e-5, 3.0e-5])
+        assert geom.Zh[1] == pytest.approx([-0.11, 0.11])
+        # mm data left untouched, non length data shared
+        assert gdata.R1.tolist() == [19.3, 34.0]
+        assert geom.turns is gdata.turns
+
+
+def test_bitter_converted():
+    gdata = BitterGeomParams(
+        "M1_Bitter",
+        ["M1_Bitter_B1"],
+        [10.0],
+        2,
+        [1.0] * 4,
+        [2.0] * 4,
+        np.array([-50.0, 50.0]),
+        [1.0] * 4,
+        [],
+    )
+    geom = gdata.converted("meter")
+    assert geom.Zh.tolist() == pytest.approx([-0.05, 0.05])
+    assert geom.Dh.tolist() == pytest.approx([1.0e-3] * 4)
@@ -0,0 +1,42 @@
+"""
+Tests for run-time history in python_magnetsetup.
+"""
+
+import sys
+
+import pytest
+
+from python_magnetsetup.history import RunHistory, case_key, parse_case_key, run
+from python_magnetsetup.placement import CaseSize
+
+
+def test_case_key():
+    size = CaseSize("cfpdes", "static", "Axi", "thmagel", True, 42)
+    assert case_key(size) == "cfpdes:static:Axi:thmagel:nonlinear:42"
+    assert parse_case_key(case_key(size)) == size
+    with pytest.raises(ValueError):
+        parse_case_key("cfpdes:static")
+
+
+def test_history(tmp_path):
+    size = CaseSize("cfpdes", "static", "Axi", "thmagel", False, 42)
+    with RunHistory(str(tmp_path / "history.sqlite")) as history:
+        assert history.best(size) is None
+        history.record(size, "kelvin", 32, "Run", 120.0, 1000)
+        history.record(size, "kelvin", 32, "Run", 100.0, 2000)
+        history.record(size, "calcul22", 20, "Run", 90.0, 1500)
+        history.record(size, "calcul18", 4, "Run", 10.0, 100, returncode=1)
+        assert history.stats(size) == [
+            ("calcul22", 20, 1, 90.0, 1500),
+            ("kelvin", 32, 2, 110.0, 2000),
+        ]
+        assert history.best(size) == ("calcul22", 20, 90.0)
+        assert history.best(size, "kelvin") == ("kelvin", 32, 110.0)
+        assert history.best(size, "calcul18") is None
+
+
+def test_run():
+    (returncode, duration, maxrss) = run([sys.executable, "-c", "import sys; sys.exit(3)"])
+    assert returncode == 3
+    assert duration > 0
+    assert maxrss > 0
@@ -0,0 +1,97 @@
+"""
+Tests for json model entries in python_magnetsetup.
+"""
+
+import os
+
+import pytest
+
+from python_magnetsetup.jsonmodel import (
+    COOLING_KEYS,
+    EntrySkeleton,
+    MaterialEntries,
+    csv_mode,
+    entry,
+    wide_csvfile,
+)
+
+TEMPLATES = os.path.join(
+    os.path.dirname(__file__), "..", "python_magnetsetup", "templates"
+)
+
+
+def cooling_data(i: int) -> dict:
+    return {
+        "name": f"M1_Bitter_Slit{i}",
+        "markers": [f"M1_Bitter_Slit{i}"],
+        "fillingfactor": 0.5 + i,
+        "hw": f"hw_M1_Bitter_Slit{i}",
+        "Tw": f"Tw_M1_Bitter_Slit{i}",
+        "dTw": f"dTw_M1_Bitter_Slit{i}",
+        "Zmin": f"Zmin_M1_Bitter_Slit{i}",
+        "Zmax": f"Zmax_M1_Bitter_Slit{i}",
+    }
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "cfpdes/Axi/thmagel/channel-gradH.mustache",
+        "cfpdes/Axi/thelec/channel-mean.mustache",
+        "CG/3D/thelec/channel-grad.mustache",
+    ],
+)
+def test_entry_skeleton(template):
+    template = os.path.join(TEMPLATES, template)
+    fcooling = EntrySkeleton(template, COOLING_KEYS)
+    assert fcooling.skeleton is not None
+    for i in range(4):
+        assert fcooling.stamp(cooling_data(i)) == entry(template, cooling_data(i))
+
+
+def test_material_entries():
+    template = os.path.join(
+        TEMPLATES, "cfpdes/Axi/thmagel/conductor-nonlinear-static.mustache"
+    )
+    material = {
+        "alpha": 3.6e-3,
+        "ElectricalConductivity": 5.3e7,
+        "ThermalConductivity": 380.0,
+        "MagnetPermeability": 1,
+        "Young": 127e9,
+        "Poisson": 0.33,
+        "CoefDilatation": 18e-6,
+    }
+    mentries = MaterialEntries()
+    for i in range(1, 4):
+        markers = {
+            "name": f"Conductor_M_H{i}",
+            "part_mat_conductor": [{"name": f"M_H{i}_Cu%1%", "index1": ["1:21"]}],
+        }
+        assert mentries.entry(template, markers, material) == entry(
+            template, dict(markers, **material)
+        )
+    other = dict(material, alpha=4e-3)
+    mentries.entry(template, markers, other)
+    assert len(mentries.skeletons) == 2
+    assert all(skeleton.skeleton is not None for skeleton in mentries.skeletons.values())
+
+
+def test_wide_csvfile():
+    data = wide_csvfile(
+        [[-0.1, 0.1], [-0.2, 0.0, 0.2]],
+        ["Tw_Channel0", "Tw_Channel1"],
+        [[290.0, 292.0], [290.0, 291.0, 294.0]],
+    )
+    assert list(data.columns) == ["Z", "Tw_Channel0", "Tw_Channel1"]
+    assert data["Z"].tolist() == [-0.2, -0.1, 0.0, 0.1, 0.2]
+    assert data["Tw_Channel0"].tolist() == [290.0, 290.0, 291.0, 292.0, 292.0]
+    assert data["Tw_Channel1"].tolist() == [290.0, 290.5, 291.0, 292.5, 294.0]
+
+
+def test_csv_mode():
+    method_data = ["cfpdes", "static", "Axi", "thmagel", "gradHZ", "meter", False]
+    assert csv_mode(method_data) == "split"
+    assert csv_mode(method_data + ["wide"]) == "wide"
+    with pytest.raises(ValueError):
+        csv_mode(method_data + ["binary"])
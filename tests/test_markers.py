@@ -0,0 +1,81 @@
+"""
+Tests for marker names handling in python_magnetsetup.
+"""
+
+import pytest
+
+from python_magnetsetup.markers import (
+    MarkerSet,
+    SupraMarkers,
+    compact_markers,
+    expand_markers,
+    index_ranges,
+    parse_supra_name,
+)
+
+
+def tape_names(prefix: str, ndp: int, ntapes: int) -> list:
+    names = []
+    for dp in range(ndp):
+        for p in range(2):
+            for t in range(ntapes):
+                names.append(f"{prefix}_dp_{dp}_p{p}_t{t}_SC")
+                names.append(f"{prefix}_dp_{dp}_p{p}_t{t}_Duromag")
+        names.append(f"{prefix}_i_{dp}")
+    return names
+
+
+class TestSupraMarkers:
+    """Test the grouping of HTS insert markers."""
+
+    def test_parse_supra_name(self):
+        assert parse_supra_name("M_HTS_HTS_dp_12_p1_t3_SC") == (12, 1, 3, "SC")
+        assert parse_supra_name("M_HTS_dp2_p0") == (2, 0, None, "p0")
+        assert parse_supra_name("M_HTS_i_3") == (None, None, None, "3")
+
+    def test_tape_levels(self):
+        names = tape_names("M_HTS_HTS", 3, 4)
+        markers = SupraMarkers(names)
+        assert markers.select("SC") == [name for name in names if name.endswith("_SC")]
+        assert len(markers.select("tape")) == 3 * 2 * 4 * 2
+        assert markers.select("insulation")[-1] == "M_HTS_HTS_i_2"
+        assert markers.tree[1][0][2] == ["M_HTS_HTS_dp_1_p0_t2_SC", "M_HTS_HTS_dp_1_p0_t2_Duromag"]
+
+    def test_pancake_and_dblpancake_levels(self):
+        names = ["M_HTS_HTS_dp_0", "M_HTS_HTS_dp_0_p0", "M_HTS_HTS_dp_0_p1", "M_HTS_HTS_i_0"]
+        markers = SupraMarkers(names)
+        assert markers.select("dblpancake") == ["M_HTS_HTS_dp_0"]
+        assert markers.select("pancake") == ["M_HTS_HTS_dp_0_p0", "M_HTS_HTS_dp_0_p1"]
+        with pytest.raises(RuntimeError):
+            markers.select("turn")
+
+
+class TestMarkerSet:
+    """Test the compact %1%/index1 marker syntax."""
+
+    def test_index_ranges(self):
+        assert index_ranges([5, 1, 2, 3, 3]) == ["1:4", "5:6"]
+
+    def test_compact_sections(self):
+        names = [f"M_H1_Cu{j}" for j in range(1, 21)] + ["M_R1", "M_R2"]
+        assert compact_markers(names) == [
+            {"name": "M_H1_Cu%1%", "index1": ["1:21"]},
+            "M_R1",
+            "M_R2",
+        ]
+
+    def test_compact_tapes(self):
+        names = tape_names("M_HTS", 2, 10)
+        markers = compact_markers(names)
+        assert {"name": "M_HTS_dp_1_p0_t%1%_SC", "index1": ["0:10"]} in markers
+        assert sorted(expand_markers(markers)) == sorted(names)
+
+    def test_leading_zeros_kept(self):
+        names = ["H1_Cu01", "H1_Cu02", "H1_Cu03"]
+        assert compact_markers(names) == names
+
+    def test_marker_set(self):
+        markers = MarkerSet([{"name": "H1_Cu%1%", "index1": ["0:3"]}, "R1"])
+        assert markers.expand() == ["H1_Cu0", "H1_Cu1", "H1_Cu2", "R1"]
+        assert len(markers) == 4
+        assert markers.compact() == [{"name": "H1_Cu%1%", "index1": ["0:3"]}, "R1"]
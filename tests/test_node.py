@@ -0,0 +1,65 @@
+"""
+Tests for machines registry in python_magnetsetup.
+"""
+
+import os
+import json
+
+import pytest
+
+from python_magnetsetup.job import JobManagerType
+from python_magnetsetup.node import MachineRegistry, NodeType, loadmachines, to_bool
+
+
+def machine(cores: int, manager: str = "none", smp: str = "True") -> dict:
+    return {
+        "type": "compute",
+        "smp": smp,
+        "dns": "node.local",
+        "jobmanager": {"type": manager, "queues": []},
+        "cores": cores,
+        "multithreading": "False",
+        "mgkeydir": "/opt/MeshGems",
+    }
+
+
+def test_to_bool():
+    assert to_bool("True") is True
+    assert to_bool("false") is False
+    assert to_bool(1) is True
+    with pytest.raises(ValueError):
+        to_bool("maybe")
+
+
+def test_registry(tmp_path):
+    filename = tmp_path / "machines.json"
+    filename.write_text(
+        json.dumps(
+            {"small": machine(8), "big": machine(64, "slurm"), "mid": machine(32, "slurm", "False")}
+        )
+    )
+    registry = MachineRegistry(str(filename))
+    assert registry.get("big").multithreading is False
+    assert registry.get("mid").smp is False
+    assert [node.name for node in registry.select(min_cores=32, manager=JobManagerType.slurm)] == [
+        "big",
+        "mid",
+    ]
+    assert registry.select(otype=NodeType.visu) == []
+    with pytest.raises(ValueError):
+        registry.get("unknown")
+
+    # parsed once
+    machines = registry.machines
+    assert registry.machines is machines
+
+    # reloaded on change
+    filename.write_text(json.dumps({"small": machine(16)}))
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert registry.names() == ["small"]
+    assert registry.get("small").cores == 16
+
+
+def test_loadmachines():
+    assert loadmachines("stokes").manager.otype == JobManagerType.slurm
@@ -0,0 +1,74 @@
+"""
+Tests for placement of cases on compute nodes in python_magnetsetup.
+"""
+
+import json
+
+from python_magnetsetup.node import MachineRegistry
+from python_magnetsetup.placement import CaseSize, rank_nodes
+
+
+def machine(cores: int, manager: str = "none") -> dict:
+    return {
+        "type": "compute",
+        "smp": "True",
+        "dns": "node.local",
+        "jobmanager": {"type": manager, "queues": []},
+        "cores": cores,
+        "multithreading": "True",
+        "mgkeydir": "/opt/MeshGems",
+    }
+
+
+def registry(tmp_path) -> MachineRegistry:
+    filename = tmp_path / "machines.json"
+    filename.write_text(
+        json.dumps(
+            {
+                "calcul18": machine(8),
+                "calcul22": machine(40),
+                "kelvin": machine(64),
+                "stokes": machine(64, "slurm"),
+            }
+        )
+    )
+    return MachineRegistry(str(filename))
+
+
+def test_case_size():
+    method_data = ["cfpdes", "static", "Axi", "thmagel", "mean", "meter", False]
+    mmat = {
+        "Conductor_H1": {"markers": [{"name": "H1_Cu%1%", "index1": ["1:21"]}]},
+        "R1": {"markers": "R1"},
+    }
+    size = CaseSize.from_materials(method_data, mmat)
+    assert size.nparts == 21
+    assert size.dofs == 21 * 5.0e3 * 4
+
+
+def test_small_case_on_small_node(tmp_path):
+    size = CaseSize("cfpdes", "static", "Axi", "thelec", False, 2)
+    placements = rank_nodes(size, registry(tmp_path))
+    assert placements[0].node.name == "calcul18"
+    assert placements[0].np == 1
+    assert placements[-1].node.name == "stokes"
+
+
+def test_large_case_on_large_node(tmp_path):
+    size = CaseSize("cfpdes", "static", "3D", "thmagel", True, 300)
+    placements = rank_nodes(size, registry(tmp_path))
+    assert placements[0].node.name == "kelvin"
+    assert placements[0].np == 32
+    assert [p.runtime for p in placements] == sorted(p.runtime for p in placements)
+
+
+def test_measured_runtimes(tmp_path):
+    from python_magnetsetup.history import RunHistory
+
+    size = CaseSize("cfpdes", "static", "Axi", "thelec", False, 2)
+    with RunHistory(":memory:") as history:
+        history.record(size, "calcul18", 1, "Run", 500.0)
+        history.record(size, "calcul22", 4, "Run", 20.0)
+        placements = rank_nodes(size, registry(tmp_path), history)
+    assert (placements[0].node.name, placements[0].np) == ("calcul22", 4)
+    assert placements[-1].node.name == "calcul18"
@@ -0,0 +1,102 @@
+"""
+Tests for the asyncio setup service in python_magnetsetup.
+"""
+
+import time
+import asyncio
+import threading
+from argparse import Namespace
+
+import pytest
+
+from python_magnetsetup.service import SetupService, fingerprint
+
+
+class StubBackend:
+    """Stand-in for python_magnetsetup.setup counting calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def setup(self, MyEnv, args, confdata, jsonfile, currents, session=None):
+        with self.lock:
+            self.calls += 1
+        time.sleep(0.1)
+        if confdata.get("broken"):
+            raise RuntimeError("broken confdata")
+        return (f"{jsonfile}.yaml", f"{jsonfile}.cfg", f"{jsonfile}.json", "", "", [])
+
+
+class StubClient:
+    """Stand-in for the web service: fires concurrent requests."""
+
+    def __init__(self, service: SetupService):
+        self.service = service
+
+    async def request(self, wd: str, n: int = 1, broken: bool = False):
+        args = Namespace(wd=wd, method="cfpdes", geom="Axi", model="thmagel")
+        confdata = {"name": "M9", "broken": broken}
+        return await asyncio.gather(
+            *[
+                self.service.setup(args, confdata, "M9", {"M9": {"value": 1.0}})
+                for i in range(n)
+            ],
+            return_exceptions=True,
+        )
+
+
+def test_fingerprint():
+    assert fingerprint("setup", Namespace(a=1, b=2)) == fingerprint("setup", Namespace(b=2, a=1))
+    assert fingerprint("setup", {"a": 1}) != fingerprint("setup_cmds", {"a": 1})
+
+
+def test_coalescing():
+    async def run():
+        backend = StubBackend()
+        async with SetupService(None, workers=2, executor="thread", backend=backend) as service:
+            queue = service.subscribe()
+            client = StubClient(service)
+            results = await client.request("case1", 5)
+            assert backend.calls == 1
+            assert results == [("M9.yaml", "M9.cfg", "M9.json", "", "", [])] * 5
+
+            await asyncio.gather(client.request("case1"), client.request("case2"))
+            assert backend.calls == 3
+
+            [error] = await client.request("case3", broken=True)
+            assert isinstance(error, RuntimeError)
+
+            events = []
+            while not queue.empty():
+                events.append(queue.get_nowait())
+            states = [event.state for event in events]
+            assert states[:7] == ["queued"] + ["coalesced"] * 4 + ["started", "done"]
+            assert states[-1] == "failed"
+
+    asyncio.run(run())
+
+
+def test_executor():
+    with pytest.raises(ValueError):
+        SetupService(None, executor="gpu", backend=StubBackend())
+
+
+def test_session():
+    async def run():
+        backend = StubBackend()
+        args = Namespace(wd="case1")
+        async with SetupService(None, executor="thread", backend=backend) as service:
+            # the session is passed along but not part of the fingerprint
+            results = await asyncio.gather(
+                service.setup(args, {"name": "M9"}, "M9", {}, session=object()),
+                service.setup(args, {"name": "M9"}, "M9", {}, session=object()),
+            )
+            assert results[0] == results[1]
+            assert backend.calls == 1
+
+        async with SetupService(None, workers=1, backend=backend) as service:
+            with pytest.raises(ValueError):
+                await service.setup(args, {"name": "M9"}, "M9", {}, session=object())
+
+    asyncio.run(run())
@@ -0,0 +1,100 @@
+"""
+Tests for msite setup executors in python_magnetsetup.
+"""
+
+import os
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from python_magnetsetup import setup
+from python_magnetsetup.config import EnvSnapshot, load_env, loadconfig, loadtemplates
+from python_magnetsetup.file_utils import findfile, search_paths
+
+# two-magnet site of the data repository (DATA_REPO in settings.env)
+SITE = os.environ.get("MAGNETSETUP_TEST_SITE", "M19061901")
+
+
+def fake_magnet_setup(MyEnv, mname, confdata, cad, method_data, templates, current, debug):
+    """Stand-in for setup.magnet_setup (module level: pickled by process workers)."""
+    mdict = {
+        "part_electric": [f"{mname}_{cad}_Cu"],
+        "part_thermic": [f"{mname}_{cad}_Cu", f"{mname}_{cad}_Isolant"],
+        "init_temp": [{"name": f"{mname}_Cu", "value": 293.0}],
+    }
+    mmat = {f"{mname}_Cu": {"sigma": confdata["sigma"], "current": current}}
+    mmodels = {"heat": {f"{mname}_Cu": {"expr": "k"}}, "elastic": {}}
+    mpost = {
+        "Current": [{"part_electric": [f"{mname}_{cad}_Cu"]}],
+        "Power": [{"part_electric": [f"{mname}_{cad}_Cu"]}],
+    }
+    return (mdict, mmat, mmodels, mpost)
+
+
+@pytest.fixture
+def site(monkeypatch):
+    monkeypatch.setattr(setup, "magnet_setup", fake_magnet_setup)
+    confdata = {"magnets": [{"M1": {"sigma": 5.8e7}}, {"M2": {"sigma": 5.3e7}}]}
+    cad = SimpleNamespace(magnets=["HL-31", "M9Bitters"])
+    currents = {"M1": {"value": 31.0e3}, "M2": {"value": 15.0e3}}
+    method_data = ["cfpdes", "static", "Axi", "thmagel", "mean", "meter", "linear"]
+    return (EnvSnapshot(), confdata, cad, method_data, {}, currents)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_msite_setup_executors(site, executor):
+    serial = setup.msite_setup(*site, workers=1)
+    pooled = setup.msite_setup(*site, workers=2, executor=executor)
+    assert pooled == serial
+    (mdict, mmat, mmodels, mpost) = serial
+    assert list(mmat) == ["M1_Cu", "M2_Cu"]
+    assert sorted(mpost["Current"][0]["part_electric"]) == ["M1_HL-31_Cu", "M2_M9Bitters_Cu"]
+
+
+def test_msite_setup_unknown_executor(site):
+    with pytest.raises(ValueError):
+        setup.msite_setup(*site, workers=2, executor="mpi")
+
+
+@pytest.fixture
+def real_site():
+    pytest.importorskip("python_magnetgeo")
+    from python_magnetsetup.geomcache import load_geometry
+
+    MyEnv = load_env(os.path.join(os.path.dirname(__file__), "..", "settings.env"))
+    try:
+        datafile = findfile(f"{SITE}-data.json", search_paths(MyEnv, "geom"))
+        with open(datafile, "r") as f:
+            confdata = json.load(f)
+        cad = load_geometry(findfile(f"{confdata['name']}.yaml", search_paths(MyEnv, "geom")))
+    except FileNotFoundError as e:
+        pytest.skip(f"no {SITE} site in data repository ({e})")
+    if len(confdata["magnets"]) < 2:
+        pytest.skip(f"{SITE} is not a multi-magnet site")
+
+    method_data = ["cfpdes", "static", "Axi", "thmagel", "mean", "meter", False]
+    templates = loadtemplates(MyEnv, loadconfig(), method_data)
+    currents = {
+        list(magnet)[0]: {"value": 1.0e3, "type": "winding"} for magnet in confdata["magnets"]
+    }
+    return (MyEnv, confdata, cad, method_data, templates, currents)
+
+
+def test_msite_setup_real_site(real_site, tmp_path, monkeypatch):
+    outputs = {}
+    for executor, workers in [("serial", 1), ("thread", 2), ("process", 2)]:
+        wd = tmp_path / executor
+        wd.mkdir()
+        monkeypatch.chdir(wd)
+        (mdict, mmat, mmodels, mpost) = setup.msite_setup(
+            *real_site, workers=workers, executor=executor
+        )
+        csvfiles = {
+            name: (wd / name).read_text() for name in sorted(os.listdir(wd)) if name.endswith(".csv")
+        }
+        outputs[executor] = (mdict, mmat, mmodels, mpost, csvfiles)
+
+    # per magnet materials and csv files are the same whatever the executor
+    assert outputs["thread"] == outputs["serial"]
+    assert outputs["process"] == outputs["serial"]
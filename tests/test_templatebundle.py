@@ -0,0 +1,62 @@
+"""
+Tests for precompiled templates in python_magnetsetup.
+"""
+
+import os
+import shutil
+
+import chevron
+
+from python_magnetsetup.templatebundle import (
+    build_bundle,
+    load_bundle,
+    render,
+    template_text,
+    use_bundle,
+)
+
+TEMPLATES = os.path.join(
+    os.path.dirname(__file__), "..", "python_magnetsetup", "templates"
+)
+
+
+def test_bundle(tmp_path):
+    template_dir = tmp_path / "templates"
+    shutil.copytree(os.path.join(TEMPLATES, "cfpdes", "Axi", "thmagel"), template_dir / "thmagel")
+    build_bundle(str(template_dir))
+
+    bundle = load_bundle(str(template_dir))
+    assert load_bundle(str(template_dir)) is bundle
+    assert load_bundle(str(tmp_path)) is None
+    assert "magnetsetup" not in bundle.appcfg
+
+    template = str(template_dir / "thmagel" / "channel-gradH.mustache")
+    data = {"name": "H1", "markers": ["H1_Channel0"], "hw": "hw", "Tw": "Tw", "dTw": "dTw"}
+    with open(template, "r") as f:
+        expected = chevron.render(f, data)
+
+    use_bundle(bundle)
+    try:
+        assert template in bundle
+        assert render(template, data) == expected
+        assert template_text(template) == bundle.text(template)
+
+        # edited since the bundle was built: read from disk
+        with open(template, "a") as f:
+            f.write("\n")
+        assert template not in bundle
+        assert render(template, data) == expected + "\n"
+    finally:
+        use_bundle(None)
+
+
+def test_bundle_appcfg(tmp_path):
+    template_dir = tmp_path / "templates"
+    shutil.copytree(os.path.join(TEMPLATES, "cfpdes", "Axi", "thmagel"), template_dir / "thmagel")
+    appcfg_file = tmp_path / "magnetsetup.json"
+    appcfg_file.write_text('{"cfpdes": {}}')
+    build_bundle(str(template_dir), appcfg_file=str(appcfg_file))
+
+    assert load_bundle(str(template_dir)).appcfg == {"cfpdes": {}}
+    appcfg_file.write_text('{"cfpdes": {}, "cfpdes-thmagel": {}}')
+    assert load_bundle(str(template_dir)).appcfg is None
@@ -0,0 +1,35 @@
+"""
+Tests for units conversion in python_magnetsetup.
+"""
+
+import pytest
+
+from python_magnetsetup import units
+from python_magnetsetup.units import convert_material
+
+
+def cuag() -> dict:
+    return {
+        "name": "CuAg01",
+        "ThermalConductivity": 380.0,
+        "Young": 127.0e9,
+        "VolumicMass": 9000.0,
+        "ElectricalConductivity": 52.4e6,
+        "Poisson": 0.33,
+    }
+
+
+def test_convert_material():
+    material = cuag()
+    converted = convert_material(material, "millimeter")
+    assert material == cuag()
+    assert converted["ElectricalConductivity"] == pytest.approx(52.4e3)
+    assert converted["VolumicMass"] == pytest.approx(9.0e-6)
+    assert converted["Poisson"] == 0.33
+
+    # same material on every helix: converted once, returned as copies
+    converted["sigma"] = 0
+    again = convert_material(cuag(), "millimeter")
+    assert "sigma" not in again
+    assert len([key for key in units._materials if key[1] == "millimeter"]) == 1
+    assert convert_material(material, "meter")["VolumicMass"] == pytest.approx(9000.0)